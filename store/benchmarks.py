@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from pymongo.write_concern import WriteConcern
+
+from store.core.config import settings
+from store.core.stats import summarize
+from store.db.mongo import db_client
+from store.models.product import ProductModel
+
+BENCHMARK_COLLECTION = "benchmark_products"
+
+
+def sample_document() -> Dict[str, Any]:
+    return ProductModel(
+        name="Benchmark product", quantity=10, price="8.500", status=True
+    ).model_dump()
+
+
+async def write_concern_benchmark(
+    profiles: List[str], count: int, concurrency: int, batch_size: int = 1
+) -> Dict[str, Dict[str, float]]:
+    """
+    Mede a vazão e a latência das escritas em cada perfil de durabilidade.
+
+    Para cada perfil de `settings.WRITE_CONCERN_PROFILES`, insere `count`
+    documentos em uma coleção temporária, com `concurrency` escritas
+    simultâneas de `batch_size` documentos cada, e descarta a coleção ao
+    final.
+
+    Args:
+        profiles (List[str]): Perfis a serem medidos.
+        count (int): Quantidade de documentos inseridos por perfil.
+        concurrency (int): Quantidade de escritas simultâneas.
+        batch_size (int): Documentos por escrita; acima de 1 usa
+        `insert_many`, como as cargas em lote.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Vazão, em documentos por segundo, e os
+        percentis de latência por escrita de cada perfil.
+    """
+    collection = db_client.get().get_database().get_collection(
+        BENCHMARK_COLLECTION)
+    results = {}
+
+    for profile in profiles:
+        target = collection.with_options(
+            write_concern=WriteConcern(
+                **settings.WRITE_CONCERN_PROFILES[profile])
+        )
+        batches = iter(range(0, count, batch_size))
+        latencies: List[float] = []
+
+        async def writer() -> None:
+            for start in batches:
+                documents = [
+                    sample_document()
+                    for _ in range(min(batch_size, count - start))
+                ]
+                started = time.perf_counter()
+                if batch_size > 1:
+                    await target.insert_many(documents, ordered=False)
+                else:
+                    await target.insert_one(documents[0])
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(writer() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        results[profile] = {
+            "documents_per_second": round(count / elapsed, 1),
+            **summarize(latencies),
+        }
+
+    await collection.drop()
+
+    return results
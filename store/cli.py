@@ -0,0 +1,174 @@
+import argparse
+import asyncio
+import json
+import os
+from typing import List, Optional
+
+from store.core.config import settings
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Constrói o parser de linha de comando de `python -m store`.
+
+    Os valores padrão de cada opção vêm de `Settings`, de modo que a mesma
+    configuração pode ser feita por variáveis de ambiente ou por argumentos.
+
+    Returns:
+        argparse.ArgumentParser: Parser com os subcomandos disponíveis.
+    """
+    parser = argparse.ArgumentParser(prog="python -m store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the API server")
+    serve.add_argument("--host", default=settings.SERVER_HOST)
+    serve.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    serve.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS,
+        help="Worker processes; 0 starts one per CPU core",
+    )
+    serve.add_argument(
+        "--loop",
+        choices=["auto", "asyncio", "uvloop"],
+        default=settings.SERVER_LOOP,
+        help="Event loop; auto uses uvloop when installed (extra `serve`) "
+        "and falls back to asyncio",
+    )
+    serve.add_argument(
+        "--http",
+        choices=["auto", "h11", "httptools"],
+        default=settings.SERVER_HTTP,
+        help="HTTP parser; auto uses httptools when installed (extra "
+        "`serve`) and falls back to h11",
+    )
+    serve.add_argument(
+        "--keep-alive",
+        type=int,
+        default=settings.SERVER_KEEP_ALIVE_SECONDS,
+        help="Seconds to keep idle connections open",
+    )
+    serve.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        help="Seconds to wait for in-flight requests on shutdown",
+    )
+    serve.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG)
+    serve.set_defaults(handler=serve_command)
+
+    benchmark = commands.add_parser(
+        "benchmark-writes",
+        help="Measure write throughput and latency per durability profile",
+    )
+    benchmark.add_argument(
+        "--profile",
+        action="append",
+        choices=sorted(settings.WRITE_CONCERN_PROFILES),
+        help="Profile to measure; may be repeated (default: all)",
+    )
+    benchmark.add_argument("--count", type=int, default=2000)
+    benchmark.add_argument("--concurrency", type=int, default=16)
+    benchmark.add_argument("--batch-size", type=int, default=1)
+    benchmark.set_defaults(handler=benchmark_writes_command)
+
+    migrate = commands.add_parser("migrate", help="Run a data migration")
+    migrate.add_argument(
+        "migration",
+        choices=["ids", "drop-id-index", "prices"],
+        help="ids: rewrite legacy products with the binary UUID as _id; "
+        "drop-id-index: drop the id index once every process filters by _id; "
+        "prices: convert stored prices to the PRICE_STORAGE format",
+    )
+    migrate.add_argument("--batch-size", type=int, default=500)
+    migrate.set_defaults(handler=migrate_command)
+
+    return parser
+
+
+def worker_count(workers: int) -> int:
+    """
+    Resolve a quantidade de processos de trabalho.
+
+    Args:
+        workers (int): Quantidade solicitada; `0` ou negativo significa um
+        processo por núcleo de CPU disponível.
+
+    Returns:
+        int: Quantidade efetiva de processos.
+    """
+    if workers > 0:
+        return workers
+
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+def serve_command(args: argparse.Namespace) -> None:
+    """
+    Inicia o servidor uvicorn com as opções informadas.
+
+    Cada processo de trabalho importa a aplicação por conta própria e cria o
+    seu próprio cliente do MongoDB no `lifespan`, nunca compartilhando um
+    cliente herdado do processo pai.
+    """
+    import uvicorn
+
+    uvicorn.run(
+        "store.main:app",
+        host=args.host,
+        port=args.port,
+        workers=worker_count(args.workers),
+        loop=args.loop,
+        http=args.http,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        backlog=args.backlog,
+    )
+
+
+def benchmark_writes_command(args: argparse.Namespace) -> None:
+    """
+    Executa o benchmark de perfis de durabilidade e imprime o resultado em
+    JSON.
+    """
+    from store.benchmarks import write_concern_benchmark
+
+    result = asyncio.run(
+        write_concern_benchmark(
+            profiles=args.profile or sorted(settings.WRITE_CONCERN_PROFILES),
+            count=args.count,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+        )
+    )
+    print(json.dumps(result, indent=2))
+
+
+def migrate_command(args: argparse.Namespace) -> None:
+    """
+    Executa a migração escolhida e imprime o resultado em JSON.
+    """
+    from store import migrations
+
+    if args.migration == "ids":
+        result = {
+            "migrated": asyncio.run(
+                migrations.migrate_product_ids(batch_size=args.batch_size))
+        }
+    elif args.migration == "prices":
+        result = asyncio.run(
+            migrations.backfill_prices(batch_size=args.batch_size))
+    else:
+        asyncio.run(migrations.drop_legacy_id_index())
+        result = {"dropped": True}
+
+    print(json.dumps(result))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.handler(args)
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, status
+
+from store.schemas.health import HealthOut
+from store.usecases.health import health_usecase
+
+router = APIRouter(tags=["health"])
+
+
+@router.get(path="/live", status_code=status.HTTP_200_OK)
+async def live() -> HealthOut:
+    """
+    Sonda de vivacidade (liveness).
+
+    Responde enquanto o processo for capaz de atender requisições, sem
+    consultar dependências externas.
+
+    Returns:
+        HealthOut: Objeto contendo o estado do processo.
+    """
+    await health_usecase.live()
+
+    return HealthOut(status="ok")
+
+
+@router.get(path="/ready", status_code=status.HTTP_200_OK)
+async def ready() -> HealthOut:
+    """
+    Sonda de prontidão (readiness).
+
+    Verifica se a conexão com o MongoDB está aquecida e respondendo. Enquanto
+    não estiver, o processo não deve receber tráfego.
+
+    Returns:
+        HealthOut: Objeto contendo o estado do processo.
+
+    Raises:
+        HTTPException: Se o banco de dados não estiver pronto, uma exceção
+        HTTP será levantada com o código de status 503 Service Unavailable.
+    """
+    if not await health_usecase.ready():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database not ready")
+
+    return HealthOut(status="ok")
@@ -0,0 +1,125 @@
+from typing import List
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, status
+from pydantic import UUID4
+
+from store.core.config import settings
+from store.core.exceptions import NotFoundException
+from store.schemas.job import ExportIn, JobOut, RepriceIn
+from store.schemas.product import ProductIn, ProductOut
+from store.usecases.job import JobUsecase
+
+router = APIRouter(tags=["jobs"])
+
+
+@router.post(path="/import", status_code=status.HTTP_202_ACCEPTED)
+async def post_import(
+    body: List[ProductIn] = Body(
+        ..., max_length=settings.JOBS_IMPORT_MAX_ITEMS),
+    usecase: JobUsecase = Depends(),
+) -> JobOut:
+    """
+    Agenda a importação de produtos em segundo plano.
+
+    Args:
+        body (List[ProductIn]): Lista de produtos a serem criados, com no
+        máximo `JOBS_IMPORT_MAX_ITEMS` itens.
+        usecase (JobUsecase): Dependência para acessar a lógica de negócio
+        de processamentos.
+
+    Returns:
+        JobOut: O processamento agendado; acompanhe-o em `GET /jobs/{id}`.
+    """
+    return await usecase.submit_import(body=body)
+
+
+@router.post(path="/reprice", status_code=status.HTTP_202_ACCEPTED)
+async def post_reprice(
+    body: RepriceIn = Body(...), usecase: JobUsecase = Depends()
+) -> JobOut:
+    """
+    Agenda o reajuste de preços dos produtos em segundo plano.
+
+    Args:
+        body (RepriceIn): Percentual de reajuste e faixa de preço opcional.
+        usecase (JobUsecase): Dependência para acessar a lógica de negócio
+        de processamentos.
+
+    Returns:
+        JobOut: O processamento agendado; acompanhe-o em `GET /jobs/{id}`.
+    """
+    return await usecase.submit_reprice(body=body)
+
+
+@router.post(path="/export", status_code=status.HTTP_202_ACCEPTED)
+async def post_export(
+    body: ExportIn = Body(...), usecase: JobUsecase = Depends()
+) -> JobOut:
+    """
+    Agenda a exportação dos produtos em segundo plano.
+
+    Args:
+        body (ExportIn): Faixa de preço opcional.
+        usecase (JobUsecase): Dependência para acessar a lógica de negócio
+        de processamentos.
+
+    Returns:
+        JobOut: O processamento agendado; os produtos exportados ficam em
+        `GET /jobs/{id}/results`, um lote por página.
+    """
+    return await usecase.submit_export(body=body)
+
+
+@router.get(path="/{id}", status_code=status.HTTP_200_OK)
+async def get(
+    id: UUID4 = Path(alias="id"), usecase: JobUsecase = Depends()
+) -> JobOut:
+    """
+    Obtém o estado e o progresso de um processamento.
+
+    Args:
+        id (UUID4): ID do processamento.
+        usecase (JobUsecase): Dependência para acessar a lógica de negócio
+        de processamentos.
+
+    Returns:
+        JobOut: Objeto contendo o estado do processamento.
+
+    Raises:
+        HTTPException: Se o processamento não for encontrado, uma exceção
+        HTTP será levantada com o código de status 404 Not Found.
+    """
+    try:
+        return await usecase.get(id=id)
+    except NotFoundException as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=exc.message) from exc
+
+
+@router.get(path="/{id}/results", status_code=status.HTTP_200_OK)
+async def get_results(
+    id: UUID4 = Path(alias="id"),
+    chunk: int = Query(0, ge=0),
+    usecase: JobUsecase = Depends(),
+) -> List[ProductOut]:
+    """
+    Obtém os produtos de um lote de uma exportação.
+
+    Args:
+        id (UUID4): ID do processamento.
+        chunk (int): Índice do lote, de `0` até `chunks - 1`.
+        usecase (JobUsecase): Dependência para acessar a lógica de negócio
+        de processamentos.
+
+    Returns:
+        List[ProductOut]: Produtos exportados no lote, ou uma lista vazia.
+
+    Raises:
+        HTTPException: Se o processamento não for encontrado, uma exceção
+        HTTP será levantada com o código de status 404 Not Found.
+    """
+    try:
+        return await usecase.get_results(id=id, chunk=chunk)
+    except NotFoundException as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=exc.message) from exc
@@ -0,0 +1,20 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, status
+
+from store.core.metrics import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get(path="", status_code=status.HTTP_200_OK)
+async def get() -> Dict[str, Dict[str, Any]]:
+    """
+    Retorna as métricas internas da aplicação.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Métricas agrupadas por componente, como a
+        profundidade das filas e a quantidade de rejeições do controle de
+        admissão.
+    """
+    return metrics.collect()
@@ -1,32 +1,125 @@
-from typing import List
+from typing import Any, Awaitable, Callable, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Path, status
+from fastapi import (  # E501
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    status,
+)
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import UUID4
 
-from store.core.exceptions import NotFoundException
+from store.core.config import settings
+from store.core.exceptions import (  # E501
+    ConflictException,
+    GoneException,
+    NotFoundException,
+    OverloadedException,
+    UnavailableException,
+    UnprocessableException,
+)
+from store.core.tracing import traced
 from store.schemas.product import (  # E501
+    AnalyticsSort,
+    Price,
+    ProductAnalyticsOut,
+    ProductBatchGetIn,
+    ProductBatchGetItem,
+    ProductChangesOut,
     ProductIn,
     ProductOut,
+    ProductStockIn,
+    ProductStockOut,
     ProductUpdate,
     ProductUpdateOut,
 )
+from store.usecases.catalog import catalog_snapshot
+from store.usecases.idempotency import (  # E501
+    fingerprint,
+    idempotency_usecase,
+    idempotent_id,
+)
 from store.usecases.product import ProductUsecase
+from store.usecases.stream import product_stream
 
 router = APIRouter(tags=["products"])
 
+IdempotencyKey = Header(
+    None,
+    alias="Idempotency-Key",
+    min_length=1,
+    max_length=255,
+    description="Client-generated key that makes retries of this write safe",
+)
+
+
+async def idempotent(
+    scope: str, key: str, request: Any, func: Callable[[str], Awaitable[Any]]
+) -> JSONResponse:
+    """
+    Executa uma escrita de criação com chave de idempotência.
+
+    `func` recebe o `fingerprint` do corpo, gravado nos produtos criados
+    para recusar a chave reutilizada com outro corpo mesmo depois que o
+    registro da chave expirou.
+
+    Returns:
+        JSONResponse: A resposta da escrita, com o cabeçalho
+        `Idempotent-Replayed: true` quando repetida de uma requisição anterior.
+
+    Raises:
+        HTTPException: 409 se outra requisição com a chave está em andamento
+        ou 422 se a chave foi usada com outro corpo.
+    """
+    digest = fingerprint(request)
+    try:
+        response = await idempotency_usecase.execute(
+            scope=scope,
+            key=key,
+            request=request,
+            status_code=status.HTTP_201_CREATED,
+            func=lambda: func(digest),
+            digest=digest,
+        )
+    except ConflictException as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=exc.message)
+    except UnprocessableException as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=exc.message,
+        )
+
+    return JSONResponse(
+        content=response.body,
+        status_code=response.status_code,
+        headers={"Idempotent-Replayed": str(response.replayed).lower()},
+    )
+
 
 @router.post(path="/", status_code=status.HTTP_201_CREATED)
+@traced
 async def post(
-    body: ProductIn = Body(...), usecase: ProductUsecase = Depends()
+    body: ProductIn = Body(...),
+    usecase: ProductUsecase = Depends(),
+    idempotency_key: Optional[str] = IdempotencyKey,
 ) -> ProductOut:
     """
     Cria um novo produto.
 
+    Com o cabeçalho `Idempotency-Key`, repetir a requisição com a mesma chave
+    retorna a resposta original sem criar outro produto.
+
     Args:
         body (ProductIn): Objeto contendo os dados do produto a ser criado,
         conforme o schema `ProductIn`.
         usecase (ProductUsecase): Dependência para acessar a lógica de negócio
         de produtos.
+        idempotency_key (str): Chave de idempotência opcional.
 
     Returns:
         ProductOut: Objeto contendo os dados do produto criado, conforme o
@@ -36,10 +129,236 @@ async def post(
         HTTPException: Se a criação falhar, uma exceção HTTP será levantada
         com o código de status apropriado.
     """
-    return await usecase.create(body=body)
+    if idempotency_key is None:
+        return await usecase.create(body=body)
+
+    return await idempotent(
+        scope="products.create",
+        key=idempotency_key,
+        request=body,
+        func=lambda digest: usecase.create(
+            body=body,
+            id=idempotent_id("products.create", idempotency_key),
+            fingerprint=digest,
+        ),
+    )
+
+
+@router.post(path="/bulk", status_code=status.HTTP_201_CREATED)
+@traced
+async def post_bulk(
+    body: List[ProductIn] = Body(..., max_length=settings.BULK_MAX_ITEMS),
+    usecase: ProductUsecase = Depends(),
+    idempotency_key: Optional[str] = IdempotencyKey,
+) -> List[ProductOut]:
+    """
+    Cria vários produtos em uma única escrita.
+
+    Utiliza o perfil de durabilidade da operação `bulk`, normalmente mais
+    rápido que o das criações individuais, adequado a cargas de catálogo.
+    Aceita o cabeçalho `Idempotency-Key`, como a criação individual.
+
+    Args:
+        body (List[ProductIn]): Lista de produtos a serem criados, conforme o
+        schema `ProductIn`, com no máximo `BULK_MAX_ITEMS` itens.
+        usecase (ProductUsecase): Dependência para acessar a lógica de negócio
+        de produtos.
+        idempotency_key (str): Chave de idempotência opcional.
+
+    Returns:
+        List[ProductOut]: Lista dos produtos criados, conforme o schema
+        `ProductOut`, na mesma ordem da requisição.
+    """
+    if idempotency_key is None:
+        return await usecase.create_many(body=body)
+
+    return await idempotent(
+        scope="products.bulk",
+        key=idempotency_key,
+        request=body,
+        func=lambda digest: usecase.create_many(
+            body=body,
+            ids=[
+                idempotent_id("products.bulk", idempotency_key, index)
+                for index in range(len(body))
+            ],
+            fingerprint=digest,
+        ),
+    )
+
+
+@router.post(path="/batch-get", status_code=status.HTTP_200_OK)
+@traced
+async def post_batch_get(
+    body: ProductBatchGetIn = Body(...), usecase: ProductUsecase = Depends()
+) -> List[ProductBatchGetItem]:
+    """
+    Obtém vários produtos por ID em uma única requisição.
+
+    Args:
+        body (ProductBatchGetIn): Objeto contendo a lista de IDs, com no
+        máximo `BATCH_GET_MAX_IDS` itens.
+        usecase (ProductUsecase): Dependência para acessar a lógica de negócio
+        de produtos.
+
+    Returns:
+        List[ProductBatchGetItem]: Um item por ID, na ordem da requisição,
+        indicando se o produto foi encontrado.
+    """
+    products = await usecase.get_many(ids=body.ids)
+
+    return [
+        ProductBatchGetItem(id=id, found=product is not None, product=product)
+        for id, product in zip(body.ids, products)
+    ]
+
+
+@router.get(path="/analytics", status_code=status.HTTP_200_OK)
+@traced
+async def analytics(
+    min_price: Optional[Price] = Query(None),
+    max_price: Optional[Price] = Query(None),
+    min_quantity: Optional[int] = Query(None),
+    max_quantity: Optional[int] = Query(None),
+    product_status: Optional[bool] = Query(None, alias="status"),
+    sort: AnalyticsSort = Query("price"),
+    limit: int = Query(100, ge=1, le=1000),
+) -> ProductAnalyticsOut:
+    """
+    Consulta analítica sobre a cópia do catálogo em memória.
+
+    Filtra, ordena e limita os produtos sem consultar o MongoDB, por exemplo
+    os produtos ativos mais baratos (`status=true&sort=price&limit=10`) ou os
+    de menor estoque em uma faixa de preço
+    (`min_price=100&max_price=200&sort=quantity`). Requer
+    `ANALYTICS_ENABLED` e o extra `analytics` (NumPy).
+
+    Args:
+        min_price (Decimal): Preço mínimo, inclusivo.
+        max_price (Decimal): Preço máximo, inclusivo.
+        min_quantity (int): Quantidade mínima, inclusiva.
+        max_quantity (int): Quantidade máxima, inclusiva.
+        product_status (bool): Situação do produto.
+        sort (str): Campo de ordenação; prefixo `-` para ordem decrescente.
+        limit (int): Quantidade máxima de produtos retornados.
+
+    Returns:
+        ProductAnalyticsOut: Total de produtos encontrados e os primeiros
+        na ordem pedida.
+
+    Raises:
+        HTTPException: Se a cópia do catálogo não estiver disponível, uma
+        exceção HTTP será levantada com o código de status 503 Service
+        Unavailable.
+    """
+    try:
+        return catalog_snapshot.query(
+            min_price=min_price,
+            max_price=max_price,
+            min_quantity=min_quantity,
+            max_quantity=max_quantity,
+            status=product_status,
+            sort=sort,
+            limit=limit,
+        )
+    except UnavailableException as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=exc.message) from exc
+
+
+@router.get(path="/changes", status_code=status.HTTP_200_OK)
+@traced
+async def changes(
+    since: Optional[str] = Query(None, max_length=200),
+    limit: int = Query(100, ge=1, le=1000),
+    usecase: ProductUsecase = Depends(),
+) -> ProductChangesOut:
+    """
+    Lista os produtos alterados e excluídos desde a última sincronização.
+
+    O cliente começa sem `since` e, a cada chamada, envia o `next` recebido
+    na anterior, repetindo enquanto `has_more` for verdadeiro. Assim o custo
+    da sincronização acompanha a quantidade de alterações, e não o tamanho
+    do catálogo.
+
+    Args:
+        since (str): Token `next` da chamada anterior.
+        limit (int): Quantidade máxima de alterações.
+        usecase (ProductUsecase): Dependência para acessar a lógica de negócio
+        de produtos.
+
+    Returns:
+        ProductChangesOut: As alterações, em ordem, e o token para continuar.
+
+    Raises:
+        HTTPException: 422 Unprocessable Entity se o token for inválido ou
+        410 Gone se for mais antigo que a retenção das exclusões; nesse caso
+        o cliente deve baixar o catálogo inteiro e recomeçar sem `since`.
+    """
+    try:
+        return await usecase.changes(since=since, limit=limit)
+    except UnprocessableException as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=exc.message) from exc
+    except GoneException as exc:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE, detail=exc.message) from exc
+
+
+@router.get(path="/stream", status_code=status.HTTP_200_OK)
+@traced
+async def stream(ids: List[UUID4] = Query(...)) -> StreamingResponse:
+    """
+    Acompanha a quantidade, o preço e o status de produtos em tempo real,
+    como Server-Sent Events.
+
+    A conexão recebe primeiro o estado atual de cada produto e, a seguir,
+    um evento `product` a cada alteração, além de comentários periódicos de
+    manutenção da conexão. Um cliente que não consome os eventos a tempo
+    recebe o evento `dropped` e é desconectado; ao reconectar, recebe o
+    estado atual novamente.
+
+    Args:
+        ids (List[UUID4]): IDs dos produtos acompanhados, até
+        `STREAM_MAX_IDS`.
+
+    Returns:
+        StreamingResponse: O fluxo de eventos (`text/event-stream`).
+
+    Raises:
+        HTTPException: 422 Unprocessable Entity se forem informados mais de
+        `STREAM_MAX_IDS` produtos ou 503 Service Unavailable se o fluxo
+        estiver desabilitado ou o processo já atender
+        `STREAM_MAX_CONNECTIONS` conexões.
+    """
+    if len(set(ids)) > settings.STREAM_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.STREAM_MAX_IDS} ids are allowed",
+        )
+    if not settings.STREAM_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Product stream is disabled")
+
+    try:
+        messages = product_stream.stream(ids)
+    except OverloadedException as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=exc.message) from exc
+
+    return StreamingResponse(
+        messages,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get(path="/{id}", status_code=status.HTTP_200_OK)
+@traced
 async def get(
     id: UUID4 = Path(alias="id"), usecase: ProductUsecase = Depends()
 ) -> ProductOut:
@@ -67,11 +386,21 @@ async def get(
 
 
 @router.get(path="/", status_code=status.HTTP_200_OK)
-async def query(usecase: ProductUsecase = Depends()) -> List[ProductOut]:
+@traced
+async def query(
+    min_price: Optional[Price] = Query(None),
+    max_price: Optional[Price] = Query(None),
+    usecase: ProductUsecase = Depends(),
+) -> List[ProductOut]:
     """
-    Lista todos os produtos.
+    Lista todos os produtos, opcionalmente filtrando por faixa de preço.
+
+    A resposta é servida já serializada, do cache de listagens quando
+    habilitado (`LIST_CACHE_TTL_SECONDS`).
 
     Args:
+        min_price (Decimal): Preço mínimo, inclusivo.
+        max_price (Decimal): Preço máximo, inclusivo.
         usecase (ProductUsecase): Dependência para acessar a lógica de negócio
         de produtos.
 
@@ -79,10 +408,15 @@ async def query(usecase: ProductUsecase = Depends()) -> List[ProductOut]:
         List[ProductOut]: Lista de objetos contendo os dados de cada produto,
         conforme o schema `ProductOut`.
     """
-    return await usecase.query()
+    return Response(
+        content=await usecase.query_json(
+            min_price=min_price, max_price=max_price),
+        media_type="application/json",
+    )
 
 
 @router.patch(path="/{id}", status_code=status.HTTP_200_OK)
+@traced
 async def patch(
     id: UUID4 = Path(alias="id"),
     body: ProductUpdate = Body(...),
@@ -104,16 +438,60 @@ async def patch(
 
     Raises:
         HTTPException: Se o produto não for encontrado, uma exceção HTTP será
-        levantada com o código de status 404 Not Found.
+        levantada com o código de status 404 Not Found; se o contador de
+        estoque do produto estiver sendo redistribuído, 409 Conflict.
     """
     try:
         return await usecase.update(id=id, body=body)
     except NotFoundException as exc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=exc.message) from exc
+    except ConflictException as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=exc.message) from exc
+
+
+@router.post(path="/{id}/stock", status_code=status.HTTP_200_OK)
+@traced
+async def post_stock(
+    id: UUID4 = Path(alias="id"),
+    body: ProductStockIn = Body(...),
+    usecase: ProductUsecase = Depends(),
+) -> ProductStockOut:
+    """
+    Ajusta o estoque de um produto, somando `delta` à quantidade.
+
+    Diferente do `PATCH`, que grava uma quantidade absoluta, os ajustes
+    podem ser distribuídos em contadores parciais nos produtos com muitas
+    escritas (ver `COUNTERS_ENABLED`).
+
+    Args:
+        id (UUID4): ID do produto.
+        body (ProductStockIn): Quantidade a somar, conforme o schema
+        `ProductStockIn`.
+        usecase (ProductUsecase): Dependência para acessar a lógica de negócio
+        de produtos.
+
+    Returns:
+        ProductStockOut: A nova quantidade, ou `sharded` verdadeiro quando o
+        ajuste foi feito em um contador parcial.
+
+    Raises:
+        HTTPException: Se o produto não for encontrado, uma exceção HTTP será
+        levantada com o código de status 404 Not Found.
+        UnavailableException: Se a distribuição do contador do produto
+        continuar mudando após as tentativas do ajuste; a resposta é 503
+        Service Unavailable e o ajuste pode ser repetido.
+    """
+    try:
+        return await usecase.adjust_stock(id=id, delta=body.delta)
+    except NotFoundException as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=exc.message) from exc
 
 
 @router.delete(path="/{id}", status_code=status.HTTP_204_NO_CONTENT)
+@traced
 async def delete(
     id: UUID4 = Path(alias="id"), usecase: ProductUsecase = Depends()
 ) -> None:
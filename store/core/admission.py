@@ -0,0 +1,165 @@
+import asyncio
+from collections import deque
+from typing import Any, Dict, Mapping
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from store.core.config import settings
+from store.core.exceptions import OverloadedException
+from store.core.metrics import metrics
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class AdmissionController:
+    """
+    Limita a quantidade de requisições executando ao mesmo tempo.
+
+    Até `limit` requisições executam simultaneamente; as seguintes esperam em
+    uma fila limitada a `queue_size` posições por no máximo `queue_timeout`
+    segundos. Quando a fila está cheia, ou o prazo expira, a requisição é
+    rejeitada imediatamente com `OverloadedException`, mantendo a latência
+    das requisições aceitas sob controle quando o MongoDB fica lento.
+    """
+    def __init__(
+        self, name: str, limit: int, queue_size: int, queue_timeout: float
+    ) -> None:
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        """
+        Obtém uma vaga de execução, esperando na fila se necessário.
+
+        Raises:
+            OverloadedException: Se a fila estiver cheia ou se o prazo de
+            espera na fila expirar.
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.accepted += 1
+            return
+
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            raise OverloadedException(
+                message=f"Too many concurrent {self.name} requests")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # O prazo pode expirar na mesma iteração em que `release` repassa
+            # a vaga; nesse caso ela é devolvida para não ser perdida.
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            self.timed_out += 1
+            raise OverloadedException(
+                message=f"Timed out waiting for a {self.name} slot") from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        self.accepted += 1
+
+    def release(self) -> None:
+        """
+        Libera uma vaga, repassando-a diretamente ao próximo da fila.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self.in_flight -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_size": self.queue_size,
+            "queued": len(self._waiters),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI que aplica o controle de admissão por classe de rota.
+
+    Requisições de leitura (`GET`, `HEAD`, `OPTIONS`) e de escrita usam
+    controladores separados, para que uma rajada de escritas não bloqueie
+    as leituras e vice-versa. Rotas de saúde e métricas nunca são limitadas.
+    Requisições rejeitadas recebem 503 com o cabeçalho `Retry-After`.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        controllers: Mapping[str, AdmissionController],
+    ) -> None:
+        self.app = app
+        self.controllers = controllers
+        self.exempt_paths = tuple(settings.ADMISSION_EXEMPT_PATHS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(
+            self.exempt_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        kind = "read" if scope["method"] in READ_METHODS else "write"
+        controller = self.controllers[kind]
+
+        try:
+            await controller.acquire()
+        except OverloadedException as exc:
+            response = JSONResponse(
+                {"detail": exc.message},
+                status_code=503,
+                headers={
+                    "Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
+
+
+admission_controllers = {
+    "read": AdmissionController(
+        name="read",
+        limit=settings.ADMISSION_READ_LIMIT,
+        queue_size=settings.ADMISSION_READ_QUEUE_SIZE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+    ),
+    "write": AdmissionController(
+        name="write",
+        limit=settings.ADMISSION_WRITE_LIMIT,
+        queue_size=settings.ADMISSION_WRITE_QUEUE_SIZE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+    ),
+}
+
+for name, controller in admission_controllers.items():
+    metrics.register(f"admission.{name}", controller.snapshot)
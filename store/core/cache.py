@@ -0,0 +1,182 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Iterable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """
+    Cache em memória, por processo, com expiração e descarte LRU.
+
+    Guarda até `max_size` entradas por no máximo `ttl` segundos; ao atingir
+    o limite, descarta a entrada usada há mais tempo. Cada processo tem o seu
+    próprio cache e só as escritas feitas pelo próprio processo o invalidam,
+    por isso `ttl` limita o tempo em que uma leitura pode ficar desatualizada
+    em relação às escritas de outros processos. Com `ttl` ou `max_size` igual
+    a zero o cache fica desabilitado.
+    """
+    def __init__(self, name: str, max_size: int, ttl: float) -> None:
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return entry[1]
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, V]:
+        """
+        Retorna as entradas válidas das chaves informadas; as ausentes ou
+        expiradas não aparecem no resultado.
+        """
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+
+        return found
+
+    def set(self, key: Hashable, value: V) -> None:
+        if not self.enabled:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class ResponseCache:
+    """
+    Cache em memória, por processo, de respostas já serializadas.
+
+    Cada entrada guarda os bytes da resposta e a geração em que foi criada.
+    `bump` incrementa a geração, invalidando todas as entradas de uma vez,
+    sem percorrê-las; as entradas antigas são descartadas quando lidas ou
+    pelo descarte LRU. O total de bytes guardados é limitado a `max_bytes`.
+    Assim como em `TTLCache`, apenas as escritas do próprio processo
+    incrementam a geração e `ttl` limita o atraso em relação às escritas de
+    outros processos. Com `ttl` ou `max_bytes` igual a zero o cache fica
+    desabilitado.
+    """
+    def __init__(self, name: str, max_bytes: int, ttl: float) -> None:
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generation = 0
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, bytes]]" = (
+            OrderedDict())
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_bytes > 0
+
+    def bump(self) -> None:
+        self.generation += 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[2])
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if (
+            entry is None
+            or entry[0] < time.monotonic()
+            or entry[1] != self.generation
+        ):
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return entry[2]
+
+    def set(self, key: Hashable, body: bytes, generation: int) -> None:
+        """
+        Guarda a resposta gerada na geração `generation`, lida antes da
+        consulta que a produziu; se houve escrita desde então a resposta pode
+        estar desatualizada e não é guardada.
+        """
+        if (
+            not self.enabled
+            or generation != self.generation
+            or len(body) > self.max_bytes
+        ):
+            return
+
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, generation, body)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,5 +1,13 @@
+from typing import Dict, List, Literal, Optional, Union
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+ReadPreferenceMode = Literal[
+    "primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"
+]
+
+WriteConcernProfile = Dict[str, Optional[Union[int, str, bool]]]
+
 
 class Settings(BaseSettings):
     """
@@ -13,6 +21,131 @@ class Settings(BaseSettings):
     ROOT_PATH: str = "/"
 
     DATABASE_URL: str
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    READ_PREFERENCES: Dict[str, ReadPreferenceMode] = {
+        "get": "primary",
+        "query": "secondaryPreferred",
+        "export": "secondaryPreferred",
+        "stats": "secondaryPreferred",
+    }
+    READ_MAX_STALENESS_SECONDS: Dict[str, int] = {}
+    MONGO_TIMEOUTS_MS: Dict[str, int] = {
+        "get": 1000,
+        "query": 5000,
+        "create": 2000,
+        "update": 2000,
+        "delete": 2000,
+        "stock": 2000,
+        "stream": 2000,
+        "bulk": 10000,
+        "export": 30000,
+        "stats": 30000,
+        "archive": 30000,
+    }
+    MONGO_DEFAULT_TIMEOUT_MS: int = 5000
+    MONGO_CLIENT_TIMEOUT_MARGIN_MS: int = 100
+    MONGO_READ_RETRIES: int = 2
+    MONGO_RETRY_BACKOFF_MS: int = 50
+    CIRCUIT_BREAKER_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RESET_SECONDS: float = 10
+    HEDGE_ENABLED: bool = False
+    HEDGE_PERCENTILE: float = 95
+    HEDGE_MIN_DELAY_MS: int = 10
+    HEDGE_READ_PREFERENCE: ReadPreferenceMode = "secondaryPreferred"
+    WRITE_CONCERN_PROFILES: Dict[str, WriteConcernProfile] = {
+        "fast": {"w": 1, "j": False},
+        "safe": {"w": "majority", "j": True},
+    }
+    WRITE_DURABILITY: Dict[str, str] = {
+        "create": "safe",
+        "update": "safe",
+        "delete": "safe",
+        "stock": "safe",
+        "bulk": "fast",
+        "archive": "safe",
+    }
+    BULK_MAX_ITEMS: int = 1000
+    BATCH_GET_MAX_IDS: int = 500
+    PRODUCT_CACHE_SIZE: int = 10_000
+    PRODUCT_CACHE_TTL_SECONDS: float = 0
+    LIST_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LIST_CACHE_TTL_SECONDS: float = 0
+    CHANGES_SETTLE_SECONDS: float = 15
+    STREAM_ENABLED: bool = True
+    STREAM_MAX_CONNECTIONS: int = 20_000
+    STREAM_MAX_IDS: int = 100
+    STREAM_QUEUE_SIZE: int = 32
+    STREAM_POLL_SECONDS: float = 1
+    STREAM_POLL_OVERLAP_SECONDS: float = 2
+    STREAM_POLL_MAX_IDS: int = 1000
+    STREAM_HEARTBEAT_SECONDS: float = 15
+    COUNTERS_ENABLED: bool = False
+    COUNTER_SLOTS: int = 16
+    COUNTER_PROMOTE_WRITES_PER_SECOND: float = 50
+    COUNTER_DEMOTE_WRITES_PER_SECOND: float = 5
+    COUNTER_DEMOTE_AFTER_SECONDS: float = 60
+    COUNTER_REFRESH_SECONDS: float = 1
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_SECONDS: int = 30
+    IDEMPOTENCY_CACHE_SIZE: int = 10_000
+    IDEMPOTENCY_CACHE_TTL_SECONDS: float = 60
+    PRICE_STORAGE: Literal["decimal128", "minor_units"] = "decimal128"
+    PRICE_SCALE: int = 2
+
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_LOOP: Literal["auto", "asyncio", "uvloop"] = "auto"
+    SERVER_HTTP: Literal["auto", "h11", "httptools"] = "auto"
+    SERVER_KEEP_ALIVE_SECONDS: int = 5
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    SERVER_BACKLOG: int = 2048
+
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_READ_LIMIT: int = 64
+    ADMISSION_READ_QUEUE_SIZE: int = 256
+    ADMISSION_WRITE_LIMIT: int = 32
+    ADMISSION_WRITE_QUEUE_SIZE: int = 128
+    ADMISSION_QUEUE_TIMEOUT_MS: int = 1000
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    ADMISSION_EXEMPT_PATHS: List[str] = [
+        "/health", "/metrics", "/products/stream"]
+
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_INTERVAL_SECONDS: int = 3600
+
+    ANALYTICS_ENABLED: bool = False
+    ANALYTICS_REFRESH_SECONDS: int = 300
+    ANALYTICS_LOAD_BATCH_SIZE: int = 5000
+
+    JOBS_ENABLED: bool = True
+    JOBS_CONCURRENCY: int = 2
+    JOBS_CHUNK_SIZE: int = 500
+    JOBS_IMPORT_MAX_ITEMS: int = 100_000
+    JOBS_LEASE_SECONDS: int = 60
+    JOBS_POLL_INTERVAL_SECONDS: float = 1.0
+    JOBS_MAX_ATTEMPTS: int = 3
+    JOBS_BACKOFF_SECONDS: float = 0.2
+    JOBS_RETRY_BACKOFF_SECONDS: float = 5.0
+    JOBS_RETENTION_DAYS: int = 7
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_SECRET: Optional[str] = None
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_DIR: Optional[str] = None
+    PROFILING_LIMIT: int = 50
+
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 1.0
+    TRACING_EXPORT_PATH: Optional[str] = None
+    TRACING_EXPORT_URL: Optional[str] = None
+    TRACING_EXPORT_INTERVAL_SECONDS: int = 5
+    TRACING_MAX_QUEUE_SIZE: int = 10000
 
     model_config = SettingsConfigDict(env_file=".env")
 
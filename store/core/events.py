@@ -0,0 +1,47 @@
+import logging
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+
+class ProductEvent(NamedTuple):
+    """
+    Alteração de um produto feita por este processo.
+
+    `kind` é `upsert`, com o documento como gravado no banco, ou `delete`,
+    sem documento.
+    """
+    kind: str
+    id: UUID
+    document: Optional[Dict[str, Any]] = None
+
+
+class EventBus:
+    """
+    Distribui as alterações de produtos aos interessados do próprio processo.
+
+    Os assinantes são chamados de forma síncrona, logo após a escrita, e
+    devem ser rápidos. Um erro em um assinante é registrado no log e não
+    afeta a escrita nem os demais assinantes.
+    """
+    def __init__(self) -> None:
+        self._subscribers: List[Callable[[ProductEvent], None]] = []
+
+    def subscribe(self, callback: Callable[[ProductEvent], None]) -> None:
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[ProductEvent], None]) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self, event: ProductEvent) -> None:
+        for callback in self._subscribers:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Event subscriber %r failed", callback)
+
+
+events = EventBus()
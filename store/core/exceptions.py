@@ -21,3 +21,68 @@ class NotFoundException(BaseException):
     onde um recurso esperado, como um produto ou outro dado, não é encontrado.
     """
     message = "Not Found"
+
+
+class OverloadedException(BaseException):
+    """
+    Exceção personalizada para indicar que a aplicação está sobrecarregada.
+
+    Levantada pelo controle de admissão quando a fila de espera por uma vaga
+    de execução está cheia ou quando o prazo de espera na fila expira. Deve
+    ser convertida em uma resposta 503 Service Unavailable.
+    """
+    message = "Service Unavailable"
+
+
+class UnavailableException(BaseException):
+    """
+    Exceção personalizada para indicar que um recurso está temporariamente
+    indisponível, por exemplo um recurso opcional ainda não carregado ou cuja
+    dependência não está instalada.
+
+    Deve ser convertida em uma resposta 503 Service Unavailable.
+    """
+    message = "Service Unavailable"
+
+
+class ConflictException(BaseException):
+    """
+    Exceção personalizada para indicar que a requisição conflita com outra
+    ainda em andamento, por exemplo uma escrita repetida com a mesma chave de
+    idempotência antes de a primeira terminar.
+
+    Deve ser convertida em uma resposta 409 Conflict.
+    """
+    message = "Conflict"
+
+
+class UnprocessableException(BaseException):
+    """
+    Exceção personalizada para indicar que a requisição é bem formada, porém
+    não pode ser processada, por exemplo uma chave de idempotência reutilizada
+    com um corpo diferente do original.
+
+    Deve ser convertida em uma resposta 422 Unprocessable Entity.
+    """
+    message = "Unprocessable Entity"
+
+
+class DeadlineExceededException(BaseException):
+    """
+    Exceção personalizada para indicar que uma operação no banco de dados não
+    terminou dentro do prazo configurado para ela.
+
+    Deve ser convertida em uma resposta 504 Gateway Timeout.
+    """
+    message = "Gateway Timeout"
+
+
+class GoneException(BaseException):
+    """
+    Exceção personalizada para indicar que o recurso pedido não está mais
+    disponível, por exemplo um token de sincronização mais antigo que a
+    retenção dos registros de exclusão.
+
+    Deve ser convertida em uma resposta 410 Gone.
+    """
+    message = "Gone"
@@ -0,0 +1,25 @@
+from typing import Any, Callable, Dict
+
+
+class MetricsRegistry:
+    """
+    Registro das métricas expostas pela aplicação.
+
+    Cada componente registra uma função que retorna um dicionário com o seu
+    estado atual; as funções só são chamadas quando as métricas são
+    consultadas, de modo que o registro não tem custo no caminho das
+    requisições.
+    """
+    def __init__(self) -> None:
+        self._sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def register(
+        self, name: str, source: Callable[[], Dict[str, Any]]
+    ) -> None:
+        self._sources[name] = source
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        return {name: source() for name, source in self._sources.items()}
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,181 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import random
+import secrets
+import time
+import uuid
+from typing import Optional, Tuple
+
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from store.core.config import settings
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI que perfila requisições individuais com `cProfile`.
+
+    Uma requisição é perfilada quando traz o cabeçalho `PROFILING_HEADER`
+    com o valor de `PROFILING_SECRET`, ou por amostragem, com probabilidade
+    `sample_rate`. O relatório traz os tempos de parede e de CPU da
+    requisição e a árvore de chamadas, ordenada por tempo acumulado.
+
+    Com `directory` definido, o perfil é salvo em `<id>.prof` (formato do
+    `pstats`, legível pelo `snakeviz`) e `<id>.txt`, e o identificador volta
+    no cabeçalho `X-Profile-Id`. Sem diretório, ou com o cabeçalho
+    `X-Profile-Output: inline`, o relatório substitui o corpo da resposta.
+    Requisições amostradas só são perfiladas quando há um diretório.
+
+    O `cProfile` mede a thread do loop de eventos inteira; por isso apenas
+    uma requisição é perfilada por vez e, sob concorrência, o perfil também
+    inclui trabalho de outras requisições. O tempo das consultas ao MongoDB
+    aparece como espera, pois o driver executa em outras threads. O
+    middleware só é instalado com `PROFILING_ENABLED`, não tendo custo quando
+    desabilitado.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        secret: Optional[str] = None,
+        sample_rate: float = 0.0,
+        directory: Optional[str] = None,
+    ) -> None:
+        self.app = app
+        self.secret = secret.encode() if secret else None
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.header = settings.PROFILING_HEADER.lower().encode()
+        self.busy = False
+
+    def _requested(self, scope: Scope) -> Tuple[bool, bool]:
+        """
+        Decide se a requisição deve ser perfilada.
+
+        Returns:
+            Tuple[bool, bool]: Se a requisição será perfilada e se o
+            relatório deve substituir o corpo da resposta.
+        """
+        requested = inline = False
+        for name, value in scope["headers"]:
+            if name == self.header and self.secret is not None:
+                requested = secrets.compare_digest(value, self.secret)
+            elif name == b"x-profile-output":
+                inline = value == b"inline"
+
+        if requested:
+            return True, inline or self.directory is None
+
+        sampled = (
+            self.directory is not None
+            and random.random() < self.sample_rate
+        )
+        return sampled, False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.busy:
+            await self.app(scope, receive, send)
+            return
+
+        profile, inline = self._requested(scope)
+        if not profile:
+            await self.app(scope, receive, send)
+            return
+
+        self.busy = True
+        try:
+            await self._profile(scope, receive, send, inline)
+        finally:
+            self.busy = False
+
+    async def _profile(
+        self, scope: Scope, receive: Receive, send: Send, inline: bool
+    ) -> None:
+        profile_id = uuid.uuid4().hex
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile_id.encode()),
+                ]
+            if not inline:
+                await send(message)
+
+        profiler = cProfile.Profile()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            report = render_report(profiler, scope, status_code, wall, cpu)
+            if self.directory is not None:
+                await asyncio.to_thread(
+                    self._save, profile_id, profiler, report)
+
+        if inline:
+            response = PlainTextResponse(
+                report,
+                status_code=status_code,
+                headers={
+                    "X-Profile-Id": profile_id,
+                    "X-Profile-Wall-Ms": f"{wall * 1000:.3f}",
+                    "X-Profile-Cpu-Ms": f"{cpu * 1000:.3f}",
+                },
+            )
+            await response(scope, receive, send)
+
+    def _save(
+        self, profile_id: str, profiler: cProfile.Profile, report: str
+    ) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, profile_id)
+        profiler.dump_stats(f"{path}.prof")
+        with open(f"{path}.txt", "w") as file:
+            file.write(report)
+
+
+def render_report(
+    profiler: cProfile.Profile,
+    scope: Scope,
+    status_code: int,
+    wall: float,
+    cpu: float,
+) -> str:
+    """
+    Formata o perfil de uma requisição como texto.
+
+    Args:
+        profiler (cProfile.Profile): Perfil coletado durante a requisição.
+        scope (Scope): Escopo ASGI da requisição.
+        status_code (int): Status da resposta gerada pela aplicação.
+        wall (float): Tempo de parede, em segundos.
+        cpu (float): Tempo de CPU do processo, em segundos.
+
+    Returns:
+        str: Cabeçalho com método, caminho e tempos, seguido das
+        `PROFILING_LIMIT` funções com maior tempo acumulado e de quem as
+        chamou.
+    """
+    output = io.StringIO()
+    output.write(
+        f"{scope['method']} {scope['path']} -> {status_code}\n"
+        f"wall: {wall * 1000:.3f} ms\n"
+        f"cpu: {cpu * 1000:.3f} ms\n\n"
+    )
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    stats.print_stats(settings.PROFILING_LIMIT)
+    stats.print_callers(settings.PROFILING_LIMIT)
+
+    return output.getvalue()
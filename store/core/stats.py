@@ -0,0 +1,34 @@
+import math
+from typing import Dict, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Calcula o percentil `q` (0 a 100) de uma sequência já ordenada, pelo
+    método do posto mais próximo.
+    """
+    if not values:
+        return 0.0
+
+    rank = max(math.ceil(q / 100 * len(values)) - 1, 0)
+
+    return values[min(rank, len(values) - 1)]
+
+
+def summarize(latencies: Sequence[float]) -> Dict[str, float]:
+    """
+    Resume uma amostra de latências, em segundos, nos percentis usuais.
+
+    Returns:
+        Dict[str, float]: Quantidade de amostras e os percentis p50, p95, p99
+        e máximo, em milissegundos.
+    """
+    ordered = sorted(latencies)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round((ordered[-1] if ordered else 0.0) * 1000, 3),
+    }
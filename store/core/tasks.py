@@ -0,0 +1,49 @@
+import asyncio
+import logging
+import random
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Executa uma corrotina periodicamente em segundo plano.
+
+    O intervalo recebe uma variação aleatória de até 10% para que os vários
+    processos de trabalho não executem a mesma tarefa ao mesmo tempo. Erros
+    são registrados no log e não interrompem as próximas execuções.
+    """
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        func: Callable[[], Awaitable[Any]],
+    ) -> None:
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval * random.uniform(0.9, 1.1))
+            try:
+                await self.func()
+            except Exception:
+                logger.exception("Background task %s failed", self.name)
@@ -0,0 +1,474 @@
+import asyncio
+import functools
+import json
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (  # E501
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import httpx
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from store.core.config import settings
+from store.core.metrics import metrics
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+class Span:
+    """
+    Trecho de um rastreamento, com início, fim e atributos.
+
+    Os identificadores seguem o formato do W3C Trace Context: 16 bytes para o
+    rastreamento e 8 bytes para o trecho, em hexadecimal.
+    """
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "kind", "attributes",
+        "start_ns", "end_ns", "status", "status_message",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.status = STATUS_UNSET
+        self.status_message = ""
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_error(self, message: str) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar(
+    "current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    Interpreta um cabeçalho `traceparent` do W3C Trace Context.
+
+    Args:
+        value (str): Valor do cabeçalho, por exemplo
+        `00-<trace-id>-<parent-id>-01`.
+
+    Returns:
+        Tuple[str, str, bool]: Id do rastreamento, id do trecho pai e se o
+        chamador amostrou o rastreamento, ou `None` se o valor for inválido.
+    """
+    if not value:
+        return None
+
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+
+    version, trace_id, parent_id, flags = parts[:4]
+    try:
+        int(version, 16), int(trace_id, 16), int(parent_id, 16)
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+
+    if version == "ff" or int(trace_id, 16) == 0 or int(parent_id, 16) == 0:
+        return None
+
+    return trace_id.lower(), parent_id.lower(), sampled
+
+
+class Tracer:
+    """
+    Registra trechos de rastreamento por requisição.
+
+    O trecho ativo fica em uma `ContextVar`, herdada pelas tarefas e pelas
+    threads do driver do MongoDB. Fora de uma requisição amostrada não há
+    trecho ativo e `span` e `traced` não fazem nada, de modo que a
+    instrumentação tem custo desprezível com o rastreamento desabilitado.
+    Os trechos finalizados ficam em uma fila limitada até serem enviados ao
+    exportador por `flush`.
+    """
+    def __init__(
+        self,
+        sample_rate: float,
+        max_queue_size: int,
+        exporter: Optional["SpanExporter"] = None,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.max_queue_size = max_queue_size
+        self.exporter = exporter
+        self.finished: deque[Span] = deque()
+        self.exported = 0
+        self.dropped = 0
+
+    def current(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def start_trace(
+        self,
+        name: str,
+        traceparent: Optional[str] = None,
+        kind: int = SPAN_KIND_SERVER,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Span]:
+        """
+        Inicia o trecho raiz de uma requisição.
+
+        Um `traceparent` válido define o rastreamento e o trecho pai, e a
+        decisão de amostragem do chamador é respeitada. Sem ele, um novo
+        rastreamento é amostrado com probabilidade `sample_rate`.
+
+        Returns:
+            Span: O trecho raiz, ou `None` se a requisição não for amostrada.
+        """
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id = f"{random.getrandbits(128):032x}"
+            parent_id = None
+            sampled = random.random() < self.sample_rate
+
+        if not sampled:
+            return None
+
+        return Span(name, trace_id, parent_id, kind, attributes)
+
+    def child(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Span]:
+        parent = _current_span.get()
+        if parent is None:
+            return None
+
+        return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+    def end(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if len(self.finished) >= self.max_queue_size:
+            self.dropped += 1
+            return
+
+        self.finished.append(span)
+
+    @contextmanager
+    def span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Optional[Span]]:
+        """
+        Executa o bloco dentro de um trecho filho do trecho ativo.
+
+        Exceções marcam o trecho com erro e são propagadas.
+        """
+        span = self.child(name, attributes=attributes)
+        if span is None:
+            yield None
+            return
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.set_error(repr(exc))
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end(span)
+
+    def traced(self, func: F) -> F:
+        """
+        Decorador que executa uma corrotina dentro de um trecho com o nome
+        qualificado da função, por exemplo
+        `store.usecases.product.ProductUsecase.get`.
+        """
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return await func(*args, **kwargs)
+
+            with self.span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    async def flush(self) -> None:
+        """
+        Envia ao exportador os trechos finalizados até o momento.
+
+        Se o envio falhar, os trechos do lote são descartados e contados em
+        `dropped`, e o erro é propagado.
+        """
+        batch: List[Span] = []
+        while self.finished:
+            batch.append(self.finished.popleft())
+
+        if not batch:
+            return
+
+        if self.exporter is None:
+            self.dropped += len(batch)
+            return
+
+        try:
+            await self.exporter.export(batch)
+        except Exception:
+            self.dropped += len(batch)
+            raise
+
+        self.exported += len(batch)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "queued": len(self.finished),
+            "exported": self.exported,
+            "dropped": self.dropped,
+        }
+
+
+def encode_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+
+    return {"stringValue": str(value)}
+
+
+def encode_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"key": key, "value": encode_value(value)}
+        for key, value in attributes.items()
+    ]
+
+
+class SpanExporter:
+    """
+    Exporta trechos no formato JSON do OTLP (OpenTelemetry Protocol).
+
+    Com `path`, cada lote é acrescentado ao arquivo como uma linha JSON, o
+    mesmo formato do `file exporter` do OpenTelemetry Collector. Com `url`,
+    cada lote é enviado por `POST`, por exemplo para
+    `http://localhost:4318/v1/traces` de um coletor local.
+    """
+    def __init__(
+        self,
+        service_name: str,
+        path: Optional[str] = None,
+        url: Optional[str] = None,
+    ) -> None:
+        self.service_name = service_name
+        self.path = path
+        self.url = url
+
+    def encode(self, spans: Iterable[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": encode_attributes(
+                            {"service.name": self.service_name})
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "store"},
+                            "spans": [self.encode_span(s) for s in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def encode_span(self, span: Span) -> Dict[str, Any]:
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": encode_attributes(span.attributes),
+            "status": {"code": span.status},
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        if span.status_message:
+            encoded["status"]["message"] = span.status_message
+
+        return encoded
+
+    async def export(self, spans: List[Span]) -> None:
+        payload = self.encode(spans)
+
+        if self.path:
+            await asyncio.to_thread(self._write, json.dumps(payload))
+
+        if self.url:
+            async with httpx.AsyncClient(timeout=10) as client:
+                response = await client.post(self.url, json=payload)
+                response.raise_for_status()
+
+    def _write(self, line: str) -> None:
+        with open(self.path, "a") as file:
+            file.write(line + "\n")
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI que cria o trecho raiz de cada requisição.
+
+    O rastreamento é continuado a partir do cabeçalho `traceparent` recebido
+    e o `traceparent` do trecho do servidor volta na resposta. O trecho é
+    nomeado pelo modelo da rota (`GET /products/{id}`), não pelo caminho,
+    para manter baixa a cardinalidade dos nomes.
+    """
+    def __init__(self, app: ASGIApp, tracer: Tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        method = scope["method"]
+        span = self.tracer.start_trace(
+            name=f"{method} {scope['path']}",
+            traceparent=traceparent,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        )
+        if span is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                span.attributes["http.response.status_code"] = status_code
+                if status_code >= 500:
+                    span.set_error(f"HTTP {status_code}")
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"traceparent", span.traceparent.encode()),
+                ]
+            await send(message)
+
+        token = _current_span.set(span)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            span.set_error(repr(exc))
+            raise
+        finally:
+            _current_span.reset(token)
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                span.name = f"{method} {route.path}"
+                span.attributes["http.route"] = route.path
+            self.tracer.end(span)
+
+
+class CommandTracer(monitoring.CommandListener):
+    """
+    Cria um trecho para cada comando enviado ao MongoDB a partir dos eventos
+    de monitoramento do driver.
+
+    Os eventos são emitidos nas threads do Motor, que herdam o contexto da
+    corrotina que fez a chamada; assim o trecho ativo da requisição é o pai
+    do trecho do comando.
+    """
+    def __init__(self, tracer: Tracer) -> None:
+        self.tracer = tracer
+        self._spans: Dict[Tuple[Any, int], Span] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = event.command.get(event.command_name)
+        attributes = {
+            "db.system": "mongodb",
+            "db.name": event.database_name,
+            "db.operation": event.command_name,
+        }
+        if isinstance(collection, str):
+            attributes["db.mongodb.collection"] = collection
+
+        span = self.tracer.child(
+            f"mongodb.{event.command_name}",
+            kind=SPAN_KIND_CLIENT,
+            attributes=attributes,
+        )
+        if span is not None:
+            self._spans[(event.connection_id, event.request_id)] = span
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            self.tracer.end(span)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.set_error(str(event.failure))
+            self.tracer.end(span)
+
+
+tracer = Tracer(
+    sample_rate=settings.TRACING_SAMPLE_RATE,
+    max_queue_size=settings.TRACING_MAX_QUEUE_SIZE,
+    exporter=SpanExporter(
+        service_name=settings.PROJECT_NAME,
+        path=settings.TRACING_EXPORT_PATH,
+        url=settings.TRACING_EXPORT_URL,
+    ) if settings.TRACING_EXPORT_PATH or settings.TRACING_EXPORT_URL else None,
+)
+traced = tracer.traced
+command_tracer = CommandTracer(tracer)
+
+metrics.register("tracing", tracer.snapshot)
@@ -1,6 +1,77 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import os
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+from pymongo import read_preferences
+from pymongo.write_concern import WriteConcern
 
 from store.core.config import settings
+from store.core.tracing import command_tracer
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+READ_PREFERENCE_MODES = {
+    "primary": read_preferences.Primary,
+    "primaryPreferred": read_preferences.PrimaryPreferred,
+    "secondary": read_preferences.Secondary,
+    "secondaryPreferred": read_preferences.SecondaryPreferred,
+    "nearest": read_preferences.Nearest,
+}
+
+
+@lru_cache
+def read_preference(operation: str) -> read_preferences._ServerMode:
+    """
+    Retorna a preferência de leitura configurada para uma operação.
+
+    As operações sem configuração em `settings.READ_PREFERENCES` leem do
+    primário. `settings.READ_MAX_STALENESS_SECONDS` limita o atraso aceito
+    dos secundários (o MongoDB exige no mínimo 90 segundos).
+
+    Args:
+        operation (str): Nome da operação, por exemplo `query` ou `export`.
+
+    Returns:
+        _ServerMode: Preferência de leitura do `pymongo`.
+    """
+    mode = settings.READ_PREFERENCES.get(operation, "primary")
+    if mode == "primary":
+        return read_preferences.Primary()
+
+    return READ_PREFERENCE_MODES[mode](
+        max_staleness=settings.READ_MAX_STALENESS_SECONDS.get(operation, -1)
+    )
+
+
+@lru_cache
+def write_concern(operation: str) -> WriteConcern:
+    """
+    Retorna a garantia de escrita configurada para uma operação.
+
+    Cada operação de escrita é associada, em `settings.WRITE_DURABILITY`, a um
+    perfil nomeado de `settings.WRITE_CONCERN_PROFILES`, por exemplo `fast`
+    (`w=1`, sem journal) ou `safe` (`w=majority`, com journal). Operações sem
+    perfil usam a garantia padrão do cliente.
+
+    Args:
+        operation (str): Nome da operação, por exemplo `create` ou `bulk`.
+
+    Returns:
+        WriteConcern: Garantia de escrita do `pymongo`.
+
+    Raises:
+        ValueError: Se a operação apontar para um perfil inexistente.
+    """
+    profile = settings.WRITE_DURABILITY.get(operation)
+    if profile is None:
+        return WriteConcern()
+
+    if profile not in settings.WRITE_CONCERN_PROFILES:
+        raise ValueError(f"Unknown write concern profile: {profile}")
+
+    return WriteConcern(**settings.WRITE_CONCERN_PROFILES[profile])
 
 
 class MongoClient:
@@ -8,30 +79,104 @@ class MongoClient:
     Classe para gerenciar a conexão com o banco de dados MongoDB.
 
     Esta classe utiliza o driver assíncrono `motor.motor_asyncio` para
-    estabelecer 
-    uma conexão com o banco de dados e fornece acesso ao cliente do MongoDB.
+    estabelecer uma conexão com o banco de dados e fornece acesso ao cliente
+    do MongoDB.
+
+    O cliente é criado de forma preguiçosa, no primeiro acesso, e não durante
+    a importação do módulo, o que garante que cada processo crie o seu
+    próprio cliente e as threads de monitoramento do driver. O `motor` só é
+    importado nesse momento; o `pymongo` e o `bson` continuam sendo
+    importados com a aplicação, pois os casos de uso e os schemas dependem
+    deles.
     """
     def __init__(self) -> None:
         """
         Inicializa a instância da classe `MongoClient`.
 
-        Estabelece a conexão com o banco de dados MongoDB utilizando a URL de
-        conexão 
-        definida na configuração da aplicação (`settings.DATABASE_URL`).
+        Nenhuma conexão é aberta aqui; o cliente é construído em `get` a
+        partir da URL definida na configuração da aplicação
+        (`settings.DATABASE_URL`).
         """
-        self.client: AsyncIOMotorClient = AsyncIOMotorClient(
-            settings.DATABASE_URL
-            )
+        self.client: Optional["AsyncIOMotorClient"] = None
+        self.ready: bool = False
 
-    def get(self) -> AsyncIOMotorClient:
+    def get(self) -> "AsyncIOMotorClient":
         """
         Retorna o cliente do banco de dados MongoDB.
 
-        Este método fornece acesso ao cliente do MongoDB (`self.client`), 
-        permitindo a interação com o banco de dados em outras partes da
-        aplicação.
+        Este método fornece acesso ao cliente do MongoDB (`self.client`),
+        criando-o no primeiro acesso, permitindo a interação com o banco de
+        dados em outras partes da aplicação. Com `TRACING_ENABLED`, os
+        comandos enviados ao banco geram trechos de rastreamento.
         """
+        if self.client is None:
+            from motor.motor_asyncio import AsyncIOMotorClient
+
+            self.client = AsyncIOMotorClient(
+                settings.DATABASE_URL,
+                uuidRepresentation="standard",
+                minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+                maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+                serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                event_listeners=(
+                    [command_tracer] if settings.TRACING_ENABLED else []
+                ),
+            )
+
         return self.client
 
+    async def ping(self) -> bool:
+        """
+        Verifica se o banco de dados responde ao comando `ping`.
+
+        Returns:
+            bool: `True` se o servidor respondeu, `False` caso contrário.
+        """
+        try:
+            await self.get().get_database().command("ping")
+        except Exception:
+            return False
+
+        return True
+
+    async def warm_up(self) -> None:
+        """
+        Pré-abre as conexões do pool antes de o processo receber tráfego.
+
+        Dispara `MONGO_MIN_POOL_SIZE` comandos `ping` concorrentes, o que
+        obriga o driver a estabelecer uma conexão para cada um deles. Assim as
+        primeiras requisições não pagam o custo do handshake.
+        """
+        database = self.get().get_database()
+        await asyncio.gather(
+            *(database.command("ping")
+              for _ in range(max(settings.MONGO_MIN_POOL_SIZE, 1)))
+        )
+
+    def close(self) -> None:
+        """
+        Fecha o cliente atual, se existir, e marca a conexão como não pronta.
+        """
+        if self.client is not None:
+            self.client.close()
+
+        self.client = None
+        self.ready = False
+
+    def reset(self) -> None:
+        """
+        Descarta o cliente herdado após um `fork`, sem fechá-lo.
+
+        Um cliente do MongoDB não pode ser compartilhado entre processos: os
+        seus sockets e threads pertencem ao processo pai. Este método é
+        registrado com `os.register_at_fork` para que o processo filho crie o
+        seu próprio cliente no próximo acesso.
+        """
+        self.client = None
+        self.ready = False
+
 
 db_client = MongoClient()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=db_client.reset)
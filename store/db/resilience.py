@@ -0,0 +1,335 @@
+import asyncio
+import random
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import pymongo
+from pymongo import read_preferences
+from pymongo.errors import AutoReconnect, PyMongoError
+
+from store.core.config import settings
+from store.core.exceptions import (  # E501
+    DeadlineExceededException,
+    UnavailableException,
+)
+from store.core.metrics import metrics
+from store.core.stats import percentile
+from store.db.mongo import READ_PREFERENCE_MODES
+
+T = TypeVar("T")
+
+HEDGE_MIN_SAMPLES = 20
+
+
+def is_timeout(exc: BaseException) -> bool:
+    """
+    Indica se o erro é o fim de um prazo: do `asyncio`, do servidor
+    (`maxTimeMS`) ou do driver (seleção de servidor, rede, fila do pool).
+    """
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+
+    return isinstance(exc, PyMongoError) and exc.timeout
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Indica se vale repetir a leitura: prazos esgotados e erros de conexão,
+    como os de uma eleição de primário em andamento.
+    """
+    return is_timeout(exc) or isinstance(exc, AutoReconnect)
+
+
+def timeout(operation: str) -> float:
+    """
+    Retorna o prazo da operação, em segundos, de `settings.MONGO_TIMEOUTS_MS`.
+    """
+    return settings.MONGO_TIMEOUTS_MS.get(
+        operation, settings.MONGO_DEFAULT_TIMEOUT_MS) / 1000
+
+
+@lru_cache
+def hedge_read_preference() -> read_preferences._ServerMode:
+    """
+    Retorna a preferência de leitura das leituras de proteção
+    (`HEDGE_READ_PREFERENCE`), normalmente dirigidas a outro membro do
+    conjunto de réplicas.
+    """
+    return READ_PREFERENCE_MODES[settings.HEDGE_READ_PREFERENCE]()
+
+
+class CircuitBreaker:
+    """
+    Interrompe as chamadas ao banco após prazos esgotados consecutivos.
+
+    Com `threshold` prazos esgotados seguidos o circuito abre e as chamadas
+    falham imediatamente com `UnavailableException`, em vez de ocupar o pool
+    esperando um banco que não responde. Após `reset_timeout` segundos uma
+    única chamada de teste é liberada: se terminar a tempo o circuito fecha,
+    senão volta a abrir; se ela não terminar, outra é liberada após o mesmo
+    intervalo. Qualquer resposta do servidor, mesmo um erro, conta como
+    sucesso.
+    """
+    def __init__(
+        self, name: str, threshold: int, reset_timeout: float
+    ) -> None:
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self.opened_at = 0.0
+
+    def before(self) -> None:
+        """
+        Raises:
+            UnavailableException: Se o circuito está aberto, ou meio aberto
+            com a chamada de teste em andamento.
+        """
+        if self.state == "closed":
+            return
+
+        now = time.monotonic()
+        if now - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self.opened_at = now
+            return
+
+        self.rejected += 1
+        raise UnavailableException(
+            message=f"Circuit breaker {self.name} is open")
+
+    def record(self, timed_out: bool) -> None:
+        if not timed_out:
+            self.failures = 0
+            self.state = "closed"
+            return
+
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.threshold:
+            if self.state != "open":
+                self.trips += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+class LatencyWindow:
+    """
+    Latências recentes de uma operação, em segundos, para estimar o atraso
+    das leituras de proteção. O percentil é recalculado a cada `refresh`
+    amostras, e não a cada leitura.
+    """
+    def __init__(self, size: int = 1000, refresh: int = 50) -> None:
+        self.samples: deque[float] = deque(maxlen=size)
+        self.refresh = refresh
+        self._pending = 0
+        self._percentiles: Dict[float, float] = {}
+
+    def add(self, latency: float) -> None:
+        self.samples.append(latency)
+        self._pending += 1
+        if self._pending >= self.refresh:
+            self._pending = 0
+            self._percentiles.clear()
+
+    def percentile(self, q: float) -> float:
+        if q not in self._percentiles:
+            self._percentiles[q] = percentile(sorted(self.samples), q)
+
+        return self._percentiles[q]
+
+
+class MongoGuard:
+    """
+    Aplica prazos, repetições e leituras de proteção às chamadas ao MongoDB.
+
+    Cada chamada tem o prazo da sua operação em `MONGO_TIMEOUTS_MS`, que
+    cobre também as repetições: o prazo restante é repassado ao servidor como
+    `maxTimeMS` (via `pymongo.timeout`) e aplicado no cliente com
+    `asyncio.wait_for`, acrescido de `MONGO_CLIENT_TIMEOUT_MARGIN_MS` para que
+    o erro do servidor chegue primeiro. As leituras são repetidas até
+    `MONGO_READ_RETRIES` vezes após erros de conexão ou de prazo, com espera
+    exponencial aleatória (jitter completo); as escritas contam apenas com as
+    repetições do próprio driver (`retryWrites`).
+    """
+    def __init__(self, breaker: CircuitBreaker) -> None:
+        self.breaker = breaker
+        self.latencies: Dict[str, LatencyWindow] = {}
+        self.timeouts = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    async def _attempt(
+        self, factory: Callable[[], Awaitable[T]], remaining: float
+    ) -> T:
+        # A chamada é iniciada dentro de `pymongo.timeout`, que guarda o prazo
+        # em uma variável de contexto copiada pela tarefa, e aguardada fora.
+        with pymongo.timeout(remaining):
+            future = asyncio.ensure_future(factory())
+
+        return await asyncio.wait_for(
+            future, remaining + settings.MONGO_CLIENT_TIMEOUT_MARGIN_MS / 1000)
+
+    async def _hedged(
+        self,
+        operation: str,
+        factory: Callable[[], Awaitable[T]],
+        hedge: Callable[[], Awaitable[T]],
+        remaining: float,
+    ) -> T:
+        """
+        Envia a leitura e, se ela não terminar no percentil
+        `HEDGE_PERCENTILE` das latências recentes, envia a leitura de
+        proteção; vale a primeira que terminar com sucesso.
+        """
+        window = self.latencies.setdefault(operation, LatencyWindow())
+        started = time.monotonic()
+        first = asyncio.ensure_future(self._attempt(factory, remaining))
+
+        if len(window.samples) < HEDGE_MIN_SAMPLES:
+            result = await first
+            window.add(time.monotonic() - started)
+            return result
+
+        delay = max(
+            window.percentile(settings.HEDGE_PERCENTILE),
+            settings.HEDGE_MIN_DELAY_MS / 1000,
+        )
+        done, _ = await asyncio.wait({first}, timeout=min(delay, remaining))
+        if done:
+            window.add(time.monotonic() - started)
+            return first.result()
+
+        self.hedges += 1
+        second = asyncio.ensure_future(
+            self._attempt(hedge, remaining - (time.monotonic() - started)))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        window.add(time.monotonic() - started)
+                        return task.result()
+                    error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise error
+
+    async def call(
+        self,
+        operation: str,
+        factory: Callable[[], Awaitable[T]],
+        retry: bool = False,
+        hedge: Optional[Callable[[], Awaitable[T]]] = None,
+    ) -> T:
+        """
+        Executa uma chamada ao MongoDB dentro do prazo da operação.
+
+        Args:
+            operation (str): Nome da operação, por exemplo `get` ou `create`.
+            factory (Callable[[], Awaitable[T]]): Função que inicia a chamada;
+            é chamada uma vez por tentativa.
+            retry (bool): Repete a chamada após erros de conexão ou de prazo;
+            apenas para chamadas idempotentes.
+            hedge (Callable[[], Awaitable[T]]): Leitura de proteção, enviada
+            com `HEDGE_ENABLED` quando a leitura demora.
+
+        Returns:
+            T: O resultado da chamada.
+
+        Raises:
+            DeadlineExceededException: Se o prazo da operação se esgotar.
+            UnavailableException: Se o circuito estiver aberto ou o banco
+            continuar inacessível após as repetições.
+        """
+        deadline = time.monotonic() + timeout(operation)
+        attempt = 0
+
+        while True:
+            self.breaker.before()
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                if hedge is not None and settings.HEDGE_ENABLED:
+                    result = await self._hedged(
+                        operation, factory, hedge, remaining)
+                else:
+                    result = await self._attempt(factory, remaining)
+            except Exception as exc:
+                timed_out = is_timeout(exc)
+                self.breaker.record(timed_out)
+                if timed_out:
+                    self.timeouts += 1
+
+                backoff = random.uniform(
+                    0, settings.MONGO_RETRY_BACKOFF_MS / 1000 * 2 ** attempt)
+                if (
+                    not retry
+                    or not is_retryable(exc)
+                    or attempt >= settings.MONGO_READ_RETRIES
+                    or time.monotonic() + backoff >= deadline
+                ):
+                    if timed_out:
+                        raise DeadlineExceededException(
+                            message=f"Database {operation} timed out"
+                        ) from exc
+                    if isinstance(exc, AutoReconnect):
+                        raise UnavailableException(
+                            message=f"Database unavailable during {operation}"
+                        ) from exc
+                    raise
+
+                self.retries += 1
+                attempt += 1
+                await asyncio.sleep(backoff)
+                continue
+
+            self.breaker.record(False)
+
+            return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "breaker": self.breaker.snapshot(),
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay_ms": {
+                operation: round(
+                    window.percentile(settings.HEDGE_PERCENTILE) * 1000, 3)
+                for operation, window in self.latencies.items()
+            },
+        }
+
+
+mongo_guard = MongoGuard(
+    CircuitBreaker(
+        name="mongo",
+        threshold=settings.CIRCUIT_BREAKER_THRESHOLD,
+        reset_timeout=settings.CIRCUIT_BREAKER_RESET_SECONDS,
+    )
+)
+
+metrics.register("mongo", mongo_guard.snapshot)
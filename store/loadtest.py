@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from store.core.stats import summarize
+
+OPERATIONS = ("create", "get", "list", "patch", "delete")
+DEFAULT_MIX = "create=1,get=6,list=1,patch=1,delete=1"
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """
+    Interpreta a mistura de operações no formato `create=1,get=6,...`.
+
+    Raises:
+        ValueError: Se uma operação for desconhecida ou se nenhum peso for
+        positivo.
+    """
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {name}")
+        mix[name] = int(weight or 1)
+
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("At least one operation needs a positive weight")
+
+    return mix
+
+
+def product_payload() -> Dict[str, Any]:
+    return {
+        "name": f"Load test product {random.randint(0, 1_000_000)}",
+        "quantity": random.randint(0, 1000),
+        "price": f"{random.randint(100, 1_000_000) / 100:.2f}",
+        "status": random.random() < 0.9,
+    }
+
+
+class LoadTest:
+    """
+    Gerador de carga de ponta a ponta para a API de produtos.
+
+    Executa uma mistura ponderada de criações, buscas, listagens,
+    atualizações e exclusões com `concurrency` requisições simultâneas,
+    opcionalmente limitadas a `rate` requisições por segundo, até atingir
+    `requests` requisições ou `duration` segundos.
+
+    Com uma taxa definida, a latência é medida a partir do instante em que a
+    requisição deveria ter sido enviada, para que uma API lenta não esconda a
+    própria espera (omissão coordenada).
+    """
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        mix: Dict[str, int],
+        concurrency: int,
+        rate: Optional[float] = None,
+        duration: Optional[float] = None,
+        requests: Optional[int] = None,
+    ) -> None:
+        self.client = client
+        self.operations = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.operations]
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.requests = requests
+        self.ids: List[str] = []
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.status_codes: Counter = Counter()
+        self._sent = 0
+        self._started = 0.0
+        self._deadline: Optional[float] = None
+
+    async def seed(self, count: int) -> None:
+        """
+        Cria `count` produtos antes da medição, para que buscas, atualizações
+        e exclusões tenham alvos desde o início.
+        """
+        for start in range(0, count, 500):
+            response = await self.client.post(
+                "/products/bulk",
+                json=[product_payload() for _ in range(min(500, count - start))],
+            )
+            response.raise_for_status()
+            self.ids.extend(item["id"] for item in response.json())
+
+    async def run(self) -> Dict[str, Any]:
+        self._started = time.perf_counter()
+        if self.duration:
+            self._deadline = self._started + self.duration
+
+        await asyncio.gather(*(self._worker() for _ in range(self.concurrency)))
+
+        return self.report(time.perf_counter() - self._started)
+
+    def _next_slot(self) -> Optional[float]:
+        """
+        Reserva a próxima requisição e retorna o instante planejado para o
+        envio, ou `None` quando o teste terminou.
+        """
+        if self.requests is not None and self._sent >= self.requests:
+            return None
+
+        now = time.perf_counter()
+        if self._deadline is not None and now >= self._deadline:
+            return None
+
+        scheduled = now
+        if self.rate:
+            scheduled = self._started + self._sent / self.rate
+        self._sent += 1
+
+        return scheduled
+
+    async def _worker(self) -> None:
+        while (scheduled := self._next_slot()) is not None:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            operation = random.choices(self.operations, self.weights)[0]
+            if operation not in ("create", "list") and not self.ids:
+                operation = "create"
+
+            try:
+                response = await self._send(operation)
+            except httpx.HTTPError:
+                self.errors[operation] += 1
+                self.status_codes["error"] += 1
+            else:
+                self.status_codes[str(response.status_code)] += 1
+                if response.status_code >= 400:
+                    self.errors[operation] += 1
+                elif operation == "create":
+                    self.ids.append(response.json()["id"])
+
+            self.latencies[operation].append(time.perf_counter() - scheduled)
+
+    async def _send(self, operation: str) -> httpx.Response:
+        if operation == "create":
+            return await self.client.post("/products/", json=product_payload())
+
+        if operation == "list":
+            return await self.client.get("/products/")
+
+        if operation == "delete":
+            id = self.ids.pop(random.randrange(len(self.ids)))
+            return await self.client.delete(f"/products/{id}")
+
+        id = random.choice(self.ids)
+        if operation == "patch":
+            return await self.client.patch(
+                f"/products/{id}", json={"quantity": random.randint(0, 1000)})
+
+        return await self.client.get(f"/products/{id}")
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        total = sum(len(items) for items in self.latencies.values())
+        errors = sum(self.errors.values())
+
+        return {
+            "duration_s": round(elapsed, 3),
+            "requests": total,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+            "latency": summarize(
+                [value for items in self.latencies.values() for value in items]
+            ),
+            "operations": {
+                name: {
+                    "errors": self.errors[name],
+                    "error_rate": round(self.errors[name] / len(items), 4),
+                    **summarize(items),
+                }
+                for name, items in sorted(self.latencies.items())
+            },
+            "status_codes": dict(self.status_codes),
+        }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Executa o teste de carga contra `--url` ou, sem URL, contra o `App` de
+    `store.main` no próprio processo, via ASGI, incluindo o seu `lifespan`.
+    """
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = httpx.AsyncClient(
+                base_url=args.url,
+                timeout=args.timeout,
+                limits=httpx.Limits(max_connections=args.concurrency),
+            )
+        else:
+            from store.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://loadtest",
+                timeout=args.timeout,
+            )
+        await stack.enter_async_context(client)
+
+        loadtest = LoadTest(
+            client=client,
+            mix=parse_mix(args.mix),
+            concurrency=args.concurrency,
+            rate=args.rate,
+            duration=None if args.requests else args.duration,
+            requests=args.requests,
+        )
+        await loadtest.seed(args.seed_products)
+        report = await loadtest.run()
+
+    return {"target": args.url or "in-process", **report}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m store.loadtest",
+        description="Drive the Store API with a configurable request mix and "
+        "report throughput, latency percentiles and error rates as JSON.",
+    )
+    parser.add_argument(
+        "--url", help="Base URL of a running server (default: in-process)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--rate", type=float, help="Target requests per second (default: max)")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--requests", type=int, help="Stop after N requests instead of time")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--seed-products", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30.0)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
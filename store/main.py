@@ -1,7 +1,124 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+
+from store.core.admission import AdmissionMiddleware, admission_controllers
 from store.core.config import settings
+from store.core.events import events
+from store.core.exceptions import (  # E501
+    DeadlineExceededException,
+    UnavailableException,
+)
+from store.core.profiling import ProfilingMiddleware
+from store.core.tasks import PeriodicTask
+from store.core.tracing import TracingMiddleware, tracer
+from store.db.mongo import db_client
 from store.routers import api_router
+from store.usecases.catalog import catalog_snapshot
+from store.usecases.counter import stock_counters
+from store.usecases.health import health_usecase
+from store.usecases.job import job_pool
+from store.usecases.product import product_usecase
+from store.usecases.stream import product_stream
+
+logger = logging.getLogger(__name__)
+
+
+async def load_catalog_snapshot() -> None:
+    """
+    Carrega a cópia do catálogo usada pela consulta analítica e a mantém
+    atualizada com as escritas do processo. Uma falha na carga inicial não
+    impede a inicialização: a consulta responde 503 até a próxima recarga.
+    """
+    events.subscribe(catalog_snapshot.apply)
+    try:
+        await catalog_snapshot.load()
+    except Exception:
+        logger.exception("Catalog snapshot load failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Ciclo de vida da aplicação.
+
+    Na inicialização aquece a conexão com o MongoDB, antes de o processo
+    receber tráfego, e inicia as tarefas em segundo plano e os trabalhadores
+    de processamentos; no encerramento interrompe as tarefas, devolvendo as
+    concessões dos processamentos em andamento, e fecha o cliente do banco de
+    dados.
+    """
+    tasks = []
+    if settings.ARCHIVE_ENABLED:
+        tasks.append(
+            PeriodicTask(
+                name="archive",
+                interval=settings.ARCHIVE_INTERVAL_SECONDS,
+                func=product_usecase.archive,
+            )
+        )
+
+    if settings.TRACING_ENABLED and tracer.exporter is not None:
+        tasks.append(
+            PeriodicTask(
+                name="tracing-export",
+                interval=settings.TRACING_EXPORT_INTERVAL_SECONDS,
+                func=tracer.flush,
+            )
+        )
+
+    if settings.JOBS_ENABLED:
+        tasks.append(job_pool)
+
+    if settings.COUNTERS_ENABLED:
+        tasks.append(
+            PeriodicTask(
+                name="stock-counters",
+                interval=settings.COUNTER_REFRESH_SECONDS,
+                func=stock_counters.refresh,
+            )
+        )
+
+    if settings.STREAM_ENABLED:
+        tasks.append(
+            PeriodicTask(
+                name="stream-poll",
+                interval=settings.STREAM_POLL_SECONDS,
+                func=product_stream.poll,
+            )
+        )
+        tasks.append(
+            PeriodicTask(
+                name="stream-heartbeat",
+                interval=settings.STREAM_HEARTBEAT_SECONDS,
+                func=product_stream.heartbeat,
+            )
+        )
+
+    await health_usecase.prepare()
+    if settings.ANALYTICS_ENABLED:
+        await load_catalog_snapshot()
+        tasks.append(
+            PeriodicTask(
+                name="catalog-snapshot",
+                interval=settings.ANALYTICS_REFRESH_SECONDS,
+                func=catalog_snapshot.load,
+            )
+        )
+
+    for task in tasks:
+        task.start()
+
+    yield
+
+    for task in tasks:
+        await task.stop()
+    if settings.TRACING_ENABLED and tracer.exporter is not None:
+        await tracer.flush()
+    db_client.close()
 
 
 class App(FastAPI):
@@ -29,9 +146,52 @@ class App(FastAPI):
             **kwargs,
             version="0.0.1",
             title=settings.PROJECT_NAME,
-            root_path=settings.ROOT_PATH
+            root_path=settings.ROOT_PATH,
+            lifespan=lifespan,
         )
 
 
 app = App()
 app.include_router(api_router)
+
+
+@app.exception_handler(UnavailableException)
+async def unavailable_handler(
+    request: Request, exc: UnavailableException
+) -> JSONResponse:
+    """
+    Converte `UnavailableException`, por exemplo com o circuito do banco
+    aberto, em 503 Service Unavailable.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": exc.message},
+    )
+
+
+@app.exception_handler(DeadlineExceededException)
+async def deadline_exceeded_handler(
+    request: Request, exc: DeadlineExceededException
+) -> JSONResponse:
+    """
+    Converte `DeadlineExceededException`, uma operação no banco que excedeu o
+    seu prazo, em 504 Gateway Timeout.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": exc.message},
+    )
+
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controllers=admission_controllers)
+
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        secret=settings.PROFILING_SECRET,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        directory=settings.PROFILING_DIR,
+    )
+
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, tracer=tracer)
@@ -0,0 +1,177 @@
+import logging
+from typing import Any, Dict
+from uuid import UUID
+
+import pymongo
+from bson import Binary
+from bson.binary import UuidRepresentation
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+from pymongo.errors import OperationFailure
+
+from store.core.config import settings
+from store.schemas.base import decode_decimal, encode_decimal
+from store.usecases.product import product_usecase
+
+logger = logging.getLogger(__name__)
+
+# Lotes seguidos sem nenhum original removido antes de desistir dos
+# documentos que não param de ser alterados.
+MIGRATION_MAX_STALLS = 10
+
+
+def to_uuid(value: Any) -> UUID:
+    """
+    Converte um identificador gravado em qualquer representação para `UUID`.
+
+    Aceita o UUID padrão (binário subtipo 4), o formato legado do driver
+    Python (binário subtipo 3) e o texto canônico.
+    """
+    if isinstance(value, UUID):
+        return value
+
+    if isinstance(value, Binary):
+        return value.as_uuid(UuidRepresentation.PYTHON_LEGACY)
+
+    return UUID(str(value))
+
+
+async def migrate_product_ids(batch_size: int = 500) -> int:
+    """
+    Regrava os produtos antigos com o UUID binário como `_id`.
+
+    Documentos criados antes da mudança têm um `ObjectId` como `_id` e o UUID
+    apenas no campo `id`, em qualquer representação. A migração roda com a
+    aplicação no ar, em lotes: cada documento é copiado com `_id` e `id` no
+    formato binário padrão e o original só é removido se não foi alterado
+    desde a leitura; os alterados nesse intervalo são tentados novamente no
+    próximo lote, até não restar nenhum. Se os mesmos documentos continuarem
+    sendo alterados por `MIGRATION_MAX_STALLS` lotes seguidos, a migração
+    para e registra no log quantos restam.
+
+    Antes de começar, o índice único em `id` é trocado por um índice comum,
+    pois a cópia e o original coexistem por um instante. Versões antigas da
+    aplicação, que filtram por `id`, continuam funcionando durante a
+    migração; a nova versão deve ser implantada ao final dela.
+
+    Args:
+        batch_size (int): Quantidade de documentos por lote.
+
+    Returns:
+        int: Quantidade de documentos migrados.
+    """
+    collection = product_usecase.collection
+    await collection.create_index(
+        [("id", pymongo.ASCENDING)], name="id_lookup")
+    try:
+        await collection.drop_index("id_unique")
+    except OperationFailure:
+        pass
+
+    legacy = {"_id": {"$type": "objectId"}}
+    migrated = stalls = 0
+
+    while True:
+        batch = await collection.find(legacy).limit(batch_size).to_list(
+            batch_size)
+        if not batch:
+            break
+
+        # A cópia é sempre regravada a partir do original recém-lido, de
+        # modo que uma cópia deixada por uma execução interrompida, talvez
+        # desatualizada, não sobrevive.
+        copies = []
+        for document in batch:
+            id = to_uuid(document["id"])
+            copies.append(
+                ReplaceOne(
+                    {"_id": id}, {**document, "_id": id, "id": id},
+                    upsert=True,
+                )
+            )
+        await collection.bulk_write(copies, ordered=False)
+
+        # Cada original é usado inteiro como filtro: só é removido se nenhum
+        # campo mudou desde a leitura.
+        result = await collection.bulk_write(
+            [DeleteOne(document) for document in batch], ordered=False)
+        if result.deleted_count < len(batch):
+            changed = await collection.distinct(
+                "id", {"_id": {"$in": [item["_id"] for item in batch]}})
+            await collection.delete_many(
+                {"_id": {"$in": [to_uuid(id) for id in changed]}})
+
+        migrated += result.deleted_count
+        stalls = 0 if result.deleted_count else stalls + 1
+        if stalls >= MIGRATION_MAX_STALLS:
+            logger.warning(
+                "Product id migration stopped with %d legacy documents "
+                "left; run it again",
+                await collection.count_documents(legacy),
+            )
+            break
+
+    return migrated
+
+
+async def drop_legacy_id_index() -> None:
+    """
+    Remove o índice em `id`, desnecessário após a migração e a implantação
+    da versão que filtra por `_id`.
+    """
+    for name in ("id_lookup", "id_unique"):
+        try:
+            await product_usecase.collection.drop_index(name)
+        except OperationFailure:
+            pass
+
+
+async def backfill_prices(batch_size: int = 500) -> Dict[str, int]:
+    """
+    Regrava os preços no formato definido por `PRICE_STORAGE`.
+
+    Percorre, em lotes e em ordem de `_id`, os produtos cujo preço ainda está
+    no outro formato e converte cada um com `encode_decimal`. A atualização
+    só é aplicada se o preço não mudou desde a leitura, de modo que a
+    migração pode rodar com a aplicação no ar. Preços com mais casas
+    decimais do que `PRICE_SCALE` não são convertidos.
+
+    Args:
+        batch_size (int): Quantidade de documentos por lote.
+
+    Returns:
+        Dict[str, int]: Quantidade de preços convertidos e ignorados.
+    """
+    collection = product_usecase.collection
+    source = "decimal" if settings.PRICE_STORAGE == "minor_units" else "long"
+    criteria: Dict[str, Any] = {"price": {"$type": source}}
+    converted = skipped = 0
+
+    while True:
+        batch = await collection.find(criteria, {"price": 1}).sort(
+            "_id", pymongo.ASCENDING).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+
+        updates = []
+        for document in batch:
+            try:
+                price = encode_decimal(decode_decimal(document["price"]))
+            except ValueError:
+                skipped += 1
+                continue
+
+            updates.append(
+                UpdateOne(
+                    {"_id": document["_id"], "price": document["price"]},
+                    {"$set": {"price": price}},
+                )
+            )
+
+        if updates:
+            result = await collection.bulk_write(updates, ordered=False)
+            converted += result.modified_count
+
+        criteria = {
+            "price": {"$type": source}, "_id": {"$gt": batch[-1]["_id"]}}
+
+    return {"converted": converted, "skipped": skipped}
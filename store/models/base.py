@@ -1,11 +1,12 @@
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from typing import Any
+from typing import Any, Optional
 
-from bson import Decimal128
 from pydantic import UUID4, BaseModel, Field, model_serializer
 
+from store.schemas.base import encode_decimal
+
 
 class CreateBaseModel(BaseModel):
     """
@@ -19,28 +20,33 @@ class CreateBaseModel(BaseModel):
     id: UUID4 = Field(default_factory=uuid.uuid4)
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
+    deleted_at: Optional[datetime] = Field(None)
 
     @model_serializer
     def set_model(self) -> dict[str, Any]:
         """
         Serializa o modelo para um dicionário, convertendo valores decimais
-        para Decimal128 do MongoDB.
+        para o formato de armazenamento do MongoDB.
 
         Este método utiliza o decorador `@model_serializer` da biblioteca
         `pydantic` para converter a instância do modelo em um dicionário.
         O método itera sobre os pares chave-valor do dicionário e verifica se
-        o valor é do tipo `Decimal`. Se for, o valor é convertido para o tipo
-        `Decimal128` utilizado pelo MongoDB para armazenar dados decimais com
-        alta precisão.
+        o valor é do tipo `Decimal`. Se for, o valor é convertido com
+        `encode_decimal` para `Decimal128` ou, com
+        `PRICE_STORAGE=minor_units`, para um inteiro em unidades menores.
+
+        O `id` também é gravado como `_id`, de modo que a chave primária do
+        MongoDB é o próprio UUID (binário subtipo 4) e não é necessário um
+        segundo índice único.
 
         Returns:
             dict[str, Any]: Dicionário contendo os dados do modelo
             serializados.
         """
-        self_dict = dict(self)
+        self_dict = {"_id": self.id, **dict(self)}
 
         for key, value in self_dict.items():
             if isinstance(value, Decimal):
-                self_dict[key] = Decimal128(str(value))
+                self_dict[key] = encode_decimal(value)
 
         return self_dict
@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import Field
+
+from store.models.base import CreateBaseModel
+from store.schemas.job import JobKind, JobStatus
+
+
+class JobModel(CreateBaseModel):
+    """
+    Classe de modelo para processamentos em segundo plano.
+
+    O processamento é dividido em lotes (`chunk` é o índice do próximo lote e
+    `cursor` o ponto de continuação, como o último `_id` lido). O trabalhador
+    que executa o processamento é o dono de uma concessão (`lease_owner`)
+    válida até `lease_expires_at`; se o trabalhador parar, a concessão expira
+    e outro trabalhador continua a partir do último lote confirmado. Após
+    um erro o processamento só é obtido de novo a partir de `retry_at`, e
+    depois de concluído é removido em `expires_at`.
+    """
+    kind: JobKind
+    status: JobStatus = "pending"
+    params: Dict[str, Any] = Field(default_factory=dict)
+    chunk: int = 0
+    cursor: Optional[Any] = None
+    total: Optional[int] = None
+    processed: int = 0
+    skipped: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    retry_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
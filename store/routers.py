@@ -1,6 +1,12 @@
 from fastapi import APIRouter
 
+from store.controllers.health import router as health
+from store.controllers.job import router as job
+from store.controllers.metrics import router as metrics
 from store.controllers.product import router as product
 
 api_router = APIRouter()
 api_router.include_router(product, prefix="/products")
+api_router.include_router(job, prefix="/jobs")
+api_router.include_router(health, prefix="/health")
+api_router.include_router(metrics, prefix="/metrics")
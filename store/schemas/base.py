@@ -1,11 +1,81 @@
 from datetime import datetime
 from decimal import Decimal
+from typing import Union
 
-from bson import Decimal128
+from bson import Decimal128, Int64
 from pydantic import UUID4, BaseModel, Field, model_validator
 
+from store.core.config import settings
+from store.core.tracing import tracer
 
-class BaseSchemaMixin(BaseModel):
+
+def encode_decimal(value: Decimal) -> Union[Decimal128, Int64]:
+    """
+    Converte um valor decimal para o formato de armazenamento no MongoDB.
+
+    Com `PRICE_STORAGE=decimal128` o valor é gravado como `Decimal128`. Com
+    `PRICE_STORAGE=minor_units` é gravado como inteiro de 64 bits em unidades
+    menores da moeda (por exemplo centavos, com `PRICE_SCALE=2`), o que torna
+    filtros por faixa, ordenações e somas mais baratos no banco.
+
+    Args:
+        value (Decimal): O valor decimal do Python.
+
+    Returns:
+        Union[Decimal128, Int64]: O valor no formato de armazenamento.
+
+    Raises:
+        ValueError: Se o valor tiver mais casas decimais do que `PRICE_SCALE`
+        e não puder ser representado exatamente em unidades menores.
+    """
+    if settings.PRICE_STORAGE == "minor_units":
+        minor = value.scaleb(settings.PRICE_SCALE)
+        if minor != minor.to_integral_value():
+            raise ValueError(
+                f"Value must have at most {settings.PRICE_SCALE} decimal places")
+
+        return Int64(minor)
+
+    return Decimal128(value)
+
+
+def decode_decimal(value: Union[Decimal128, Int64]) -> Decimal:
+    """
+    Converte um valor armazenado no MongoDB de volta para `Decimal`.
+
+    Aceita os dois formatos de `encode_decimal`, de modo que documentos
+    gravados antes e depois de uma troca de `PRICE_STORAGE` são lidos
+    corretamente.
+    """
+    if isinstance(value, Int64):
+        return Decimal(int(value)).scaleb(-settings.PRICE_SCALE)
+
+    return value.to_decimal()
+
+
+class TracedValidationMixin(BaseModel):
+    """
+    Classe Mixin que executa a validação dentro de um trecho de
+    rastreamento `validate <Schema>`, quando houver um rastreamento ativo.
+
+    Um validador `wrap` é chamado em Python a cada validação, mesmo sem
+    rastreamento ativo; por isso só é herdado por `BaseSchemaMixin` com
+    `TRACING_ENABLED`.
+    """
+    @model_validator(mode="wrap")
+    @classmethod
+    def trace_validation(cls, data, handler):
+        if tracer.current() is None:
+            return handler(data)
+
+        with tracer.span(f"validate {cls.__name__}"):
+            return handler(data)
+
+
+SchemaBase = TracedValidationMixin if settings.TRACING_ENABLED else BaseModel
+
+
+class BaseSchemaMixin(SchemaBase):
     """
     Classe Mixin para Schemas da aplicação.
 
@@ -39,9 +109,9 @@ class OutSchema(BaseModel):
         Este método validador é executado antes da serialização do Schema
         utilizando o decorador `@model_validator(mode="before")`. O método
         itera sobre os pares chave-valor do dicionário de dados (`data`) e
-        verifica se o valor é do tipo `Decimal128` utilizado pelo MongoDB.
-        Se for, o valor é convertido para o tipo `Decimal` do Python utilizando
-        `Decimal(str(value))`.
+        verifica se o valor é do tipo `Decimal128` utilizado pelo MongoDB, ou
+        um `Int64` em unidades menores em um campo `Decimal`. Se for, o valor
+        é convertido para o tipo `Decimal` do Python com `decode_decimal`.
 
         Args:
             cls (type): Classe do Schema (utilizado pelo decorador).
@@ -52,6 +122,10 @@ class OutSchema(BaseModel):
         """
         for key, value in data.items():
             if isinstance(value, Decimal128):
-                data[key] = Decimal(str(value))
+                data[key] = decode_decimal(value)
+            elif isinstance(value, Int64) and key in cls.model_fields and (
+                cls.model_fields[key].annotation is Decimal
+            ):
+                data[key] = decode_decimal(value)
 
         return data
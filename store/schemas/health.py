@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+
+
+class HealthOut(BaseModel):
+    """
+    Classe Schema para as respostas das sondas de saúde da aplicação.
+
+    Utilizada pelos endpoints `/health/live` e `/health/ready` para informar
+    o estado do processo e da conexão com o banco de dados.
+    """
+    status: str = Field(..., description="Health status")
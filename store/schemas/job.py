@@ -0,0 +1,51 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Literal, Optional
+
+from pydantic import AliasChoices, Field
+
+from store.schemas.base import BaseSchemaMixin, OutSchema
+from store.schemas.product import Price
+
+JobKind = Literal["import", "reprice", "export"]
+JobStatus = Literal["pending", "running", "succeeded", "failed"]
+
+
+class RepriceIn(BaseSchemaMixin):
+    """
+    Classe Schema para o reajuste de preços em lote.
+
+    Reajusta em `percent` por cento o preço dos produtos não excluídos,
+    opcionalmente apenas dentro de uma faixa de preço.
+    """
+    percent: Decimal = Field(..., gt=-100, description="Price change (%)")
+    min_price: Optional[Price] = Field(None, description="Minimum price")
+    max_price: Optional[Price] = Field(None, description="Maximum price")
+
+
+class ExportIn(BaseSchemaMixin):
+    """
+    Classe Schema para a exportação de produtos em lote, opcionalmente
+    filtrada por faixa de preço.
+    """
+    min_price: Optional[Price] = Field(None, description="Minimum price")
+    max_price: Optional[Price] = Field(None, description="Maximum price")
+
+
+class JobOut(OutSchema):
+    """
+    Classe Schema para saída de dados de um processamento em segundo plano.
+
+    `chunks` é a quantidade de lotes já confirmados; `processed` e `skipped`
+    contam os produtos processados e os ignorados (já importados, já
+    reajustados ou alterados durante o reajuste).
+    """
+    kind: JobKind
+    status: JobStatus
+    chunks: int = Field(..., validation_alias=AliasChoices("chunk", "chunks"))
+    total: Optional[int] = None
+    processed: int
+    skipped: int
+    attempts: int
+    error: Optional[str] = None
+    finished_at: Optional[datetime] = None
@@ -1,10 +1,11 @@
+from datetime import datetime
 from decimal import Decimal
-from typing import Annotated, Optional
+from typing import Annotated, List, Literal, Optional
 
-from bson import Decimal128
-from pydantic import AfterValidator, Field
+from pydantic import UUID4, AfterValidator, Field
 
-from store.schemas.base import BaseSchemaMixin, OutSchema
+from store.core.config import settings
+from store.schemas.base import BaseSchemaMixin, OutSchema, encode_decimal
 
 
 class ProductBase(BaseSchemaMixin):
@@ -21,6 +22,25 @@ class ProductBase(BaseSchemaMixin):
     status: bool = Field(..., description="Product status")
 
 
+def check_price(v):
+    """
+    Garante que o preço possa ser armazenado sem perda de precisão no formato
+    definido por `PRICE_STORAGE`.
+
+    Parâmetros:
+        v (Decimal): O preço informado na requisição.
+
+    Retorno:
+        Decimal: O próprio preço, inalterado.
+    """
+    encode_decimal(v)
+
+    return v
+
+
+Price = Annotated[Decimal, AfterValidator(check_price)]
+
+
 class ProductIn(ProductBase, BaseSchemaMixin):
     """
     Classe Schema para entrada de dados de produto.
@@ -29,7 +49,7 @@ class ProductIn(ProductBase, BaseSchemaMixin):
     schema de entrada de dados para produtos. Provavelmente utilizada em
     requisições para criar novos produtos.
     """
-    ...
+    price: Price = Field(..., description="Product price")
 
 
 class ProductOut(ProductIn, OutSchema):
@@ -41,30 +61,33 @@ class ProductOut(ProductIn, OutSchema):
     consultas de produtos.
     Ela inclui os campos do produto (`ProductIn`) e adiciona os campos
     padronizados de saída definidos em `OutSchema` (id, created_at,
-    updated_at).
+    updated_at). O preço não é validado contra `PRICE_SCALE`, para que
+    documentos antigos continuem legíveis.
     """
-    ...
+    price: Decimal = Field(..., description="Product price")
 
 
-def convert_decimal_128(v):
+def convert_decimal(v):
     """
-    Converte um valor decimal do Python para um valor Decimal128 do MongoDB.
+    Converte um valor decimal do Python para o formato de armazenamento do
+    MongoDB.
 
     Esta função é utilizada como um validador posterior (`AfterValidator`)
     para garantir que os valores decimais armazenados no campo `price` da
-    classe `ProductUpdate` sejam convertidos para o formato apropriado 
-    utilizado pelo MongoDB (Decimal128) antes da serialização do Schema.
+    classe `ProductUpdate` sejam convertidos para o formato apropriado
+    utilizado pelo MongoDB (`Decimal128` ou inteiro em unidades menores,
+    conforme `PRICE_STORAGE`) antes da serialização do Schema.
 
     Parâmetros:
         v (Decimal): O valor decimal do Python a ser convertido.
 
     Retorno:
-        Decimal128: O valor convertido para Decimal128 do MongoDB.
+        Decimal128 | Int64: O valor convertido por `encode_decimal`.
     """
-    return Decimal128(str(v))
+    return encode_decimal(v)
 
 
-Decimal_ = Annotated[Decimal, AfterValidator(convert_decimal_128)]
+Decimal_ = Annotated[Decimal, AfterValidator(convert_decimal)]
 
 
 class ProductUpdate(BaseSchemaMixin):
@@ -89,3 +112,110 @@ class ProductUpdateOut(ProductOut):
     produto após a atualização.
     """
     ...
+
+
+class ProductBatchGetIn(BaseSchemaMixin):
+    """
+    Classe Schema para a busca de vários produtos por ID.
+
+    Aceita no máximo `BATCH_GET_MAX_IDS` IDs, que podem se repetir.
+    """
+    ids: List[UUID4] = Field(
+        ..., max_length=settings.BATCH_GET_MAX_IDS, description="Product ids")
+
+
+class ProductBatchGetItem(BaseSchemaMixin):
+    """
+    Classe Schema para cada item da busca de vários produtos por ID.
+
+    `found` indica se o produto existe; quando não existe, `product` é nulo.
+    """
+    id: UUID4 = Field(..., description="Requested product id")
+    found: bool = Field(..., description="Whether the product exists")
+    product: Optional[ProductOut] = Field(None, description="Product")
+
+
+class ProductStockIn(BaseSchemaMixin):
+    """
+    Classe Schema para o ajuste do estoque de um produto.
+
+    `delta` é somado à quantidade atual; valores negativos dão baixa.
+    """
+    delta: int = Field(..., description="Quantity to add to the stock")
+
+
+class ProductStockOut(BaseSchemaMixin):
+    """
+    Classe Schema para a saída do ajuste de estoque.
+
+    Para produtos com contador distribuído (`sharded`) a nova quantidade não
+    é calculada a cada ajuste e `quantity` é nulo; ela aparece na leitura do
+    produto após a próxima consolidação.
+    """
+    id: UUID4 = Field(..., description="Product id")
+    quantity: Optional[int] = Field(None, description="Updated quantity")
+    sharded: bool = Field(..., description="Whether the stock is sharded")
+
+
+class ProductChange(BaseSchemaMixin):
+    """
+    Classe Schema para cada alteração retornada pela sincronização.
+
+    Produtos excluídos aparecem com `deleted` verdadeiro e sem `product`.
+    """
+    id: UUID4 = Field(..., description="Product id")
+    updated_at: datetime = Field(..., description="Time of the change")
+    deleted: bool = Field(..., description="Whether the product was deleted")
+    product: Optional[ProductOut] = Field(None, description="Product")
+
+
+class ProductChangesOut(BaseSchemaMixin):
+    """
+    Classe Schema para a saída da sincronização de produtos.
+
+    `next` é o token a enviar em `since` na próxima chamada; `has_more`
+    indica que há mais alterações além do limite pedido.
+    """
+    changes: List[ProductChange] = Field(..., description="Changes")
+    next: Optional[str] = Field(None, description="Continuation token")
+    has_more: bool = Field(..., description="Whether more changes are ready")
+
+
+class ProductStreamEvent(BaseSchemaMixin):
+    """
+    Classe Schema para cada alteração enviada pelo fluxo de produtos.
+
+    Produtos excluídos, ou inexistentes, aparecem com `deleted` verdadeiro e
+    sem os demais campos.
+    """
+    id: UUID4 = Field(..., description="Product id")
+    quantity: Optional[int] = Field(None, description="Product quantity")
+    price: Optional[Decimal] = Field(None, description="Product price")
+    status: Optional[bool] = Field(None, description="Product status")
+    deleted: bool = Field(..., description="Whether the product was deleted")
+
+
+AnalyticsSort = Literal[
+    "price", "-price", "quantity", "-quantity", "name", "-name"]
+
+
+class ProductAnalyticsItem(BaseSchemaMixin):
+    """
+    Classe Schema para cada produto retornado pela consulta analítica.
+    """
+    id: UUID4 = Field(..., description="Product id")
+    name: str = Field(..., description="Product name")
+    quantity: int = Field(..., description="Product quantity")
+    price: Decimal = Field(..., description="Product price")
+    status: bool = Field(..., description="Product status")
+
+
+class ProductAnalyticsOut(BaseSchemaMixin):
+    """
+    Classe Schema para saída da consulta analítica do catálogo.
+
+    `count` é a quantidade total de produtos que atendem aos filtros e
+    `items` traz apenas os primeiros, conforme a ordenação e o limite.
+    """
+    count: int = Field(..., description="Matching products")
+    items: List[ProductAnalyticsItem] = Field(..., description="Products")
@@ -0,0 +1,359 @@
+import logging
+import time
+from decimal import ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_EVEN, Decimal
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from uuid import UUID
+
+from store.core.config import settings
+from store.core.events import ProductEvent
+from store.core.exceptions import UnavailableException
+from store.core.metrics import metrics
+from store.schemas.base import decode_decimal
+from store.schemas.product import ProductAnalyticsItem, ProductAnalyticsOut
+from store.usecases.product import product_usecase
+
+if TYPE_CHECKING:
+    import numpy
+
+logger = logging.getLogger(__name__)
+
+SORT_COLUMNS = {"price": "price", "quantity": "quantity", "name": "name_rank"}
+
+# Bytes de nomes substituídos ou excluídos a partir dos quais `names` é
+# compactado, desde que sejam também metade do total.
+NAMES_COMPACT_MIN_BYTES = 1 << 20
+
+
+def minor_units(value: Decimal, rounding: str = ROUND_HALF_EVEN) -> int:
+    """
+    Converte um valor em unidades menores da moeda (`PRICE_SCALE` casas),
+    arredondando as casas excedentes com `rounding`.
+    """
+    return int(
+        value.scaleb(settings.PRICE_SCALE).to_integral_value(rounding))
+
+
+def import_numpy() -> "numpy":
+    """
+    Importa o NumPy, dependência opcional do extra `analytics`.
+
+    Raises:
+        UnavailableException: Se o NumPy não estiver instalado.
+    """
+    try:
+        import numpy
+    except ImportError as exc:
+        raise UnavailableException(
+            message="Analytics requires numpy (install the 'analytics' extra)"
+        ) from exc
+
+    return numpy
+
+
+class Columns:
+    """
+    Colunas do catálogo em arrays do NumPy.
+
+    Cada produto ocupa uma linha: `ids` (UUID em 16 bytes), `price` (inteiro
+    em unidades menores, `PRICE_SCALE` casas), `quantity`, `status` e
+    `alive` (falso para produtos excluídos). Os nomes ficam concatenados em
+    `names`, em UTF-8, e cada linha guarda o início e o tamanho do seu nome;
+    os nomes substituídos ou excluídos são descartados quando passam de
+    metade de `names`. A ordem alfabética dos nomes fica em `name_rank`,
+    recalculada na primeira consulta após uma alteração de nome. As linhas
+    crescem por duplicação de capacidade.
+    """
+    def __init__(self, capacity: int = 1024) -> None:
+        np = import_numpy()
+        self.size = 0
+        self.ids = np.zeros(capacity, dtype="V16")
+        self.price = np.zeros(capacity, dtype=np.int64)
+        self.quantity = np.zeros(capacity, dtype=np.int64)
+        self.status = np.zeros(capacity, dtype=np.bool_)
+        self.alive = np.zeros(capacity, dtype=np.bool_)
+        self.name_start = np.zeros(capacity, dtype=np.int64)
+        self.name_length = np.zeros(capacity, dtype=np.int32)
+        self.names = bytearray()
+        self.dead = 0
+        self.rows: Dict[bytes, int] = {}
+        self._name_rank: Optional["numpy.ndarray"] = None
+
+    def _grow(self) -> None:
+        np = import_numpy()
+        for column in (
+            "ids", "price", "quantity", "status", "alive", "name_start",
+            "name_length",
+        ):
+            array = getattr(self, column)
+            grown = np.zeros(len(array) * 2, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, column, grown)
+
+    def upsert(self, document: Dict[str, Any]) -> None:
+        if document.get("deleted_at") is not None:
+            self.delete(document["_id"])
+            return
+
+        key = document["_id"].bytes
+        row = self.rows.get(key)
+        if row is None:
+            if self.size == len(self.ids):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.rows[key] = row
+            self.ids[row] = key
+            self._name_rank = None
+
+        name = document["name"].encode()
+        start = int(self.name_start[row])
+        length = int(self.name_length[row])
+        if self.names[start:start + length] != name:
+            self.name_start[row] = len(self.names)
+            self.name_length[row] = len(name)
+            self.names += name
+            self.dead += length
+            self._name_rank = None
+            self._compact()
+
+        self.price[row] = minor_units(decode_decimal(document["price"]))
+        self.quantity[row] = document["quantity"]
+        self.status[row] = document["status"]
+        self.alive[row] = True
+
+    def delete(self, id: UUID) -> None:
+        row = self.rows.pop(id.bytes, None)
+        if row is not None:
+            self.alive[row] = False
+            self.dead += int(self.name_length[row])
+            self.name_length[row] = 0
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Regrava `names` apenas com os nomes das linhas atuais, quando os
+        nomes descartados passam de `NAMES_COMPACT_MIN_BYTES` e de metade do
+        total.
+        """
+        if (
+            self.dead < NAMES_COMPACT_MIN_BYTES
+            or self.dead * 2 < len(self.names)
+        ):
+            return
+
+        names = bytearray()
+        for row in range(self.size):
+            start = int(self.name_start[row])
+            length = int(self.name_length[row])
+            self.name_start[row] = len(names)
+            names += self.names[start:start + length]
+        self.names = names
+        self.dead = 0
+
+    @property
+    def name_rank(self) -> "numpy.ndarray":
+        """
+        Posição de cada linha na ordem alfabética dos nomes, para ordenar as
+        consultas por nome com as mesmas operações vetorizadas das colunas
+        numéricas. Os nomes são comparados em UTF-8, que preserva a ordem
+        dos caracteres.
+        """
+        if self._name_rank is None or len(self._name_rank) < self.size:
+            np = import_numpy()
+            names = self.names
+            values = np.array(
+                [
+                    bytes(names[start:start + length])
+                    for start, length in zip(
+                        self.name_start[:self.size].tolist(),
+                        self.name_length[:self.size].tolist(),
+                    )
+                ],
+                dtype=bytes,
+            )
+            rank = np.zeros(len(self.ids), dtype=np.int64)
+            rank[np.argsort(values, kind="stable")] = np.arange(self.size)
+            self._name_rank = rank
+
+        return self._name_rank
+
+    def name(self, row: int) -> str:
+        start = int(self.name_start[row])
+
+        return self.names[start:start + int(self.name_length[row])].decode()
+
+    def nbytes(self) -> int:
+        return sum(
+            getattr(self, column).nbytes
+            for column in (
+                "ids", "price", "quantity", "status", "alive", "name_start",
+                "name_length",
+            )
+        ) + len(self.names) + (
+            self._name_rank.nbytes if self._name_rank is not None else 0)
+
+
+class CatalogSnapshot:
+    """
+    Cópia colunar do catálogo em memória, para consultas analíticas.
+
+    Carregada na inicialização e mantida atualizada pelas escritas do próprio
+    processo (`events`); as escritas de outros processos aparecem na próxima
+    recarga, a cada `ANALYTICS_REFRESH_SECONDS`. Filtros, ordenação e top-N
+    são avaliados com operações vetorizadas do NumPy, sem consultar o
+    MongoDB.
+    """
+    def __init__(self) -> None:
+        self.columns: Optional[Columns] = None
+        self.loaded_at: Optional[float] = None
+        self._loading = False
+        self._pending: List[ProductEvent] = []
+
+    def apply(self, event: ProductEvent) -> None:
+        """
+        Aplica uma alteração de produto. Durante uma recarga a alteração
+        também é guardada e reaplicada sobre as novas colunas.
+        """
+        if self._loading:
+            self._pending.append(event)
+
+        if self.columns is None:
+            return
+
+        if event.kind == "delete":
+            self.columns.delete(event.id)
+        else:
+            self.columns.upsert(event.document)
+
+    async def load(self) -> None:
+        """
+        Recarrega o catálogo do MongoDB em lotes de
+        `ANALYTICS_LOAD_BATCH_SIZE`, lendo dos secundários quando
+        configurado, e troca as colunas de uma só vez ao final.
+
+        Raises:
+            UnavailableException: Se o NumPy não estiver instalado.
+        """
+        columns = Columns()
+        self._loading = True
+        self._pending = []
+        try:
+            after = None
+            while True:
+                batch = await product_usecase.scan(
+                    after=after,
+                    limit=settings.ANALYTICS_LOAD_BATCH_SIZE,
+                    operation="stats",
+                )
+                for document in batch:
+                    columns.upsert(document)
+                if len(batch) < settings.ANALYTICS_LOAD_BATCH_SIZE:
+                    break
+                after = batch[-1]["_id"]
+
+            for event in self._pending:
+                if event.kind == "delete":
+                    columns.delete(event.id)
+                else:
+                    columns.upsert(event.document)
+        finally:
+            self._loading = False
+            self._pending = []
+
+        self.columns = columns
+        self.loaded_at = time.monotonic()
+
+    def query(
+        self,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        min_quantity: Optional[int] = None,
+        max_quantity: Optional[int] = None,
+        status: Optional[bool] = None,
+        sort: str = "price",
+        limit: int = 100,
+    ) -> ProductAnalyticsOut:
+        """
+        Filtra, ordena e limita os produtos do catálogo em memória.
+
+        Args:
+            min_price (Decimal): Preço mínimo, inclusivo.
+            max_price (Decimal): Preço máximo, inclusivo.
+            min_quantity (int): Quantidade mínima, inclusiva.
+            max_quantity (int): Quantidade máxima, inclusiva.
+            status (bool): Situação do produto.
+            sort (str): `price`, `quantity` ou `name`; com prefixo `-` a
+            ordem é decrescente.
+            limit (int): Quantidade máxima de produtos retornados.
+
+        Returns:
+            ProductAnalyticsOut: Total de produtos que atendem aos filtros e
+            os `limit` primeiros na ordem pedida.
+
+        Raises:
+            UnavailableException: Se o catálogo ainda não foi carregado.
+        """
+        np = import_numpy()
+        columns = self.columns
+        if columns is None:
+            raise UnavailableException(message="Catalog snapshot not loaded")
+
+        size = columns.size
+        price = columns.price[:size]
+        quantity = columns.quantity[:size]
+        mask = columns.alive[:size].copy()
+        # Os preços são inteiros: limites com mais casas que `PRICE_SCALE`
+        # são arredondados para dentro da faixa.
+        if min_price is not None:
+            mask &= price >= minor_units(min_price, ROUND_CEILING)
+        if max_price is not None:
+            mask &= price <= minor_units(max_price, ROUND_FLOOR)
+        if min_quantity is not None:
+            mask &= quantity >= min_quantity
+        if max_quantity is not None:
+            mask &= quantity <= max_quantity
+        if status is not None:
+            mask &= columns.status[:size] == status
+
+        rows = np.flatnonzero(mask)
+        descending = sort.startswith("-")
+        column = SORT_COLUMNS[sort.lstrip("-")]
+
+        values = getattr(columns, column)[rows]
+        if descending:
+            values = -values
+        if limit < len(rows):
+            partition = np.argpartition(values, limit)[:limit]
+            top = rows[partition[np.argsort(values[partition], kind="stable")]]
+        else:
+            top = rows[np.argsort(values, kind="stable")]
+
+        return ProductAnalyticsOut(
+            count=len(rows),
+            items=[
+                ProductAnalyticsItem(
+                    id=UUID(bytes=columns.ids[row].tobytes()),
+                    name=columns.name(row),
+                    price=Decimal(int(columns.price[row])).scaleb(
+                        -settings.PRICE_SCALE),
+                    quantity=int(columns.quantity[row]),
+                    status=bool(columns.status[row]),
+                )
+                for row in top
+            ],
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        columns = self.columns
+        return {
+            "loaded": columns is not None,
+            "products": len(columns.rows) if columns is not None else 0,
+            "bytes": columns.nbytes() if columns is not None else 0,
+            "age_seconds": round(time.monotonic() - self.loaded_at, 1)
+            if self.loaded_at is not None else None,
+        }
+
+
+catalog_snapshot = CatalogSnapshot()
+
+metrics.register("catalog", catalog_snapshot.snapshot)
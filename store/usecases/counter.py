@@ -0,0 +1,303 @@
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict
+from uuid import UUID
+
+import pymongo
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from store.core.config import settings
+from store.core.events import ProductEvent, events
+from store.core.metrics import metrics
+from store.db.resilience import mongo_guard
+from store.usecases.product import (  # E501
+    DUPLICATE_KEY_ERROR,
+    product_cache,
+    product_usecase,
+    sharded_stock,
+    stock_writes,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class StockCounterManager:
+    """
+    Distribui o estoque dos produtos mais ajustados em contadores parciais.
+
+    Um produto com mais de `COUNTER_PROMOTE_WRITES_PER_SECOND` ajustes de
+    estoque por segundo, neste processo, é promovido: recebe
+    `counter_slots` partes em `product_counters` e a sua quantidade no
+    momento da promoção é guardada em `counter_base`. Os ajustes passam a ser
+    feitos em uma parte ao acaso (ver `ProductUsecase.adjust_stock`) e
+    `refresh` consolida `quantity` como `counter_base` mais a soma das partes.
+    Quando os ajustes, somadas todas as partes, ficam abaixo de
+    `COUNTER_DEMOTE_WRITES_PER_SECOND` por `COUNTER_DEMOTE_AFTER_SECONDS`, o
+    produto é rebaixado e a soma das partes volta para `quantity`.
+
+    Cada etapa da promoção e do rebaixamento é condicionada ao estado do
+    produto, de modo que vários processos podem executar `refresh` ao mesmo
+    tempo, e um rebaixamento interrompido é concluído no `refresh` seguinte.
+    """
+    def __init__(self) -> None:
+        self.refreshed_at: float = 0.0
+        self.promotions = 0
+        self.demotions = 0
+        self._writes: Dict[UUID, int] = {}
+        self._quiet_since: Dict[UUID, float] = {}
+
+    async def _open_slots(self, id: UUID, slots: int) -> None:
+        """
+        Zera e abre as partes fechadas do produto, criando as que faltam.
+        Partes fechadas não recebem ajustes, então zerá-las não perde dados.
+        """
+        requests = [
+            UpdateOne(
+                {"product_id": id, "slot": slot, "closed": True},
+                {"$set": {"closed": False, "count": 0, "writes": 0}},
+                upsert=True,
+            )
+            for slot in range(slots)
+        ]
+        try:
+            await mongo_guard.call(
+                "stock",
+                lambda: product_usecase.counters.bulk_write(
+                    requests, ordered=False),
+            )
+        except BulkWriteError as exc:
+            errors = exc.details.get("writeErrors", [])
+            if any(e["code"] != DUPLICATE_KEY_ERROR for e in errors):
+                raise
+
+    async def _set_base(self, id: UUID, quantity: int) -> None:
+        """
+        Grava a base do contador do produto, se ainda não foi gravada.
+        """
+        await mongo_guard.call(
+            "stock",
+            lambda: product_usecase.collection.update_one(
+                {"_id": id, "counter_base": None},
+                {"$set": {"counter_base": quantity}},
+            ),
+        )
+
+    async def promote(self, id: UUID) -> bool:
+        """
+        Passa o estoque do produto para contadores parciais.
+
+        Returns:
+            bool: `True` se o produto foi promovido por esta chamada.
+        """
+        slots = settings.COUNTER_SLOTS
+        product = await mongo_guard.call(
+            "stock",
+            lambda: product_usecase.collection.find_one_and_update(
+                {
+                    "_id": id,
+                    "deleted_at": None,
+                    "counter_slots": {"$in": [None, 0]},
+                    "counter_demoting": None,
+                },
+                {"$set": {"counter_slots": slots}},
+                return_document=pymongo.ReturnDocument.AFTER,
+            ),
+        )
+        if product is None:
+            return False
+
+        # A partir daqui `quantity` não recebe mais ajustes e é a base.
+        await self._set_base(id, product["quantity"])
+        await self._open_slots(id, slots)
+        sharded_stock[id] = slots
+        self.promotions += 1
+        logger.info("Sharded stock counter of product %s", id)
+
+        return True
+
+    async def demote(self, id: UUID) -> bool:
+        """
+        Devolve o estoque do produto, somadas as partes, para `quantity`.
+
+        Returns:
+            bool: `True` se o produto foi rebaixado por esta chamada.
+        """
+        product = await mongo_guard.call(
+            "stock",
+            lambda: product_usecase.collection.find_one(
+                {"_id": id, "counter_slots": {"$gt": 0}}),
+            retry=True,
+        )
+        if product is None or "counter_base" not in product:
+            return False
+
+        result = await mongo_guard.call(
+            "stock",
+            lambda: product_usecase.collection.update_one(
+                {
+                    "_id": id,
+                    "counter_slots": product["counter_slots"],
+                    "counter_base": product["counter_base"],
+                },
+                {"$set": {
+                    "counter_slots": 0,
+                    "counter_demoting": product["counter_slots"],
+                    "quantity": product["counter_base"],
+                }},
+            ),
+        )
+        if not result.modified_count:
+            return False
+
+        sharded_stock.pop(id, None)
+        await self._finish_demotion(id, product["counter_slots"])
+        self.demotions += 1
+        logger.info("Unsharded stock counter of product %s", id)
+
+        return True
+
+    async def _finish_demotion(self, id: UUID, slots: int) -> None:
+        """
+        Fecha as partes e soma os seus ajustes a `quantity`, que desde o
+        início do rebaixamento recebe os novos ajustes diretamente.
+
+        As partes que faltam são criadas já fechadas: se fossem criadas
+        abertas por um ajuste atrasado, depois da soma, o seu valor seria
+        somado de novo na próxima promoção.
+        """
+        requests = [
+            UpdateOne(
+                {"product_id": id, "slot": slot},
+                {
+                    "$set": {"closed": True},
+                    "$setOnInsert": {"count": 0, "writes": 0},
+                },
+                upsert=True,
+            )
+            for slot in range(slots)
+        ]
+        await mongo_guard.call(
+            "stock",
+            lambda: product_usecase.counters.bulk_write(
+                requests, ordered=False),
+        )
+        totals = await product_usecase.slot_totals([id], max_slot=slots)
+        result = await mongo_guard.call(
+            "stock",
+            lambda: product_usecase.collection.find_one_and_update(
+                {"_id": id, "counter_demoting": slots},
+                {
+                    "$inc": {"quantity": totals.get(id, {}).get("count", 0)},
+                    "$set": {"updated_at": datetime.now()},
+                    "$unset": {"counter_demoting": "", "counter_base": ""},
+                },
+                return_document=pymongo.ReturnDocument.AFTER,
+            ),
+        )
+        self._writes.pop(id, None)
+        self._quiet_since.pop(id, None)
+        if result is not None:
+            product_cache.delete(id)
+            events.publish(ProductEvent("upsert", id, result))
+
+    async def refresh(self) -> None:
+        """
+        Consolida a quantidade dos produtos com contador distribuído e
+        promove ou rebaixa produtos conforme a taxa de ajustes observada.
+        """
+        now = time.monotonic()
+        elapsed = now - self.refreshed_at if self.refreshed_at else 0.0
+        self.refreshed_at = now
+        local = dict(stock_writes)
+        stock_writes.clear()
+
+        demoting = await mongo_guard.call(
+            "stock",
+            lambda: product_usecase.collection.find(
+                {"counter_demoting": {"$gt": 0}}, {"counter_demoting": 1}
+            ).to_list(None),
+            retry=True,
+        )
+        for product in demoting:
+            await self._finish_demotion(
+                product["_id"], product["counter_demoting"])
+
+        sharded = await mongo_guard.call(
+            "stock",
+            lambda: product_usecase.collection.find(
+                {"counter_slots": {"$gt": 0}, "deleted_at": None}
+            ).to_list(None),
+            retry=True,
+        )
+        totals = await product_usecase.slot_totals(
+            [product["_id"] for product in sharded])
+        sharded_stock.clear()
+
+        for product in sharded:
+            id = product["_id"]
+            slots = product["counter_slots"]
+            sharded_stock[id] = slots
+            total = totals.get(id, {"count": 0, "writes": 0, "slots": 0})
+
+            if "counter_base" not in product:
+                # Promoção interrompida antes de gravar a base.
+                await self._set_base(id, product["quantity"])
+                continue
+            if total["slots"] < slots:
+                await self._open_slots(id, slots)
+
+            quantity = product["counter_base"] + total["count"]
+            if quantity != product["quantity"]:
+                result = await mongo_guard.call(
+                    "stock",
+                    lambda: product_usecase.collection.find_one_and_update(
+                        {
+                            "_id": id,
+                            "counter_slots": slots,
+                            "counter_base": product["counter_base"],
+                        },
+                        {"$set": {
+                            "quantity": quantity,
+                            "updated_at": datetime.now(),
+                        }},
+                        return_document=pymongo.ReturnDocument.AFTER,
+                    ),
+                )
+                if result is not None:
+                    product_cache.delete(id)
+                    events.publish(ProductEvent("upsert", id, result))
+
+            previous = self._writes.get(id, total["writes"])
+            self._writes[id] = total["writes"]
+            rate = max(total["writes"] - previous, 0) / elapsed if elapsed else 0
+            if rate >= settings.COUNTER_DEMOTE_WRITES_PER_SECOND:
+                self._quiet_since.pop(id, None)
+            elif (
+                now - self._quiet_since.setdefault(id, now)
+                >= settings.COUNTER_DEMOTE_AFTER_SECONDS
+            ):
+                await self.demote(id)
+
+        if not elapsed:
+            return
+
+        for id, writes in local.items():
+            if (
+                id not in sharded_stock
+                and writes / elapsed >= settings.COUNTER_PROMOTE_WRITES_PER_SECOND
+            ):
+                await self.promote(id)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "sharded": len(sharded_stock),
+            "promotions": self.promotions,
+            "demotions": self.demotions,
+        }
+
+
+stock_counters = StockCounterManager()
+
+metrics.register("counters", stock_counters.snapshot)
@@ -0,0 +1,47 @@
+import logging
+
+from store.db.mongo import db_client
+from store.usecases.idempotency import idempotency_usecase
+from store.usecases.job import job_usecase
+from store.usecases.product import product_usecase
+
+logger = logging.getLogger(__name__)
+
+
+class HealthUsecase:
+    async def prepare(self) -> bool:
+        """
+        Prepara o processo para receber tráfego.
+
+        Verifica a conexão com o MongoDB, garante que os índices existam e
+        pré-abre as conexões do pool. Em caso de falha o processo continua
+        vivo, porém não pronto, e uma nova tentativa é feita na próxima
+        sondagem de prontidão.
+
+        Returns:
+            bool: `True` se o processo está pronto para receber tráfego.
+        """
+        try:
+            await db_client.warm_up()
+            await product_usecase.create_indexes()
+            await job_usecase.create_indexes()
+            await idempotency_usecase.create_indexes()
+        except Exception:
+            logger.exception("Database warm-up failed")
+            return False
+
+        db_client.ready = True
+
+        return True
+
+    async def live(self) -> bool:
+        return True
+
+    async def ready(self) -> bool:
+        if not db_client.ready:
+            return await self.prepare()
+
+        return await db_client.ping()
+
+
+health_usecase = HealthUsecase()
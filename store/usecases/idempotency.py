@@ -0,0 +1,251 @@
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, NamedTuple, Optional
+from uuid import UUID
+
+import pymongo
+from fastapi.encoders import jsonable_encoder
+from pymongo.errors import DuplicateKeyError
+
+from store.core.cache import TTLCache
+from store.core.config import settings
+from store.core.exceptions import ConflictException, UnprocessableException
+from store.core.metrics import metrics
+from store.core.tracing import traced
+from store.db.mongo import db_client
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection
+
+idempotency_cache: TTLCache[Dict[str, Any]] = TTLCache(
+    name="idempotency",
+    max_size=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl=settings.IDEMPOTENCY_CACHE_TTL_SECONDS,
+)
+metrics.register("cache.idempotency", idempotency_cache.snapshot)
+
+
+class IdempotentResponse(NamedTuple):
+    """
+    Resposta de uma escrita idempotente. `replayed` indica que a resposta
+    foi gravada por uma requisição anterior com a mesma chave.
+    """
+    status_code: int
+    body: Any
+    replayed: bool
+
+
+def idempotent_id(scope: str, key: str, index: int = 0) -> UUID:
+    """
+    Deriva um UUID (versão 4) da chave de idempotência.
+
+    Usado como ID dos registros criados pela escrita, de modo que repetir a
+    escrita após uma falha entre gravar os dados e gravar a resposta
+    encontra os mesmos registros em vez de duplicá-los.
+
+    Args:
+        scope (str): Operação da escrita, por exemplo `products.create`.
+        key (str): Chave de idempotência enviada pelo cliente.
+        index (int): Posição do registro, nas escritas em lote.
+
+    Returns:
+        UUID: ID determinístico do registro.
+    """
+    digest = hashlib.sha256(f"{scope}:{key}:{index}".encode()).digest()
+
+    return uuid.UUID(bytes=digest[:16], version=4)
+
+
+def fingerprint(request: Any) -> str:
+    """
+    Calcula o hash SHA-256 do corpo da requisição em JSON canônico.
+    """
+    encoded = json.dumps(
+        jsonable_encoder(request), sort_keys=True, separators=(",", ":"))
+
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class IdempotencyUsecase:
+    """
+    Registra as respostas das escritas com `Idempotency-Key`.
+
+    Cada chave ocupa um documento em `idempotency_keys`, removido pelo índice
+    TTL após `IDEMPOTENCY_TTL_SECONDS`. O documento é criado como `pending`
+    antes da escrita, funcionando como trava com validade de
+    `IDEMPOTENCY_LOCK_SECONDS`, e passa a `completed` com a resposta gravada.
+    As respostas concluídas também ficam em um cache em memória, que atende
+    as repetições sem consultar o MongoDB.
+    """
+    @property
+    def collection(self) -> "AsyncIOMotorCollection":
+        return db_client.get().get_database().get_collection(
+            "idempotency_keys")
+
+    async def create_indexes(self) -> None:
+        await self.collection.create_index(
+            [("expires_at", pymongo.ASCENDING)],
+            expireAfterSeconds=0,
+            name="expires_at_ttl",
+        )
+
+    def _check(self, record: Dict[str, Any], fingerprint: str) -> None:
+        if record["fingerprint"] != fingerprint:
+            raise UnprocessableException(
+                message="Idempotency-Key was used with a different request")
+
+    async def acquire(
+        self, id: str, fingerprint: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Reserva a chave para uma nova escrita.
+
+        Returns:
+            Optional[Dict[str, Any]]: O registro concluído da chave, se a
+            escrita já foi feita, ou `None` se a chave foi reservada e a
+            escrita deve ser executada.
+
+        Raises:
+            UnprocessableException: Se a chave foi usada com outro corpo.
+            ConflictException: Se outra requisição com a chave está em
+            andamento.
+        """
+        cached = idempotency_cache.get(id)
+        if cached is not None:
+            self._check(cached, fingerprint)
+            return cached
+
+        while True:
+            now = datetime.now()
+            locked_until = now + timedelta(
+                seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+            try:
+                await self.collection.insert_one({
+                    "_id": id,
+                    "fingerprint": fingerprint,
+                    "status": "pending",
+                    "locked_until": locked_until,
+                    "created_at": now,
+                    "expires_at": now + timedelta(
+                        seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+                })
+                return None
+            except DuplicateKeyError:
+                pass
+
+            record = await self.collection.find_one({"_id": id})
+            if record is not None:
+                break
+
+        self._check(record, fingerprint)
+
+        if record["status"] == "completed":
+            idempotency_cache.set(id, record)
+            return record
+
+        if record["locked_until"] > now:
+            raise ConflictException(
+                message="A request with this Idempotency-Key is in progress")
+
+        taken = await self.collection.find_one_and_update(
+            {
+                "_id": id,
+                "status": "pending",
+                "locked_until": record["locked_until"],
+            },
+            {"$set": {"locked_until": locked_until}},
+        )
+        if taken is None:
+            raise ConflictException(
+                message="A request with this Idempotency-Key is in progress")
+
+        return None
+
+    async def complete(
+        self, id: str, fingerprint: str, status_code: int, body: Any
+    ) -> None:
+        record = {
+            "_id": id,
+            "fingerprint": fingerprint,
+            "status": "completed",
+            "status_code": status_code,
+            "body": body,
+        }
+        await self.collection.update_one(
+            {"_id": id},
+            {
+                "$set": {
+                    **record,
+                    "expires_at": datetime.now() + timedelta(
+                        seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+                },
+                "$unset": {"locked_until": ""},
+            },
+        )
+        idempotency_cache.set(id, record)
+
+    async def release(self, id: str) -> None:
+        await self.collection.delete_one({"_id": id, "status": "pending"})
+
+    @traced
+    async def execute(
+        self,
+        scope: str,
+        key: str,
+        request: Any,
+        status_code: int,
+        func: Callable[[], Awaitable[Any]],
+        digest: Optional[str] = None,
+    ) -> IdempotentResponse:
+        """
+        Executa a escrita uma única vez por chave de idempotência.
+
+        Na primeira requisição com a chave a escrita é executada e a resposta
+        gravada; nas repetições com o mesmo corpo a resposta gravada é
+        retornada sem executar a escrita. Se a escrita falhar a chave é
+        liberada para uma nova tentativa. Se o processo parar durante a
+        escrita, a chave fica reservada até o fim da trava; para que a nova
+        tentativa não duplique dados, `func` deve gravar os registros com IDs
+        derivados por `idempotent_id`.
+
+        Args:
+            scope (str): Operação da escrita; a mesma chave em operações
+            diferentes é independente.
+            key (str): Chave de idempotência enviada pelo cliente.
+            request (Any): Corpo da requisição, comparado entre as repetições.
+            status_code (int): Código de status da resposta da escrita.
+            func (Callable[[], Awaitable[Any]]): Escrita a executar.
+            digest (str): `fingerprint` do corpo, se já calculado.
+
+        Returns:
+            IdempotentResponse: A resposta da escrita, em JSON.
+
+        Raises:
+            UnprocessableException: Se a chave foi usada com outro corpo.
+            ConflictException: Se outra requisição com a chave está em
+            andamento.
+        """
+        id = f"{scope}:{key}"
+        if digest is None:
+            digest = fingerprint(request)
+
+        record = await self.acquire(id, digest)
+        if record is not None:
+            return IdempotentResponse(
+                record["status_code"], record["body"], True)
+
+        try:
+            result = await func()
+        except Exception:
+            await self.release(id)
+            raise
+
+        body = jsonable_encoder(result)
+        await self.complete(id, digest, status_code, body)
+
+        return IdempotentResponse(status_code, body, False)
+
+
+idempotency_usecase = IdempotencyUsecase()
@@ -0,0 +1,536 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+import pymongo
+
+from store.core.admission import admission_controllers
+from store.core.config import settings
+from store.core.exceptions import NotFoundException
+from store.core.metrics import metrics
+from store.core.tracing import traced
+from store.db.mongo import db_client
+from store.db.resilience import mongo_guard
+from store.models.job import JobModel
+from store.models.product import ProductModel
+from store.schemas.job import ExportIn, JobOut, RepriceIn
+from store.schemas.product import ProductIn, ProductOut
+from store.usecases.product import product_usecase
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+
+def optional_decimal(value: Optional[str]) -> Optional[Decimal]:
+    return Decimal(value) if value is not None else None
+
+
+def retention() -> datetime:
+    """
+    Retorna até quando um processamento concluído e os seus lotes são
+    guardados (`JOBS_RETENTION_DAYS`), removidos depois pelo índice TTL.
+    """
+    return datetime.now() + timedelta(days=settings.JOBS_RETENTION_DAYS)
+
+
+class JobUsecase:
+    @property
+    def database(self) -> "AsyncIOMotorDatabase":
+        return db_client.get().get_database()
+
+    @property
+    def collection(self) -> "AsyncIOMotorCollection":
+        return self.database.get_collection("jobs")
+
+    @property
+    def inputs(self) -> "AsyncIOMotorCollection":
+        return self.database.get_collection("job_inputs")
+
+    @property
+    def results(self) -> "AsyncIOMotorCollection":
+        return self.database.get_collection("job_results")
+
+    async def create_indexes(self) -> None:
+        await self.collection.create_index(
+            [("status", pymongo.ASCENDING), ("created_at", pymongo.ASCENDING)],
+            name="status_created_at",
+        )
+        for collection in (self.collection, self.inputs, self.results):
+            await collection.create_index(
+                [("expires_at", pymongo.ASCENDING)],
+                expireAfterSeconds=0,
+                name="expires_at_ttl",
+            )
+        await self.inputs.create_index(
+            [("job_id", pymongo.ASCENDING), ("index", pymongo.ASCENDING)],
+            unique=True,
+            name="job_index",
+        )
+        await self.results.create_index(
+            [("job_id", pymongo.ASCENDING), ("chunk", pymongo.ASCENDING)],
+            unique=True,
+            name="job_chunk",
+        )
+
+    async def _submit(self, job: JobModel) -> JobOut:
+        await mongo_guard.call(
+            "create", lambda: self.collection.insert_one(job.model_dump()))
+
+        return JobOut(**job.model_dump())
+
+    async def submit_import(self, body: List[ProductIn]) -> JobOut:
+        """
+        Agenda a importação de produtos.
+
+        Os ids dos produtos são definidos já no agendamento e os produtos
+        são gravados em lotes de `JOBS_CHUNK_SIZE` em `job_inputs`, de modo
+        que repetir um lote não duplica produtos. Os lotes são gravados antes
+        do processamento, que não pode ser obtido sem eles, e expiram como
+        os processamentos concluídos: se o agendamento falhar entre as duas
+        escritas, os lotes sem processamento são removidos pelo índice TTL.
+        """
+        job = JobModel(kind="import", total=len(body))
+        size = settings.JOBS_CHUNK_SIZE
+        expires_at = retention()
+        chunks = [
+            {
+                "job_id": job.id,
+                "index": index,
+                "expires_at": expires_at,
+                "documents": [
+                    ProductModel(**item.model_dump()).model_dump()
+                    for item in body[start:start + size]
+                ],
+            }
+            for index, start in enumerate(range(0, len(body), size))
+        ]
+        if chunks:
+            await mongo_guard.call(
+                "bulk", lambda: self.inputs.insert_many(chunks))
+
+        return await self._submit(job)
+
+    async def submit_reprice(self, body: RepriceIn) -> JobOut:
+        return await self._submit(
+            JobModel(
+                kind="reprice",
+                params={
+                    "percent": str(body.percent),
+                    "min_price": body.min_price and str(body.min_price),
+                    "max_price": body.max_price and str(body.max_price),
+                },
+            )
+        )
+
+    async def submit_export(self, body: ExportIn) -> JobOut:
+        return await self._submit(
+            JobModel(
+                kind="export",
+                params={
+                    "min_price": body.min_price and str(body.min_price),
+                    "max_price": body.max_price and str(body.max_price),
+                },
+            )
+        )
+
+    async def get(self, id: UUID) -> JobOut:
+        result = await mongo_guard.call(
+            "get", lambda: self.collection.find_one({"_id": id}), retry=True)
+
+        if not result:
+            raise NotFoundException(message=f"Job not found with filter: {id}")
+
+        return JobOut(**result)
+
+    async def get_results(self, id: UUID, chunk: int) -> List[ProductOut]:
+        """
+        Retorna os produtos de um lote de uma exportação.
+
+        Raises:
+            NotFoundException: Se o processamento não existir.
+        """
+        await self.get(id=id)
+        result = await mongo_guard.call(
+            "get",
+            lambda: self.results.find_one({"job_id": id, "chunk": chunk}),
+            retry=True,
+        )
+
+        if not result:
+            return []
+
+        return [ProductOut(**item) for item in result["documents"]]
+
+    async def claim(self, owner: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtém a concessão do processamento pendente mais antigo.
+
+        Processamentos em execução cuja concessão expirou, porque o
+        trabalhador parou, também podem ser obtidos e continuam do último
+        lote confirmado. Processamentos que falharam só são obtidos de novo
+        após `retry_at`.
+
+        Returns:
+            Dict[str, Any]: O processamento obtido, ou `None` se não houver.
+        """
+        now = datetime.now()
+
+        return await mongo_guard.call(
+            "update",
+            lambda: self.collection.find_one_and_update(
+                {
+                    "status": {"$in": ["pending", "running"]},
+                    "$or": [
+                        {"lease_expires_at": None},
+                        {"lease_expires_at": {"$lt": now}},
+                    ],
+                    "retry_at": {"$not": {"$gt": now}},
+                },
+                {
+                    "$set": {
+                        "status": "running",
+                        "lease_owner": owner,
+                        "lease_expires_at": now + timedelta(
+                            seconds=settings.JOBS_LEASE_SECONDS),
+                        "updated_at": now,
+                    }
+                },
+                sort=[("created_at", pymongo.ASCENDING)],
+                return_document=pymongo.ReturnDocument.AFTER,
+            ),
+        )
+
+    @traced
+    async def step(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Executa o próximo lote de um processamento.
+
+        Cada lote pode ser repetido com segurança: importações usam ids
+        definidos no agendamento, reajustes são condicionados ao preço lido e
+        à marca do processamento, e exportações substituem o resultado do
+        mesmo lote.
+
+        Returns:
+            Dict[str, Any]: O novo `cursor` e as quantidades de produtos
+            processados e ignorados, ou `None` se não há mais lotes.
+        """
+        params = job["params"]
+        size = settings.JOBS_CHUNK_SIZE
+
+        if job["kind"] == "import":
+            chunk = await mongo_guard.call(
+                "bulk",
+                lambda: self.inputs.find_one(
+                    {"job_id": job["_id"], "index": job["chunk"]}),
+                retry=True,
+            )
+            if chunk is None:
+                return None
+
+            documents = chunk["documents"]
+            inserted = await product_usecase.import_many(documents)
+
+            return {
+                "cursor": job["chunk"],
+                "processed": len(documents),
+                "skipped": len(documents) - inserted,
+            }
+
+        documents = await product_usecase.scan(
+            after=job["cursor"],
+            limit=size,
+            min_price=optional_decimal(params.get("min_price")),
+            max_price=optional_decimal(params.get("max_price")),
+            operation="get" if job["kind"] == "reprice" else "export",
+        )
+        if not documents:
+            return None
+
+        if job["kind"] == "reprice":
+            modified = await product_usecase.reprice(
+                documents, Decimal(params["percent"]), tag=str(job["_id"]))
+        else:
+            await mongo_guard.call(
+                "bulk",
+                lambda: self.results.replace_one(
+                    {"job_id": job["_id"], "chunk": job["chunk"]},
+                    {
+                        "job_id": job["_id"],
+                        "chunk": job["chunk"],
+                        "documents": documents,
+                        "expires_at": retention(),
+                    },
+                    upsert=True,
+                ),
+            )
+            modified = len(documents)
+
+        return {
+            "cursor": documents[-1]["_id"],
+            "processed": len(documents),
+            "skipped": len(documents) - modified,
+        }
+
+    async def commit(
+        self, job: Dict[str, Any], owner: str, progress: Dict[str, Any]
+    ) -> bool:
+        """
+        Confirma um lote e renova a concessão.
+
+        A atualização só é aplicada se o trabalhador ainda for o dono da
+        concessão e o lote ainda não tiver sido confirmado.
+
+        Returns:
+            bool: `False` se a concessão foi perdida para outro trabalhador.
+        """
+        now = datetime.now()
+        result = await mongo_guard.call(
+            "update",
+            lambda: self.collection.update_one(
+                {
+                    "_id": job["_id"],
+                    "lease_owner": owner,
+                    "chunk": job["chunk"],
+                },
+                {
+                    "$set": {
+                        "cursor": progress["cursor"],
+                        "lease_expires_at": now + timedelta(
+                            seconds=settings.JOBS_LEASE_SECONDS),
+                        "updated_at": now,
+                    },
+                    "$inc": {
+                        "chunk": 1,
+                        "processed": progress["processed"],
+                        "skipped": progress["skipped"],
+                    },
+                },
+            ),
+        )
+        if not result.matched_count:
+            return False
+
+        job["chunk"] += 1
+        job["cursor"] = progress["cursor"]
+
+        return True
+
+    async def finish(
+        self,
+        job: Dict[str, Any],
+        owner: str,
+        status: str,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        Conclui um processamento, que é guardado com os seus resultados por
+        `JOBS_RETENTION_DAYS` dias.
+        """
+        now = datetime.now()
+        expires_at = retention()
+        await mongo_guard.call(
+            "update",
+            lambda: self.collection.update_one(
+                {"_id": job["_id"], "lease_owner": owner},
+                {
+                    "$set": {
+                        "status": status,
+                        "error": error,
+                        "lease_owner": None,
+                        "lease_expires_at": None,
+                        "retry_at": None,
+                        "finished_at": now,
+                        "expires_at": expires_at,
+                        "updated_at": now,
+                    }
+                },
+            ),
+        )
+        if job["kind"] == "export":
+            await mongo_guard.call(
+                "bulk",
+                lambda: self.results.update_many(
+                    {"job_id": job["_id"]},
+                    {"$set": {"expires_at": expires_at}},
+                ),
+            )
+
+    async def release(
+        self, job: Dict[str, Any], owner: str, attempts: int = 0
+    ) -> None:
+        """
+        Devolve a concessão para que o processamento seja continuado por
+        qualquer trabalhador.
+
+        Com `attempts`, após um erro, o processamento só pode ser obtido de
+        novo após `JOBS_RETRY_BACKOFF_SECONDS`, dobrados a cada tentativa.
+        """
+        now = datetime.now()
+        retry_at = None
+        if attempts:
+            retry_at = now + timedelta(
+                seconds=settings.JOBS_RETRY_BACKOFF_SECONDS
+                * 2 ** job["attempts"]
+            )
+        await mongo_guard.call(
+            "update",
+            lambda: self.collection.update_one(
+                {"_id": job["_id"], "lease_owner": owner},
+                {
+                    "$set": {
+                        "lease_owner": None,
+                        "lease_expires_at": None,
+                        "retry_at": retry_at,
+                        "updated_at": now,
+                    },
+                    "$inc": {"attempts": attempts},
+                },
+            ),
+        )
+
+    async def run(
+        self,
+        job: Dict[str, Any],
+        owner: str,
+        pause: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        """
+        Executa um processamento lote a lote até o fim.
+
+        Antes de cada lote aguarda `pause`, que permite ceder espaço ao
+        tráfego interativo. Um erro devolve a concessão para uma nova
+        tentativa, após um intervalo crescente (ver `release`); após
+        `JOBS_MAX_ATTEMPTS` tentativas o processamento é marcado como falho.
+
+        Args:
+            job (Dict[str, Any]): Processamento obtido com `claim`.
+            owner (str): Identificador do trabalhador dono da concessão.
+            pause (Callable): Corrotina aguardada antes de cada lote.
+        """
+        try:
+            while True:
+                if pause is not None:
+                    await pause()
+
+                progress = await self.step(job)
+                if progress is None:
+                    await self.finish(job, owner, "succeeded")
+                    await mongo_guard.call(
+                        "bulk",
+                        lambda: self.inputs.delete_many({"job_id": job["_id"]}),
+                    )
+                    return
+
+                if not await self.commit(job, owner, progress):
+                    logger.warning("Lost lease on job %s", job["_id"])
+                    return
+        except asyncio.CancelledError:
+            await self.release(job, owner)
+            raise
+        except Exception as exc:
+            logger.exception("Job %s failed", job["_id"])
+            if job["attempts"] + 1 >= settings.JOBS_MAX_ATTEMPTS:
+                await self.finish(job, owner, "failed", error=repr(exc))
+            else:
+                await self.release(job, owner, attempts=1)
+
+
+job_usecase = JobUsecase()
+
+
+class JobWorkerPool:
+    """
+    Trabalhadores que executam os processamentos em segundo plano.
+
+    Cada processo da aplicação executa até `concurrency` processamentos ao
+    mesmo tempo, um lote por vez. Enquanto houver requisições aguardando na
+    fila do controle de admissão, os trabalhadores esperam antes do próximo
+    lote, para não disputar o MongoDB com o tráfego interativo.
+    """
+    def __init__(self, concurrency: int, poll_interval: float) -> None:
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.owner = ""
+        self.running = 0
+        self.paused = 0
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """
+        Inicia os trabalhadores. O identificador do dono das concessões é
+        gerado aqui, para que cada processo tenha o seu.
+        """
+        if not self._tasks:
+            self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            self._tasks = [
+                asyncio.create_task(self._work(), name=f"job-worker-{index}")
+                for index in range(self.concurrency)
+            ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def pause(self) -> None:
+        """
+        Aguarda, por no máximo metade da concessão, enquanto houver
+        requisições na fila do controle de admissão.
+        """
+        if not settings.ADMISSION_ENABLED:
+            return
+
+        deadline = asyncio.get_running_loop().time() + (
+            settings.JOBS_LEASE_SECONDS / 2)
+        while any(
+            controller.snapshot()["queued"]
+            for controller in admission_controllers.values()
+        ):
+            if asyncio.get_running_loop().time() >= deadline:
+                return
+            self.paused += 1
+            await asyncio.sleep(settings.JOBS_BACKOFF_SECONDS)
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                job = await job_usecase.claim(self.owner)
+            except Exception:
+                logger.exception("Failed to claim a job")
+                job = None
+
+            if job is None:
+                await asyncio.sleep(
+                    self.poll_interval * random.uniform(0.5, 1.5))
+                continue
+
+            self.running += 1
+            try:
+                await job_usecase.run(job, self.owner, self.pause)
+            finally:
+                self.running -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "running": self.running,
+            "paused": self.paused,
+        }
+
+
+job_pool = JobWorkerPool(
+    concurrency=settings.JOBS_CONCURRENCY,
+    poll_interval=settings.JOBS_POLL_INTERVAL_SECONDS,
+)
+
+metrics.register("jobs", job_pool.snapshot)
@@ -1,62 +1,1001 @@
-from typing import List
+import asyncio
+import base64
+import binascii
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
 import pymongo
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pydantic import TypeAdapter
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
-from store.core.exceptions import NotFoundException
-from store.db.mongo import db_client
+from store.core.cache import ResponseCache, TTLCache
+from store.core.config import settings
+from store.core.events import ProductEvent, events
+from store.core.exceptions import (  # E501
+    ConflictException,
+    GoneException,
+    NotFoundException,
+    UnavailableException,
+    UnprocessableException,
+)
+from store.core.metrics import metrics
+from store.core.tracing import traced
+from store.db.mongo import db_client, read_preference, write_concern
+from store.db.resilience import hedge_read_preference, mongo_guard
 from store.models.product import ProductModel
+from store.schemas.base import decode_decimal, encode_decimal
 from store.schemas.product import (  # E501
+    ProductChange,
+    ProductChangesOut,
     ProductIn,
     ProductOut,
+    ProductStockOut,
     ProductUpdate,
     ProductUpdateOut,
 )
 
+if TYPE_CHECKING:
+    from motor.motor_asyncio import (  # E501
+        AsyncIOMotorClient,
+        AsyncIOMotorCollection,
+        AsyncIOMotorDatabase,
+    )
+
+
+DUPLICATE_KEY_ERROR = 11000
+STOCK_ATTEMPTS = 5
+
+# Ajustes de estoque por produto desde a última consolidação dos contadores,
+# e os produtos com contador distribuído com a sua quantidade de partes;
+# ambos mantidos por `StockCounterManager.refresh`.
+stock_writes: Counter = Counter()
+sharded_stock: Dict[UUID, int] = {}
+
+product_cache: TTLCache[ProductOut] = TTLCache(
+    name="products",
+    max_size=settings.PRODUCT_CACHE_SIZE,
+    ttl=settings.PRODUCT_CACHE_TTL_SECONDS,
+)
+metrics.register("cache.products", product_cache.snapshot)
+
+list_cache = ResponseCache(
+    name="lists",
+    max_bytes=settings.LIST_CACHE_MAX_BYTES,
+    ttl=settings.LIST_CACHE_TTL_SECONDS,
+)
+metrics.register("cache.lists", list_cache.snapshot)
+
+products_adapter = TypeAdapter(List[ProductOut])
+
+
+def invalidate_lists(event: ProductEvent) -> None:
+    """
+    Invalida as listagens em cache a cada escrita de produto.
+    """
+    list_cache.bump()
+
+
+events.subscribe(invalidate_lists)
+
+
+async def insert_ignoring_duplicates(
+    collection: "AsyncIOMotorCollection", documents: List[Dict[str, Any]]
+) -> int:
+    """
+    Insere os documentos sem ordem, ignorando os que já existem.
+
+    Permite repetir com segurança um lote interrompido: os documentos já
+    gravados na tentativa anterior são rejeitados por chave duplicada e os
+    demais são inseridos.
+
+    Returns:
+        int: Quantidade de documentos inseridos nesta chamada.
+    """
+    try:
+        result = await collection.insert_many(documents, ordered=False)
+    except BulkWriteError as exc:
+        errors = exc.details.get("writeErrors", [])
+        if any(e["code"] != DUPLICATE_KEY_ERROR for e in errors):
+            raise
+        return exc.details.get("nInserted", len(documents) - len(errors))
+
+    return len(result.inserted_ids)
+
+
+def encode_change_token(
+    updated_at: datetime, id: UUID, checked_at: datetime
+) -> str:
+    """
+    Codifica a posição de uma alteração, `updated_at` e `_id`, e o momento
+    até o qual a cópia do cliente está completa (`checked_at`) como token
+    de sincronização opaco.
+    """
+    position = f"{updated_at.isoformat()}|{id}|{checked_at.isoformat()}"
+
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+
+def decode_change_token(token: str) -> Tuple[datetime, UUID, datetime]:
+    """
+    Decodifica um token de `encode_change_token`. Tokens sem `checked_at`,
+    emitidos por versões anteriores, usam a própria posição.
+
+    Raises:
+        UnprocessableException: Se o token for inválido.
+    """
+    try:
+        position = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        updated_at, id, *checked_at = position.decode().split("|")
+        if len(checked_at) > 1:
+            raise ValueError("Too many fields")
+        return (
+            datetime.fromisoformat(updated_at),
+            UUID(id),
+            datetime.fromisoformat((checked_at or [updated_at])[0]),
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise UnprocessableException(
+            message="Invalid change token") from exc
+
+
+def price_criteria(
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+) -> Dict[str, Any]:
+    """
+    Monta o filtro dos produtos não excluídos dentro da faixa de preço.
+    """
+    criteria: Dict[str, Any] = {"deleted_at": None}
+    price: Dict[str, Any] = {}
+    if min_price is not None:
+        price["$gte"] = encode_decimal(min_price)
+    if max_price is not None:
+        price["$lte"] = encode_decimal(max_price)
+    if price:
+        criteria["price"] = price
+
+    return criteria
+
+
+def check_fingerprint(
+    documents: List[Dict[str, Any]], fingerprint: Optional[str]
+) -> None:
+    """
+    Confere se os produtos encontrados em uma criação idempotente foram
+    gravados pela mesma requisição.
+
+    Raises:
+        UnprocessableException: Se algum produto foi criado por uma
+        requisição com outro corpo.
+    """
+    for document in documents:
+        if document.get("idempotency_fingerprint") != fingerprint:
+            raise UnprocessableException(
+                message=f"Product {document['_id']} was created by a "
+                "different request")
+
 
 class ProductUsecase:
-    def __init__(self) -> None:
-        self.client: AsyncIOMotorClient = db_client.get()
-        self.database: AsyncIOMotorDatabase = self.client.get_database()
-        self.collection = self.database.get_collection("products")
+    @property
+    def client(self) -> "AsyncIOMotorClient":
+        return db_client.get()
+
+    @property
+    def database(self) -> "AsyncIOMotorDatabase":
+        return self.client.get_database()
+
+    @property
+    def collection(self) -> "AsyncIOMotorCollection":
+        return self.database.get_collection("products")
+
+    def reader(self, operation: str) -> "AsyncIOMotorCollection":
+        """
+        Retorna a coleção de produtos com a preferência de leitura da
+        operação informada (ver `read_preference`).
+        """
+        return self.collection.with_options(
+            read_preference=read_preference(operation))
+
+    def hedge_reader(self) -> "AsyncIOMotorCollection":
+        """
+        Retorna a coleção de produtos com a preferência de leitura das
+        leituras de proteção (ver `MongoGuard`).
+        """
+        return self.collection.with_options(
+            read_preference=hedge_read_preference())
+
+    def writer(self, operation: str) -> "AsyncIOMotorCollection":
+        """
+        Retorna a coleção de produtos com a garantia de escrita da operação
+        informada (ver `write_concern`).
+        """
+        return self.collection.with_options(
+            write_concern=write_concern(operation))
 
-    async def create(self, body: ProductIn) -> ProductOut:
-        product_model = ProductModel(**body.model_dump())
-        await self.collection.insert_one(product_model.model_dump())
+    @property
+    def archive_collection(self) -> "AsyncIOMotorCollection":
+        return self.database.get_collection("products_archive")
 
-        return ProductOut(**product_model.model_dump())
+    @property
+    def counters(self) -> "AsyncIOMotorCollection":
+        return self.database.get_collection("product_counters")
 
+    async def create_indexes(self) -> None:
+        await self.collection.create_index(
+            [("deleted_at", pymongo.ASCENDING)],
+            partialFilterExpression={"deleted_at": {"$type": "date"}},
+            name="deleted_at_partial",
+        )
+        await self.collection.create_index(
+            [("price", pymongo.ASCENDING)], name="price")
+        await self.collection.create_index(
+            [("updated_at", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            name="updated_at_id",
+        )
+        await self.collection.create_index(
+            [("counter_slots", pymongo.ASCENDING)],
+            partialFilterExpression={"counter_slots": {"$gt": 0}},
+            name="counter_slots_partial",
+        )
+        await self.collection.create_index(
+            [("counter_demoting", pymongo.ASCENDING)],
+            partialFilterExpression={"counter_demoting": {"$gt": 0}},
+            name="counter_demoting_partial",
+        )
+        await self.counters.create_index(
+            [("product_id", pymongo.ASCENDING), ("slot", pymongo.ASCENDING)],
+            unique=True,
+            name="product_slot",
+        )
+
+    @traced
+    async def create(
+        self,
+        body: ProductIn,
+        id: Optional[UUID] = None,
+        fingerprint: Optional[str] = None,
+    ) -> ProductOut:
+        """
+        Cria um produto.
+
+        Com `id` informado a criação é idempotente: se o produto já existir,
+        gravado por uma tentativa anterior, ele é retornado sem nova escrita.
+        O `fingerprint` da requisição é gravado no produto, de modo que uma
+        chave reutilizada com outro corpo, depois que o registro da chave
+        expirou, é recusada em vez de retornar o produto da requisição
+        original.
+
+        Args:
+            body (ProductIn): Dados do produto.
+            id (UUID): ID do produto; por padrão um novo UUID.
+            fingerprint (str): Hash do corpo da requisição idempotente.
+
+        Returns:
+            ProductOut: O produto criado ou o já existente com o `id`.
+
+        Raises:
+            ConflictException: Se o produto com o `id` já foi criado e depois
+            excluído ou arquivado.
+            UnprocessableException: Se o produto com o `id` foi criado por
+            uma requisição com outro `fingerprint`.
+        """
+        model = ProductModel(**body.model_dump())
+        if id is not None:
+            model.id = id
+        document = model.model_dump()
+        if fingerprint is not None:
+            document["idempotency_fingerprint"] = fingerprint
+
+        try:
+            await mongo_guard.call(
+                "create", lambda: self.writer("create").insert_one(document))
+        except DuplicateKeyError:
+            if id is None:
+                raise
+            existing = await mongo_guard.call(
+                "get",
+                lambda: self.collection.find_one(
+                    {"_id": id, "deleted_at": None}),
+                retry=True,
+            )
+            if existing is None:
+                raise ConflictException(
+                    message=f"Product {id} was created and since deleted")
+            check_fingerprint([existing], fingerprint)
+            return ProductOut(**existing)
+
+        events.publish(ProductEvent("upsert", document["_id"], document))
+
+        return ProductOut(**document)
+
+    @traced
+    async def create_many(
+        self,
+        body: List[ProductIn],
+        ids: Optional[List[UUID]] = None,
+        fingerprint: Optional[str] = None,
+    ) -> List[ProductOut]:
+        """
+        Cria vários produtos em uma única escrita.
+
+        Com `ids` informados, um por item, a criação é idempotente: os
+        produtos já gravados por uma tentativa anterior são mantidos e
+        retornados como estão no banco. O `fingerprint` é gravado e
+        comparado como em `create`.
+
+        Args:
+            body (List[ProductIn]): Dados dos produtos.
+            ids (List[UUID]): IDs dos produtos, na ordem de `body`.
+            fingerprint (str): Hash do corpo da requisição idempotente.
+
+        Returns:
+            List[ProductOut]: Os produtos, na ordem de `body`.
+
+        Raises:
+            ConflictException: Se algum dos produtos com `ids` já foi criado
+            e depois excluído ou arquivado.
+            UnprocessableException: Se algum dos produtos com `ids` foi
+            criado por uma requisição com outro `fingerprint`.
+        """
+        models = [ProductModel(**item.model_dump()) for item in body]
+        if ids is not None:
+            for model, id in zip(models, ids, strict=True):
+                model.id = id
+        documents = [model.model_dump() for model in models]
+        if fingerprint is not None:
+            for document in documents:
+                document["idempotency_fingerprint"] = fingerprint
+
+        if ids is None:
+            await mongo_guard.call(
+                "bulk",
+                lambda: self.writer("bulk").insert_many(
+                    documents, ordered=False),
+            )
+        else:
+            inserted = await mongo_guard.call(
+                "bulk",
+                lambda: insert_ignoring_duplicates(
+                    self.writer("bulk"), documents),
+            )
+            if inserted < len(documents):
+                stored = {
+                    item["_id"]: item
+                    for item in await mongo_guard.call(
+                        "get",
+                        lambda: self.collection.find(
+                            {"_id": {"$in": ids}, "deleted_at": None}
+                        ).to_list(None),
+                        retry=True,
+                    )
+                }
+                deleted = [id for id in ids if id not in stored]
+                if deleted:
+                    raise ConflictException(
+                        message=f"Products {deleted} were created and since "
+                        "deleted")
+                documents = [stored[id] for id in ids]
+                check_fingerprint(documents, fingerprint)
+
+        for document in documents:
+            events.publish(ProductEvent("upsert", document["_id"], document))
+
+        return [ProductOut(**document) for document in documents]
+
+    @traced
     async def get(self, id: UUID) -> ProductOut:
-        result = await self.collection.find_one({"id": id})
+        cached = product_cache.get(id)
+        if cached is not None:
+            return cached
+
+        criteria = {"_id": id, "deleted_at": None}
+        result = await mongo_guard.call(
+            "get",
+            lambda: self.reader("get").find_one(criteria),
+            retry=True,
+            hedge=lambda: self.hedge_reader().find_one(criteria),
+        )
 
         if not result:
             raise NotFoundException(
                 message=f"Product not found with filter: {id}")
 
-        return ProductOut(**result)
+        product = ProductOut(**result)
+        product_cache.set(id, product)
+
+        return product
+
+    @traced
+    async def get_many(self, ids: List[UUID]) -> List[Optional[ProductOut]]:
+        """
+        Busca vários produtos por ID com uma única consulta.
+
+        Os produtos presentes no cache são retornados sem consultar o banco;
+        os demais são buscados com um único `$in` em `_id`.
+
+        Args:
+            ids (List[UUID]): IDs dos produtos, possivelmente repetidos.
+
+        Returns:
+            List[Optional[ProductOut]]: Um item por ID, na ordem recebida,
+            com `None` para os produtos não encontrados.
+        """
+        found: Dict[UUID, ProductOut] = product_cache.get_many(ids)
+        missing = list({id for id in ids if id not in found})
+
+        if missing:
+            items = await mongo_guard.call(
+                "get",
+                lambda: self.reader("get").find(
+                    {"_id": {"$in": missing}, "deleted_at": None}
+                ).to_list(None),
+                retry=True,
+            )
+            for item in items:
+                product = ProductOut(**item)
+                found[item["_id"]] = product
+                product_cache.set(item["_id"], product)
+
+        return [found.get(id) for id in ids]
+
+    @traced
+    async def query(
+        self,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        primary: bool = False,
+    ) -> List[ProductOut]:
+        """
+        Lista os produtos não excluídos dentro da faixa de preço.
+
+        A listagem lê dos secundários (ver `read_preference`), exceto com
+        `primary`, que garante as escritas já confirmadas.
+        """
+        criteria = price_criteria(min_price, max_price)
+        if primary:
+            collection = self.collection.with_options(
+                read_preference=pymongo.ReadPreference.PRIMARY)
+        else:
+            collection = self.reader("query")
+
+        items = await mongo_guard.call(
+            "query",
+            lambda: collection.find(criteria).to_list(None),
+            retry=True,
+        )
+
+        return [ProductOut(**item) for item in items]
 
-    async def query(self) -> List[ProductOut]:
-        return [ProductOut(**item) async for item in self.collection.find()]
+    @traced
+    async def query_json(
+        self,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+    ) -> bytes:
+        """
+        Lista os produtos como em `query`, já serializados em JSON.
 
+        As respostas ficam em `list_cache`, por faixa de preço, e repetir uma
+        listagem sem escritas no meio retorna os mesmos bytes sem consultar o
+        MongoDB nem serializar os produtos de novo. Com o cache habilitado a
+        listagem lê do primário: um secundário atrasado poderia devolver o
+        estado anterior a uma escrita já invalidada, que ficaria no cache
+        até a próxima escrita ou o fim de `LIST_CACHE_TTL_SECONDS`.
+
+        Returns:
+            bytes: A lista de produtos em JSON.
+        """
+        # Decimais de mesmo valor (`10`, `10.00`) são chaves iguais.
+        key = ("query", min_price, max_price)
+        body = list_cache.get(key)
+        if body is not None:
+            return body
+
+        generation = list_cache.generation
+        body = products_adapter.dump_json(
+            await self.query(
+                min_price=min_price,
+                max_price=max_price,
+                primary=list_cache.enabled,
+            )
+        )
+        list_cache.set(key, body, generation)
+
+        return body
+
+    @traced
+    async def scan(
+        self,
+        after: Optional[UUID],
+        limit: int,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        operation: str = "export",
+    ) -> List[Dict[str, Any]]:
+        """
+        Lê uma página de produtos ordenada por `_id`, a partir de `after`.
+
+        Usada pelos processamentos em lote, que guardam o último `_id` lido
+        para continuar de onde pararam.
+
+        Args:
+            after (UUID): Último `_id` da página anterior, ou `None` para a
+            primeira página.
+            limit (int): Tamanho da página.
+            min_price (Decimal): Preço mínimo, inclusivo.
+            max_price (Decimal): Preço máximo, inclusivo.
+            operation (str): Operação usada para a preferência de leitura.
+
+        Returns:
+            List[Dict[str, Any]]: Documentos da página, como gravados no banco.
+        """
+        criteria = price_criteria(min_price, max_price)
+        if after is not None:
+            criteria["_id"] = {"$gt": after}
+
+        return await mongo_guard.call(
+            operation,
+            lambda: self.reader(operation).find(criteria).sort(
+                "_id", pymongo.ASCENDING).limit(limit).to_list(limit),
+            retry=True,
+        )
+
+    @traced
+    async def import_many(self, documents: List[Dict[str, Any]]) -> int:
+        """
+        Insere produtos já serializados, com `_id` definido, ignorando os que
+        já existem, de modo que a importação de um lote pode ser repetida.
+
+        `updated_at` recebe o momento da inserção, e não o do agendamento,
+        para que os produtos apareçam na sincronização (ver `changes`).
+
+        Returns:
+            int: Quantidade de produtos inseridos.
+        """
+        now = datetime.now()
+        documents = [{**document, "updated_at": now} for document in documents]
+        inserted = await mongo_guard.call(
+            "bulk",
+            lambda: insert_ignoring_duplicates(self.writer("bulk"), documents),
+        )
+        for document in documents:
+            events.publish(ProductEvent("upsert", document["_id"], document))
+
+        return inserted
+
+    @traced
+    async def reprice(
+        self, documents: List[Dict[str, Any]], percent: Decimal, tag: str
+    ) -> int:
+        """
+        Reajusta o preço dos produtos informados em `percent` por cento.
+
+        Cada atualização só é aplicada se o preço ainda for o lido e se o
+        produto ainda não tiver sido reajustado com a mesma `tag` (gravada em
+        `reprice_job`), de modo que repetir um lote não reajusta duas vezes.
+
+        Returns:
+            int: Quantidade de produtos reajustados.
+        """
+        if not documents:
+            return 0
+
+        now = datetime.now()
+        factor = 1 + percent / 100
+        exponent = Decimal(1).scaleb(-settings.PRICE_SCALE)
+        requests = [
+            UpdateOne(
+                {
+                    "_id": document["_id"],
+                    "price": document["price"],
+                    "reprice_job": {"$ne": tag},
+                },
+                {
+                    "$set": {
+                        "price": encode_decimal(
+                            (decode_decimal(document["price"]) * factor)
+                            .quantize(exponent)
+                        ),
+                        "reprice_job": tag,
+                        "updated_at": now,
+                    }
+                },
+            )
+            for document in documents
+        ]
+        result = await mongo_guard.call(
+            "bulk",
+            lambda: self.writer("bulk").bulk_write(requests, ordered=False),
+        )
+        for document in documents:
+            product_cache.delete(document["_id"])
+
+        if result.modified_count:
+            items = await mongo_guard.call(
+                "bulk",
+                lambda: self.collection.find({
+                    "_id": {"$in": [document["_id"] for document in documents]},
+                    "reprice_job": tag,
+                }).to_list(None),
+                retry=True,
+            )
+            for item in items:
+                events.publish(ProductEvent("upsert", item["_id"], item))
+
+        return result.modified_count
+
+    async def slot_totals(
+        self, ids: List[UUID], max_slot: Optional[int] = None
+    ) -> Dict[UUID, Dict[str, int]]:
+        """
+        Soma as partes dos contadores de estoque dos produtos informados.
+
+        Sem `max_slot` considera apenas as partes abertas, isto é, as da
+        distribuição atual; com `max_slot` considera as partes de índice menor
+        que ele, abertas ou não.
+
+        Returns:
+            Dict[UUID, Dict[str, int]]: Por produto, a soma dos ajustes
+            (`count`), a quantidade de ajustes (`writes`) e de partes
+            (`slots`).
+        """
+        match: Dict[str, Any] = {"product_id": {"$in": ids}}
+        if max_slot is None:
+            match["closed"] = {"$ne": True}
+        else:
+            match["slot"] = {"$lt": max_slot}
+
+        totals = await mongo_guard.call(
+            "stats",
+            lambda: self.counters.aggregate([
+                {"$match": match},
+                {"$group": {
+                    "_id": "$product_id",
+                    "count": {"$sum": "$count"},
+                    "writes": {"$sum": "$writes"},
+                    "slots": {"$sum": 1},
+                }},
+            ]).to_list(None),
+            retry=True,
+        )
+
+        return {item.pop("_id"): item for item in totals}
+
+    @traced
+    async def adjust_stock(self, id: UUID, delta: int) -> ProductStockOut:
+        """
+        Soma `delta` ao estoque de um produto.
+
+        Produtos comuns recebem um `$inc` em `quantity`. Os produtos com
+        contador distribuído (ver `StockCounterManager`) recebem o `$inc` em
+        uma das partes de `product_counters`, escolhida ao acaso, de modo que
+        os ajustes simultâneos não disputam o mesmo documento; `quantity` é
+        consolidada periodicamente. Uma parte fechada indica que a
+        distribuição mudou, e o ajuste é refeito pelo caminho atual.
+
+        Args:
+            id (UUID): ID do produto.
+            delta (int): Quantidade a somar; negativa para dar baixa.
+
+        Returns:
+            ProductStockOut: A nova quantidade, ou `sharded` verdadeiro se o
+            ajuste foi feito em uma parte do contador.
+
+        Raises:
+            NotFoundException: Se o produto não existir.
+            UnavailableException: Se a distribuição do contador estiver
+            mudando há mais tempo que as tentativas.
+        """
+        if settings.COUNTERS_ENABLED:
+            stock_writes[id] += 1
+
+        for attempt in range(STOCK_ATTEMPTS):
+            slots = sharded_stock.get(id)
+            if slots:
+                try:
+                    await mongo_guard.call(
+                        "stock",
+                        lambda: self.counters.update_one(
+                            {
+                                "product_id": id,
+                                "slot": random.randrange(slots),
+                                "closed": {"$ne": True},
+                            },
+                            {"$inc": {"count": delta, "writes": 1}},
+                            upsert=True,
+                        ),
+                    )
+                except DuplicateKeyError:
+                    sharded_stock.pop(id, None)
+                    await asyncio.sleep(0.01 * attempt)
+                    continue
+
+                return ProductStockOut(id=id, quantity=None, sharded=True)
+
+            result = await mongo_guard.call(
+                "stock",
+                lambda: self.writer("stock").find_one_and_update(
+                    {
+                        "_id": id,
+                        "deleted_at": None,
+                        "counter_slots": {"$in": [None, 0]},
+                    },
+                    {
+                        "$inc": {"quantity": delta},
+                        "$set": {"updated_at": datetime.now()},
+                    },
+                    return_document=pymongo.ReturnDocument.AFTER,
+                ),
+            )
+            if result:
+                product_cache.delete(id)
+                events.publish(ProductEvent("upsert", id, result))
+                return ProductStockOut(
+                    id=id, quantity=result["quantity"], sharded=False)
+
+            product = await mongo_guard.call(
+                "get",
+                lambda: self.collection.find_one(
+                    {"_id": id, "deleted_at": None}, {"counter_slots": 1}),
+                retry=True,
+            )
+            if product is None:
+                raise NotFoundException(
+                    message=f"Product not found with filter: {id}")
+            if product.get("counter_slots"):
+                sharded_stock[id] = product["counter_slots"]
+
+        raise UnavailableException(
+            message=f"Stock counter of product {id} is being reconfigured")
+
+    async def _rebase_stock(
+        self, id: UUID, changes: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Atualiza um produto com contador distribuído, ajustando a base do
+        contador para que a soma com as partes resulte na nova quantidade.
+        Os ajustes feitos nas partes após a leitura da soma são preservados.
+        """
+        product = await mongo_guard.call(
+            "update",
+            lambda: self.collection.find_one({"_id": id, "deleted_at": None}),
+            retry=True,
+        )
+        if product is None:
+            return None
+
+        if not product.get("counter_slots") or "counter_base" not in product:
+            raise ConflictException(
+                message=f"Stock counter of product {id} is being reconfigured")
+
+        totals = await self.slot_totals([id])
+        base = changes["quantity"] - totals.get(id, {}).get("count", 0)
+        result = await mongo_guard.call(
+            "update",
+            lambda: self.writer("update").find_one_and_update(
+                filter={
+                    "_id": id,
+                    "counter_slots": product["counter_slots"],
+                    "counter_base": product["counter_base"],
+                },
+                update={"$set": {**changes, "counter_base": base}},
+                return_document=pymongo.ReturnDocument.AFTER,
+            ),
+        )
+        if result is None:
+            raise ConflictException(
+                message=f"Stock counter of product {id} is being reconfigured")
+
+        return result
+
+    @traced
     async def update(self, id: UUID, body: ProductUpdate) -> ProductUpdateOut:
-        result = await self.collection.find_one_and_update(
-            filter={"id": id},
-            update={"$set": body.model_dump(exclude_none=True)},
-            return_document=pymongo.ReturnDocument.AFTER,
+        """
+        Atualiza um produto.
+
+        Uma nova `quantity` em produto com contador distribuído ajusta a base
+        do contador (ver `adjust_stock`).
+
+        Raises:
+            NotFoundException: Se o produto não existir.
+            ConflictException: Se a distribuição do contador de estoque do
+            produto estiver mudando.
+        """
+        changes = {
+            **body.model_dump(exclude_none=True), "updated_at": datetime.now()}
+        criteria: Dict[str, Any] = {"_id": id, "deleted_at": None}
+        if "quantity" in changes:
+            criteria["counter_slots"] = {"$in": [None, 0]}
+            criteria["counter_demoting"] = None
+
+        result = await mongo_guard.call(
+            "update",
+            lambda: self.writer("update").find_one_and_update(
+                filter=criteria,
+                update={"$set": changes},
+                return_document=pymongo.ReturnDocument.AFTER,
+            ),
         )
+        if not result and "quantity" in changes:
+            result = await self._rebase_stock(id, changes)
+        product_cache.delete(id)
+
+        if not result:
+            raise NotFoundException(
+                message=f"Product not found with filter: {id}")
+
+        events.publish(ProductEvent("upsert", id, result))
 
         return ProductUpdateOut(**result)
 
+    @traced
+    async def changes(
+        self, since: Optional[str] = None, limit: int = 100
+    ) -> ProductChangesOut:
+        """
+        Lista os produtos alterados ou excluídos após a posição `since`, em
+        ordem de `updated_at` e `_id`.
+
+        Só são retornadas alterações com mais de `CHANGES_SETTLE_SECONDS`,
+        de modo que uma escrita ainda em andamento, com `updated_at` anterior
+        ao da última alteração lida, não fique para trás do token. Os
+        produtos excluídos permanecem na coleção até o arquivamento, após
+        `ARCHIVE_AFTER_DAYS` dias. Por isso o token guarda também até quando
+        a cópia do cliente estava completa: o limite da leitura, quando não
+        há mais alterações, ou o do token anterior, no meio da paginação. Um
+        token completo há mais de `ARCHIVE_AFTER_DAYS` dias pode ter perdido
+        exclusões e é recusado; a posição das alterações, por mais antiga que
+        seja, não conta.
+
+        Args:
+            since (str): Token `next` da chamada anterior; sem ele a
+            sincronização começa do início.
+            limit (int): Quantidade máxima de alterações.
+
+        Returns:
+            ProductChangesOut: As alterações e o token para continuar.
+
+        Raises:
+            UnprocessableException: Se o token for inválido.
+            GoneException: Se o token for mais antigo que a retenção das
+            exclusões.
+        """
+        watermark = datetime.now() - timedelta(
+            seconds=settings.CHANGES_SETTLE_SECONDS)
+        criteria: Dict[str, Any] = {"updated_at": {"$lte": watermark}}
+        checked_at = watermark
+        position: Optional[Tuple[datetime, UUID]] = None
+        if since is not None:
+            updated_at, id, checked_at = decode_change_token(since)
+            if settings.ARCHIVE_ENABLED and checked_at < datetime.now() - (
+                timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+            ):
+                raise GoneException(
+                    message="Change token expired, resync the full catalog")
+            position = (updated_at, id)
+            criteria["$or"] = [
+                {"updated_at": {"$gt": updated_at}},
+                {"updated_at": updated_at, "_id": {"$gt": id}},
+            ]
+
+        items = await mongo_guard.call(
+            "changes",
+            lambda: self.collection.find(criteria).sort(
+                [("updated_at", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)]
+            ).limit(limit + 1).to_list(limit + 1),
+            retry=True,
+        )
+        has_more = len(items) > limit
+        items = items[:limit]
+        if items:
+            position = (items[-1]["updated_at"], items[-1]["_id"])
+        if not has_more:
+            # Todas as alterações até `watermark` foram entregues.
+            checked_at = watermark
+
+        return ProductChangesOut(
+            changes=[
+                ProductChange(
+                    id=item["_id"],
+                    updated_at=item["updated_at"],
+                    deleted=item.get("deleted_at") is not None,
+                    product=ProductOut(**item)
+                    if item.get("deleted_at") is None else None,
+                )
+                for item in items
+            ],
+            next=encode_change_token(*position, checked_at)
+            if position else None,
+            has_more=has_more,
+        )
+
+    @traced
     async def delete(self, id: UUID) -> bool:
-        product = await self.collection.find_one({"id": id})
-        if not product:
+        now = datetime.now()
+        result = await mongo_guard.call(
+            "delete",
+            lambda: self.writer("delete").update_one(
+                {"_id": id, "deleted_at": None},
+                {"$set": {"deleted_at": now, "updated_at": now}},
+            ),
+        )
+        product_cache.delete(id)
+
+        if not result.matched_count:
             raise NotFoundException(
                 message=f"Product not found with filter: {id}")
 
-        result = await self.collection.delete_one({"id": id})
+        events.publish(ProductEvent("delete", id))
+
+        return True
+
+    @traced
+    async def archive(
+        self,
+        older_than: Optional[timedelta] = None,
+        batch_size: Optional[int] = None,
+    ) -> int:
+        """
+        Move para `products_archive` os produtos excluídos há muito tempo.
+
+        Os produtos excluídos logicamente há mais de `older_than` são copiados
+        em lotes para a coleção de arquivo e removidos da coleção principal,
+        mantendo `products` e os seus índices pequenos. Uma cópia repetida,
+        deixada por uma execução interrompida, é ignorada.
+
+        Args:
+            older_than (timedelta): Idade mínima da exclusão. Padrão:
+            `ARCHIVE_AFTER_DAYS`.
+            batch_size (int): Quantidade de documentos por lote. Padrão:
+            `ARCHIVE_BATCH_SIZE`.
+
+        Returns:
+            int: Quantidade de produtos arquivados.
+        """
+        if older_than is None:
+            older_than = timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+        batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+        expired = {
+            "deleted_at": {"$type": "date", "$lt": datetime.now() - older_than}
+        }
+        archived = 0
+
+        while True:
+            batch = await mongo_guard.call(
+                "archive",
+                lambda: self.collection.find(expired).limit(
+                    batch_size).to_list(batch_size),
+                retry=True,
+            )
+            if not batch:
+                break
+
+            await mongo_guard.call(
+                "archive",
+                lambda: insert_ignoring_duplicates(
+                    self.archive_collection.with_options(
+                        write_concern=write_concern("archive")),
+                    batch,
+                ),
+            )
+
+            await mongo_guard.call(
+                "archive",
+                lambda: self.writer("archive").delete_many(
+                    {"_id": {"$in": [item["_id"] for item in batch]}, **expired}
+                ),
+            )
+            archived += len(batch)
+
+            if len(batch) < batch_size:
+                break
 
-        return True if result.deleted_count > 0 else False
+        return archived
 
 
 product_usecase = ProductUsecase()
@@ -0,0 +1,286 @@
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from store.core.config import settings
+from store.core.events import ProductEvent, events
+from store.core.exceptions import OverloadedException
+from store.core.metrics import metrics
+from store.db.resilience import mongo_guard
+from store.schemas.base import decode_decimal
+from store.schemas.product import ProductStreamEvent
+from store.usecases.product import product_usecase
+
+HEARTBEAT = b": heartbeat\n\n"
+DROPPED = b"event: dropped\ndata: {}\n\n"
+
+# Estado enviado de cada produto: quantidade, preço, status e exclusão.
+State = Tuple[Optional[int], Optional[Decimal], Optional[bool], bool]
+
+
+def product_state(document: Optional[Dict[str, Any]]) -> State:
+    """
+    Extrai do documento do produto os campos enviados pelo fluxo.
+    """
+    if document is None or document.get("deleted_at") is not None:
+        return (None, None, None, True)
+
+    price = document["price"]
+    if not isinstance(price, Decimal):
+        price = decode_decimal(price)
+
+    return (document["quantity"], price, document["status"], False)
+
+
+def truncate(value: datetime) -> datetime:
+    """
+    Trunca o horário em milissegundos, a precisão guardada pelo MongoDB, para
+    comparar documentos lidos do banco com os publicados pelas escritas.
+    """
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+
+def encode(id: UUID, state: State) -> bytes:
+    quantity, price, status, deleted = state
+    data = ProductStreamEvent(
+        id=id, quantity=quantity, price=price, status=status, deleted=deleted
+    ).model_dump_json()
+
+    return f"event: product\ndata: {data}\n\n".encode()
+
+
+class Subscription:
+    """
+    Conexão assinante do fluxo, com a sua fila limitada de mensagens.
+    """
+    __slots__ = ("ids", "queue", "dropped")
+
+    def __init__(self, ids: List[UUID]) -> None:
+        self.ids = frozenset(ids)
+        self.queue: asyncio.Queue = asyncio.Queue(
+            maxsize=settings.STREAM_QUEUE_SIZE)
+        self.dropped = False
+
+
+class ProductStream:
+    """
+    Distribui as alterações de quantidade, preço e status dos produtos às
+    conexões que os acompanham.
+
+    Cada processo mantém um único fluxo de alterações, alimentado pelas
+    escritas do próprio processo (`events`) e por uma consulta periódica
+    por `updated_at`, a cada `STREAM_POLL_SECONDS`, que traz as escritas dos
+    outros processos. Cada alteração é serializada uma vez e colocada na fila
+    de cada assinante do produto; os assinantes são indexados por produto, de
+    modo que o custo de uma escrita não depende da quantidade de conexões.
+    Um assinante com a fila cheia é desconectado, em vez de atrasar os demais
+    ou acumular memória, e ao reconectar recebe o estado atual novamente.
+
+    Uma conexão ociosa ocupa apenas a sua fila: não há tarefas nem
+    temporizadores por conexão, e os comentários de manutenção da conexão
+    são enviados a todas por uma única tarefa (`heartbeat`).
+    """
+    def __init__(self) -> None:
+        self._subscriptions: Set[Subscription] = set()
+        self._subscribers: Dict[UUID, Set[Subscription]] = {}
+        self._states: Dict[UUID, Tuple[datetime, State]] = {}
+        self._polled_at: Optional[datetime] = None
+        self.sent = 0
+        self.dropped = 0
+        self.polls = 0
+
+    def subscribe(self, ids: List[UUID]) -> Subscription:
+        """
+        Registra uma conexão interessada nos produtos informados.
+
+        Raises:
+            OverloadedException: Se o processo já atende
+            `STREAM_MAX_CONNECTIONS` conexões.
+        """
+        if len(self._subscriptions) >= settings.STREAM_MAX_CONNECTIONS:
+            raise OverloadedException(message="Too many stream connections")
+
+        subscription = Subscription(ids)
+        self._subscriptions.add(subscription)
+        for id in subscription.ids:
+            self._subscribers.setdefault(id, set()).add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+        for id in subscription.ids:
+            subscribers = self._subscribers.get(id)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[id]
+                self._states.pop(id, None)
+
+    def _drop(self, subscription: Subscription) -> None:
+        """
+        Desconecta um assinante que não acompanha as alterações, descartando
+        as mensagens pendentes.
+        """
+        self.unsubscribe(subscription)
+        subscription.dropped = True
+        self.dropped += 1
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(DROPPED)
+
+    def _send(self, subscription: Subscription, message: bytes) -> None:
+        try:
+            subscription.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self._drop(subscription)
+            return
+        self.sent += 1
+
+    def _apply(self, id: UUID, updated_at: datetime, state: State) -> None:
+        """
+        Envia o novo estado do produto aos seus assinantes, se mudou e não é
+        anterior ao último enviado.
+        """
+        subscribers = self._subscribers.get(id)
+        if not subscribers:
+            return
+
+        updated_at = truncate(updated_at)
+        current = self._states.get(id)
+        if current is not None and (
+            updated_at < current[0] or state == current[1]
+        ):
+            return
+
+        self._states[id] = (updated_at, state)
+        message = encode(id, state)
+        for subscription in list(subscribers):
+            self._send(subscription, message)
+
+    def apply(self, event: ProductEvent) -> None:
+        """
+        Recebe as alterações feitas pelo próprio processo (ver `events`).
+        """
+        if event.id not in self._subscribers:
+            return
+
+        document = event.document or {}
+        self._apply(
+            event.id,
+            document.get("updated_at") or datetime.now(),
+            product_state(event.document),
+        )
+
+    async def poll(self) -> None:
+        """
+        Busca os produtos acompanhados alterados desde a consulta anterior,
+        inclusive por outros processos. Cada consulta repete os últimos
+        `STREAM_POLL_OVERLAP_SECONDS` segundos, para alcançar escritas que
+        estavam em andamento; as alterações já enviadas são ignoradas.
+
+        Com até `STREAM_POLL_MAX_IDS` produtos acompanhados a consulta busca
+        apenas esses produtos por `_id`, e o custo não depende do volume de
+        escritas no restante do catálogo; acima disso, busca todas as
+        alterações do intervalo pelo índice de `updated_at`.
+        """
+        if not self._subscribers:
+            self._polled_at = None
+            return
+
+        started = datetime.now()
+        since = (self._polled_at or started) - timedelta(
+            seconds=settings.STREAM_POLL_OVERLAP_SECONDS)
+        criteria: Dict[str, Any] = {"updated_at": {"$gte": since}}
+        if len(self._subscribers) <= settings.STREAM_POLL_MAX_IDS:
+            criteria["_id"] = {"$in": list(self._subscribers)}
+        items = await mongo_guard.call(
+            "stream",
+            lambda: product_usecase.reader("stream").find(
+                criteria,
+                {
+                    "quantity": 1,
+                    "price": 1,
+                    "status": 1,
+                    "deleted_at": 1,
+                    "updated_at": 1,
+                },
+            ).to_list(None),
+            retry=True,
+        )
+        self._polled_at = started
+        self.polls += 1
+
+        for item in items:
+            if item["_id"] in self._subscribers:
+                self._apply(item["_id"], item["updated_at"], product_state(item))
+
+    async def heartbeat(self) -> None:
+        """
+        Envia um comentário às conexões sem mensagens pendentes, para que
+        proxies não as encerrem por inatividade.
+        """
+        for subscription in list(self._subscriptions):
+            if subscription.queue.empty():
+                subscription.queue.put_nowait(HEARTBEAT)
+
+    def stream(self, ids: List[UUID]) -> AsyncIterator[bytes]:
+        """
+        Gera as mensagens Server-Sent Events de uma conexão: o estado atual
+        de cada produto e, a seguir, as suas alterações.
+
+        A assinatura é feita quando o envio começa, antes da leitura do
+        estado atual, de modo que uma alteração concorrente chega depois
+        dele, e é desfeita quando a conexão termina.
+
+        Args:
+            ids (List[UUID]): IDs dos produtos acompanhados.
+
+        Returns:
+            AsyncIterator[bytes]: As mensagens, já serializadas.
+
+        Raises:
+            OverloadedException: Se o processo já atende
+            `STREAM_MAX_CONNECTIONS` conexões.
+        """
+        if len(self._subscriptions) >= settings.STREAM_MAX_CONNECTIONS:
+            raise OverloadedException(message="Too many stream connections")
+
+        async def messages() -> AsyncIterator[bytes]:
+            subscription = self.subscribe(ids)
+            try:
+                ordered = list(subscription.ids)
+                products = await product_usecase.get_many(ordered)
+                for id, product in zip(ordered, products):
+                    state = product_state(
+                        product.model_dump() if product else None)
+                    yield encode(id, state)
+
+                while True:
+                    message = await subscription.queue.get()
+                    yield message
+                    if message is DROPPED:
+                        return
+            finally:
+                self.unsubscribe(subscription)
+
+        return messages()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self._subscriptions),
+            "products": len(self._subscribers),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "polls": self.polls,
+        }
+
+
+product_stream = ProductStream()
+
+events.subscribe(product_stream.apply)
+
+metrics.register("stream", product_stream.snapshot)
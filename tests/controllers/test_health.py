@@ -0,0 +1,34 @@
+from fastapi import status
+
+
+async def test_controller_live_should_return_success(client):
+    """
+    Este teste verifica se a sonda de vivacidade retorna o status HTTP 200 OK.
+
+    Cenário: Realiza uma requisição GET para `/health/live`.
+
+    Espere:
+        * Status code HTTP 200 OK.
+        * Corpo da resposta indicando que o processo está vivo.
+    """
+    response = await client.get("/health/live")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"status": "ok"}
+
+
+async def test_controller_ready_should_return_success(client):
+    """
+    Este teste verifica se a sonda de prontidão retorna o status HTTP 200 OK
+    quando o MongoDB está acessível.
+
+    Cenário: Realiza uma requisição GET para `/health/ready`.
+
+    Espere:
+        * Status code HTTP 200 OK.
+        * Corpo da resposta indicando que o processo está pronto.
+    """
+    response = await client.get("/health/ready")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"status": "ok"}
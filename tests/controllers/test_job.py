@@ -0,0 +1,48 @@
+from fastapi import status
+
+from store.usecases.job import job_usecase
+from tests.factories import products_data
+
+
+async def test_controller_job_import_should_return_accepted(client):
+    """
+    Este teste verifica se a importação em segundo plano é agendada e pode ser
+    acompanhada até a conclusão.
+
+    Cenário: Agenda a importação de 4 produtos, executa o processamento e
+    consulta o seu estado.
+
+    Espere:
+        * Status code HTTP 202 Accepted com o processamento pendente.
+        * Processamento concluído com 4 produtos processados.
+    """
+    response = await client.post("/jobs/import", json=products_data())
+    job = response.json()
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert job["status"] == "pending"
+
+    claimed = await job_usecase.claim("worker")
+    await job_usecase.run(claimed, "worker")
+    response = await client.get(f"/jobs/{job['id']}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "succeeded"
+    assert response.json()["processed"] == 4
+
+
+async def test_controller_job_get_should_return_not_found(client):
+    """
+    Este teste verifica se a consulta de um processamento inexistente retorna
+    o status HTTP 404 Not Found.
+
+    Espere:
+        * Status code HTTP 404 Not Found.
+    """
+    response = await client.get("/jobs/4fd7cd35-a3a0-4c1f-a78d-d24aa81e7dca")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {
+        "detail": "Job not found with filter: "
+        "4fd7cd35-a3a0-4c1f-a78d-d24aa81e7dca"
+    }
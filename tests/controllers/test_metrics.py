@@ -0,0 +1,21 @@
+from fastapi import status
+
+
+async def test_controller_metrics_should_return_admission(client):
+    """
+    Este teste verifica se o endpoint de métricas expõe o estado do controle
+    de admissão.
+
+    Cenário: Realiza uma requisição GET para `/metrics`.
+
+    Espere:
+        * Status code HTTP 200 OK.
+        * Métricas de fila e rejeição para leituras e escritas.
+    """
+    response = await client.get("/metrics")
+
+    content = response.json()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert {"queued", "rejected"} <= set(content["admission.read"])
+    assert {"queued", "rejected"} <= set(content["admission.write"])
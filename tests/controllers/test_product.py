@@ -1,9 +1,14 @@
 from typing import List
+from uuid import uuid4
 
 import pytest
 from fastapi import status
 
-from tests.factories import product_data
+from store.core.config import settings
+from store.usecases.catalog import catalog_snapshot
+from store.usecases.idempotency import idempotency_cache, idempotency_usecase
+from store.usecases.product import product_usecase, sharded_stock
+from tests.factories import product_data, products_data
 
 
 async def test_controller_create_should_return_success(client, products_url):
@@ -36,6 +41,74 @@ async def test_controller_create_should_return_success(client, products_url):
     }
 
 
+async def test_controller_create_bulk_should_return_success(
+    client, products_url
+):
+    """
+    Este teste verifica se o endpoint POST de criação em lote retorna o status
+    HTTP 201 Created e os produtos criados.
+
+    Cenário: Realiza uma requisição POST para a URL de lote com vários
+    produtos válidos.
+
+    Espere:
+        * Status code HTTP 201 Created.
+        * Corpo da resposta contendo um produto criado para cada item.
+    """
+    response = await client.post(f"{products_url}bulk", json=products_data())
+
+    content = response.json()
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [item["name"] for item in content] == [
+        item["name"] for item in products_data()]
+
+
+async def test_controller_batch_get_should_return_success(
+    client, products_url, products_inserted
+):
+    """
+    Este teste verifica se o endpoint POST de busca em lote retorna os
+    produtos na ordem da requisição, marcando os não encontrados.
+
+    Cenário: Busca um produto existente e um ID inexistente.
+
+    Espere:
+        * Status code HTTP 200 OK.
+        * Um item por ID, na ordem da requisição, com `found` indicando se o
+        produto existe.
+    """
+    missing = "4fd7cd35-a3a0-4c1f-a78d-d24aa81e7dca"
+    response = await client.post(
+        f"{products_url}batch-get",
+        json={"ids": [missing, str(products_inserted[0].id)]},
+    )
+
+    content = response.json()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert content[0] == {"id": missing, "found": False, "product": None}
+    assert content[1]["found"] is True
+    assert content[1]["product"]["name"] == products_inserted[0].name
+
+
+async def test_controller_analytics_should_return_service_unavailable(
+    client, products_url, monkeypatch
+):
+    """
+    Este teste verifica se a consulta analítica retorna o status HTTP 503
+    Service Unavailable enquanto a cópia do catálogo não foi carregada.
+
+    Espere:
+        * Status code HTTP 503 Service Unavailable.
+    """
+    monkeypatch.setattr(catalog_snapshot, "columns", None)
+
+    response = await client.get(f"{products_url}analytics")
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
 async def test_controller_get_should_return_success(
     client, products_url, product_inserted
 ):
@@ -144,6 +217,29 @@ async def test_controller_patch_should_return_success(
     }
 
 
+async def test_controller_patch_should_return_not_found(client, products_url):
+    """
+    Este teste verifica se o endpoint PATCH retorna o status HTTP 404 Not
+    Found para um produto inexistente.
+
+    Cenário: Realiza uma requisição PATCH para a URL de um produto com ID
+    inexistente.
+
+    Espere:
+        * Status code HTTP 404 Not Found.
+        * Corpo da resposta contendo a mensagem de erro.
+    """
+    response = await client.patch(
+        f"{products_url}4fd7cd35-a3a0-4c1f-a78d-d24aa81e7dca",
+        json={"price": "7.500"},
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {
+        "detail": "Product not found with filter: 4fd7cd35-a3a0-4c1f-a78d-d24aa81e7dca"
+    }
+
+
 async def test_controller_delete_should_return_no_content(
     client, products_url, product_inserted
 ):
@@ -182,3 +278,198 @@ async def test_controller_delete_should_return_not_found(client, products_url):
     assert response.json() == {
         "detail": "Product not found with filter: 4fd7cd35-a3a0-4c1f-a78d-d24aa81e7dca"
     }
+
+
+async def test_controller_create_with_idempotency_key_should_replay(
+    client, products_url
+):
+    """
+    Este teste verifica se repetir a criação com o mesmo `Idempotency-Key`
+    retorna a resposta original sem criar outro produto, e se a chave
+    reutilizada com outro corpo é rejeitada.
+
+    Cenário: Envia duas vezes o mesmo lote e a mesma criação com chaves de
+    idempotência e, por fim, outro corpo com a chave da criação.
+
+    Espere:
+        * Status code HTTP 201 Created e os mesmos produtos nas repetições.
+        * Cabeçalho `Idempotent-Replayed` falso na primeira resposta e
+        verdadeiro na repetição.
+        * Status code HTTP 422 Unprocessable Entity com outro corpo.
+    """
+    headers = {"Idempotency-Key": "create-1"}
+    first = await client.post(products_url, json=product_data(), headers=headers)
+    second = await client.post(
+        products_url, json=product_data(), headers=headers)
+
+    bulk_headers = {"Idempotency-Key": "bulk-1"}
+    first_bulk = await client.post(
+        f"{products_url}bulk", json=products_data(), headers=bulk_headers)
+    second_bulk = await client.post(
+        f"{products_url}bulk", json=products_data(), headers=bulk_headers)
+
+    mismatch = await client.post(
+        products_url, json={**product_data(), "quantity": 1}, headers=headers)
+    listed = await client.get(products_url)
+
+    assert first.status_code == second.status_code == status.HTTP_201_CREATED
+    assert first.headers["Idempotent-Replayed"] == "false"
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert first.json() == second.json()
+    assert first_bulk.json() == second_bulk.json()
+    assert second_bulk.headers["Idempotent-Replayed"] == "true"
+    assert mismatch.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert len(listed.json()) == 1 + len(products_data())
+
+
+async def test_controller_post_should_reject_reused_expired_keys(
+    client, products_url
+):
+    """
+    Este teste verifica se uma chave de idempotência reutilizada com outro
+    corpo, depois que o seu registro expirou, é rejeitada em vez de retornar
+    os produtos da requisição original.
+
+    Cenário: Cria um produto e um lote com chaves de idempotência, remove os
+    registros das chaves, como após `IDEMPOTENCY_TTL_SECONDS`, e repete as
+    chaves com outros corpos e com os corpos originais.
+
+    Espere:
+        * Status code HTTP 422 Unprocessable Entity com outros corpos.
+        * Status code HTTP 201 Created e os mesmos produtos com os corpos
+        originais.
+    """
+    headers = {"Idempotency-Key": "create-expired"}
+    bulk_headers = {"Idempotency-Key": "bulk-expired"}
+    first = await client.post(products_url, json=product_data(), headers=headers)
+    first_bulk = await client.post(
+        f"{products_url}bulk", json=products_data(), headers=bulk_headers)
+    await idempotency_usecase.collection.delete_many({})
+    idempotency_cache.clear()
+
+    mismatch = await client.post(
+        products_url, json={**product_data(), "quantity": 1}, headers=headers)
+    mismatch_bulk = await client.post(
+        f"{products_url}bulk", json=products_data()[:1], headers=bulk_headers)
+    retry = await client.post(products_url, json=product_data(), headers=headers)
+    retry_bulk = await client.post(
+        f"{products_url}bulk", json=products_data(), headers=bulk_headers)
+
+    assert mismatch.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert mismatch_bulk.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert retry.status_code == status.HTTP_201_CREATED
+    assert retry.json()["id"] == first.json()["id"]
+    assert [item["id"] for item in retry_bulk.json()] == [
+        item["id"] for item in first_bulk.json()]
+
+
+async def test_controller_post_stock_should_adjust_quantity(
+    client, products_url, product_inserted
+):
+    """
+    Este teste verifica se o endpoint de ajuste de estoque soma o valor à
+    quantidade do produto e retorna 404 para produtos inexistentes.
+
+    Cenário: Dá baixa de 4 unidades em um produto com 10 e tenta ajustar um
+    produto inexistente.
+
+    Espere:
+        * Status code HTTP 200 OK com a quantidade 6.
+        * Status code HTTP 404 Not Found para o produto inexistente.
+    """
+    response = await client.post(
+        f"{products_url}{product_inserted.id}/stock", json={"delta": -4})
+    missing = await client.post(
+        f"{products_url}4fd7cd35-a3a0-4c1f-a78d-d24aa81e7dca/stock",
+        json={"delta": 1},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "id": str(product_inserted.id), "quantity": 6, "sharded": False}
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+
+async def test_controller_post_stock_should_return_unavailable(
+    client, products_url, product_inserted
+):
+    """
+    Este teste verifica se o ajuste de estoque retorna 503 quando a
+    distribuição do contador do produto muda durante todas as tentativas.
+
+    Cenário: Marca o produto com 2 partes de contador, ambas fechadas, como
+    em uma distribuição interrompida, e ajusta o estoque.
+
+    Espere:
+        * Status code HTTP 503 Service Unavailable.
+    """
+    await product_usecase.create_indexes()
+    await product_usecase.collection.update_one(
+        {"_id": product_inserted.id}, {"$set": {"counter_slots": 2}})
+    await product_usecase.counters.insert_many([
+        {"product_id": product_inserted.id, "slot": slot, "closed": True}
+        for slot in range(2)
+    ])
+
+    response = await client.post(
+        f"{products_url}{product_inserted.id}/stock", json={"delta": 1})
+    sharded_stock.clear()
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+async def test_controller_changes_should_return_changes(
+    client, products_url, product_inserted, monkeypatch
+):
+    """
+    Este teste verifica se o endpoint de sincronização retorna as alterações
+    com o token para continuar, e 422 para um token inválido.
+
+    Cenário: Lê as alterações com um produto cadastrado e depois envia um
+    token inválido.
+
+    Espere:
+        * Status code HTTP 200 OK com o produto e o token `next`.
+        * Status code HTTP 422 Unprocessable Entity para o token inválido.
+    """
+    monkeypatch.setattr(settings, "CHANGES_SETTLE_SECONDS", 0)
+
+    response = await client.get(f"{products_url}changes")
+    invalid = await client.get(
+        f"{products_url}changes", params={"since": "not-a-token"})
+
+    content = response.json()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [change["id"] for change in content["changes"]] == [
+        str(product_inserted.id)]
+    assert content["next"] and content["has_more"] is False
+    assert invalid.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def test_controller_stream_should_reject_requests(
+    client, products_url, product_id, monkeypatch
+):
+    """
+    Este teste verifica se o fluxo de produtos recusa pedidos com produtos
+    demais ou acima do limite de conexões, antes de iniciar o fluxo.
+
+    Cenário: Pede o fluxo com 2 produtos e limite de 1; depois com limite de
+    0 conexões.
+
+    Espere:
+        * Status code HTTP 422 Unprocessable Entity com produtos demais.
+        * Status code HTTP 503 Service Unavailable sem conexões livres.
+    """
+    monkeypatch.setattr(settings, "STREAM_MAX_IDS", 1)
+    too_many = await client.get(
+        f"{products_url}stream",
+        params={"ids": [str(product_id), str(uuid4())]},
+    )
+
+    monkeypatch.setattr(settings, "STREAM_MAX_CONNECTIONS", 0)
+    overloaded = await client.get(
+        f"{products_url}stream", params={"ids": [str(product_id)]})
+
+    assert too_many.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert overloaded.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from store.core.admission import AdmissionController, AdmissionMiddleware
+from store.core.exceptions import OverloadedException
+
+
+async def test_admission_should_queue_until_slot_released():
+    """
+    Este teste verifica se o controlador de admissão coloca na fila as
+    requisições acima do limite e as libera quando uma vaga é devolvida.
+
+    Espere:
+        * A segunda requisição aguardando na fila enquanto a primeira executa.
+        * A segunda requisição admitida após `release`.
+    """
+    controller = AdmissionController(
+        name="read", limit=1, queue_size=1, queue_timeout=1)
+    await controller.acquire()
+
+    waiting = asyncio.ensure_future(controller.acquire())
+    await asyncio.sleep(0)
+
+    assert controller.snapshot()["queued"] == 1
+
+    controller.release()
+    await waiting
+
+    assert controller.snapshot()["in_flight"] == 1
+    assert controller.snapshot()["queued"] == 0
+
+
+async def test_admission_should_reject_when_queue_is_full():
+    """
+    Este teste verifica se o controlador de admissão rejeita imediatamente
+    quando a fila de espera está cheia.
+
+    Espere:
+        * Levantamento da exceção `OverloadedException`.
+        * Contador de rejeições incrementado.
+    """
+    controller = AdmissionController(
+        name="write", limit=1, queue_size=0, queue_timeout=1)
+    await controller.acquire()
+
+    with pytest.raises(OverloadedException):
+        await controller.acquire()
+
+    assert controller.snapshot()["rejected"] == 1
+
+
+async def test_admission_should_reject_after_queue_deadline():
+    """
+    Este teste verifica se uma requisição é rejeitada quando o prazo de espera
+    na fila expira.
+
+    Espere:
+        * Levantamento da exceção `OverloadedException`.
+        * Fila vazia após a expiração.
+    """
+    controller = AdmissionController(
+        name="read", limit=1, queue_size=1, queue_timeout=0.01)
+    await controller.acquire()
+
+    with pytest.raises(OverloadedException):
+        await controller.acquire()
+
+    assert controller.snapshot()["timed_out"] == 1
+    assert controller.snapshot()["queued"] == 0
+
+
+async def test_admission_should_return_slot_handed_over_at_deadline(
+    monkeypatch
+):
+    """
+    Este teste verifica se uma vaga repassada pela fila na mesma iteração em
+    que o prazo de espera expira é devolvida, e não perdida.
+
+    Cenário: Simula `wait_for` levantando `TimeoutError` após a vaga já ter
+    sido repassada à requisição na fila.
+
+    Espere:
+        * Levantamento da exceção `OverloadedException`.
+        * Nenhuma vaga ocupada após a liberação da primeira requisição.
+    """
+    async def late_wait_for(future, timeout):
+        await future
+        raise asyncio.TimeoutError()
+
+    controller = AdmissionController(
+        name="read", limit=1, queue_size=1, queue_timeout=1)
+    await controller.acquire()
+    monkeypatch.setattr(asyncio, "wait_for", late_wait_for)
+
+    waiting = asyncio.ensure_future(controller.acquire())
+    await asyncio.sleep(0)
+    controller.release()
+
+    with pytest.raises(OverloadedException):
+        await waiting
+
+    assert controller.snapshot()["in_flight"] == 0
+
+
+async def test_admission_middleware_should_return_service_unavailable():
+    """
+    Este teste verifica se o middleware responde 503 com `Retry-After` quando
+    não há vaga disponível.
+
+    Cenário: Ocupa a única vaga de escrita e envia um POST sem fila de espera.
+
+    Espere:
+        * Status code HTTP 503 Service Unavailable.
+        * Cabeçalho `Retry-After` presente.
+    """
+    async def app(scope, receive, send):
+        raise AssertionError("request should not be admitted")
+
+    controller = AdmissionController(
+        name="write", limit=1, queue_size=0, queue_timeout=1)
+    await controller.acquire()
+    middleware = AdmissionMiddleware(
+        app, controllers={"read": controller, "write": controller})
+
+    async with AsyncClient(app=middleware, base_url="http://test") as client:
+        response = await client.post("/products/", json={})
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert "retry-after" in response.headers
@@ -0,0 +1,101 @@
+from store.core.cache import ResponseCache, TTLCache
+
+
+def test_cache_should_evict_least_recently_used():
+    """
+    Este teste verifica se o cache descarta a entrada usada há mais tempo ao
+    atingir o tamanho máximo.
+
+    Espere:
+        * A entrada lida recentemente mantida e a mais antiga descartada.
+    """
+    cache = TTLCache(name="test-lru", max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+
+
+def test_cache_should_expire_entries(monkeypatch):
+    """
+    Este teste verifica se as entradas expiram após o `ttl`.
+
+    Espere:
+        * A entrada disponível antes do prazo e ausente depois dele.
+        * Acertos e faltas contabilizados nas métricas.
+    """
+    now = [100.0]
+    monkeypatch.setattr("store.core.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(name="test-ttl", max_size=10, ttl=5)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+
+    now[0] += 6
+
+    assert cache.get("a") is None
+    assert cache.snapshot()["hits"] == 1
+    assert cache.snapshot()["misses"] == 1
+
+
+def test_cache_should_be_disabled_without_ttl():
+    """
+    Este teste verifica se o cache não guarda entradas com `ttl` zero.
+
+    Espere:
+        * Nenhuma entrada armazenada.
+    """
+    cache = TTLCache(name="test-disabled", max_size=10, ttl=0)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+    assert cache.snapshot()["size"] == 0
+
+
+def test_response_cache_should_invalidate_on_bump():
+    """
+    Este teste verifica se incrementar a geração invalida todas as respostas
+    guardadas e se uma resposta gerada antes de uma escrita não é guardada.
+
+    Espere:
+        * Resposta servida antes do incremento e descartada depois.
+        * Resposta da geração anterior ignorada por `set`.
+    """
+    cache = ResponseCache(name="test-generation", max_bytes=1024, ttl=60)
+    cache.set("a", b"[1]", cache.generation)
+    assert cache.get("a") == b"[1]"
+
+    generation = cache.generation
+    cache.bump()
+    cache.set("b", b"[2]", generation)
+
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.snapshot()["bytes"] == 0
+
+
+def test_response_cache_should_bound_bytes():
+    """
+    Este teste verifica se o cache descarta as respostas usadas há mais
+    tempo para não ultrapassar `max_bytes`.
+
+    Espere:
+        * No máximo `max_bytes` guardados, mantida a resposta lida
+        recentemente.
+        * Respostas maiores que o limite não guardadas.
+    """
+    cache = ResponseCache(name="test-bytes", max_bytes=10, ttl=60)
+    cache.set("a", b"aaaa", 0)
+    cache.set("b", b"bbbb", 0)
+    cache.get("a")
+    cache.set("c", b"cccc", 0)
+    cache.set("d", b"d" * 11, 0)
+
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("b") is None
+    assert cache.get("c") == b"cccc"
+    assert cache.get("d") is None
+    assert cache.size == 8
+    assert cache.evictions == 1
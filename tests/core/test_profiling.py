@@ -0,0 +1,73 @@
+from fastapi import status
+from httpx import AsyncClient
+from starlette.responses import JSONResponse
+
+from store.core.profiling import ProfilingMiddleware
+
+
+async def app(scope, receive, send):
+    response = JSONResponse({"status": "ok"})
+    await response(scope, receive, send)
+
+
+async def test_profiling_should_skip_requests_without_secret():
+    """
+    Este teste verifica se o middleware não perfila requisições sem o
+    cabeçalho secreto.
+
+    Cenário: Envia uma requisição com um segredo incorreto.
+
+    Espere:
+        * A resposta original da aplicação, sem o cabeçalho `X-Profile-Id`.
+    """
+    middleware = ProfilingMiddleware(app, secret="s3cr3t")
+
+    async with AsyncClient(app=middleware, base_url="http://test") as client:
+        response = await client.get("/", headers={"X-Profile": "wrong"})
+
+    assert response.json() == {"status": "ok"}
+    assert "x-profile-id" not in response.headers
+
+
+async def test_profiling_should_return_report_inline():
+    """
+    Este teste verifica se, sem diretório configurado, o relatório do perfil
+    é retornado no corpo da resposta.
+
+    Espere:
+        * O status da resposta original.
+        * Os tempos de parede e de CPU no relatório e nos cabeçalhos.
+    """
+    middleware = ProfilingMiddleware(app, secret="s3cr3t")
+
+    async with AsyncClient(app=middleware, base_url="http://test") as client:
+        response = await client.get("/", headers={"X-Profile": "s3cr3t"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.text.startswith("GET / -> 200")
+    assert "wall:" in response.text and "cpu:" in response.text
+    assert float(response.headers["x-profile-wall-ms"]) >= 0
+
+
+async def test_profiling_should_save_sampled_requests(tmp_path):
+    """
+    Este teste verifica se as requisições amostradas são salvas no diretório
+    configurado sem alterar a resposta.
+
+    Cenário: Usa taxa de amostragem 1 e um diretório temporário.
+
+    Espere:
+        * A resposta original da aplicação.
+        * Os arquivos `.prof` e `.txt` com o id do cabeçalho `X-Profile-Id`.
+    """
+    middleware = ProfilingMiddleware(
+        app, sample_rate=1.0, directory=str(tmp_path))
+
+    async with AsyncClient(app=middleware, base_url="http://test") as client:
+        response = await client.get("/")
+
+    profile_id = response.headers["x-profile-id"]
+
+    assert response.json() == {"status": "ok"}
+    assert (tmp_path / f"{profile_id}.prof").exists()
+    assert (tmp_path / f"{profile_id}.txt").read_text().startswith("GET /")
@@ -0,0 +1,212 @@
+import json
+from types import SimpleNamespace
+
+from httpx import AsyncClient
+from starlette.responses import JSONResponse
+
+from store.core.tracing import (  # E501
+    SPAN_KIND_CLIENT,
+    STATUS_ERROR,
+    CommandTracer,
+    SpanExporter,
+    Tracer,
+    TracingMiddleware,
+    _current_span,
+    parse_traceparent,
+    tracer,
+)
+from store.schemas.base import TracedValidationMixin
+from store.schemas.product import ProductIn
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def test_tracing_parse_traceparent_should_validate_header():
+    """
+    Este teste verifica se o cabeçalho `traceparent` é interpretado conforme
+    o W3C Trace Context.
+
+    Espere:
+        * Id do rastreamento, id do pai e a flag de amostragem de um valor
+        válido.
+        * `None` para valores malformados ou com ids zerados.
+    """
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (
+        TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")[2] is False
+    assert parse_traceparent("00-xyz-123-01") is None
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+
+
+async def test_tracing_middleware_should_continue_incoming_trace():
+    """
+    Este teste verifica se a requisição continua o rastreamento recebido e
+    gera trechos para o controller e o usecase.
+
+    Cenário: Cria um produto pela API com um `traceparent` amostrado.
+
+    Espere:
+        * O mesmo id de rastreamento no `traceparent` da resposta.
+        * Trecho do servidor nomeado pelo modelo da rota e filho do chamador.
+        * Trechos do controller e do usecase no mesmo rastreamento.
+    """
+    from store.main import app
+    from tests.factories import product_data
+
+    tracer.finished.clear()
+    middleware = TracingMiddleware(app, tracer=tracer)
+
+    async with AsyncClient(app=middleware, base_url="http://test") as ac:
+        response = await ac.post(
+            "/products/",
+            json=product_data(),
+            headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"},
+        )
+
+    spans = {span.name: span for span in tracer.finished}
+    trace_ids = {span.trace_id for span in tracer.finished}
+    tracer.finished.clear()
+    server = spans["POST /products/"]
+
+    assert response.headers["traceparent"].split("-")[1] == TRACE_ID
+    assert server.parent_id == PARENT_ID
+    assert server.attributes["http.response.status_code"] == 201
+    assert "store.controllers.product.post" in spans
+    assert "store.usecases.product.ProductUsecase.create" in spans
+    assert trace_ids == {TRACE_ID}
+
+
+async def test_tracing_middleware_should_skip_unsampled_requests():
+    """
+    Este teste verifica se requisições não amostradas não geram trechos.
+
+    Espere:
+        * Nenhum trecho registrado e nenhum `traceparent` na resposta.
+    """
+    async def app(scope, receive, send):
+        await JSONResponse({})(scope, receive, send)
+
+    tracer = Tracer(sample_rate=0, max_queue_size=100)
+    middleware = TracingMiddleware(app, tracer=tracer)
+
+    async with AsyncClient(app=middleware, base_url="http://test") as ac:
+        response = await ac.get("/")
+
+    assert "traceparent" not in response.headers
+    assert not tracer.finished
+
+
+def test_tracing_validation_should_trace_only_when_enabled():
+    """
+    Este teste verifica se a validação dos schemas gera trechos apenas nos
+    schemas com `TracedValidationMixin`, herdado com `TRACING_ENABLED`.
+
+    Cenário: Com o rastreamento desabilitado, valida um produto com um
+    schema que herda `TracedValidationMixin` dentro de um rastreamento.
+
+    Espere:
+        * Nenhum validador de rastreamento nos schemas da aplicação.
+        * Trecho `validate TracedProductIn` filho do trecho ativo.
+    """
+    from tests.factories import product_data
+
+    class TracedProductIn(TracedValidationMixin, ProductIn):
+        pass
+
+    root = tracer.start_trace(
+        "test", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01")
+    tracer.finished.clear()
+    token = _current_span.set(root)
+    try:
+        TracedProductIn(**product_data())
+    finally:
+        _current_span.reset(token)
+    spans = {span.name: span for span in tracer.finished}
+    tracer.finished.clear()
+
+    assert "trace_validation" not in (
+        ProductIn.__pydantic_decorators__.model_validators)
+    assert spans["validate TracedProductIn"].parent_id == root.span_id
+
+
+def test_tracing_command_tracer_should_record_mongo_commands():
+    """
+    Este teste verifica se os eventos de comando do driver geram trechos
+    filhos do trecho ativo.
+
+    Cenário: Emite um comando `find` bem-sucedido e um `insert` com falha
+    durante uma requisição rastreada.
+
+    Espere:
+        * Dois trechos do tipo cliente, filhos do trecho da requisição, com a
+        coleção nos atributos.
+        * O trecho do comando com falha marcado com erro.
+    """
+    tracer = Tracer(sample_rate=1, max_queue_size=100)
+    listener = CommandTracer(tracer)
+    root = tracer.start_trace("GET /products/")
+
+    def event(name, request_id, **kwargs):
+        return SimpleNamespace(
+            command_name=name,
+            command={name: "products"},
+            database_name="store",
+            connection_id=("localhost", 27017),
+            request_id=request_id,
+            **kwargs,
+        )
+
+    token = _current_span.set(root)
+    try:
+        listener.started(event("find", 1))
+        listener.started(event("insert", 2))
+    finally:
+        _current_span.reset(token)
+    listener.succeeded(event("find", 1))
+    listener.failed(event("insert", 2, failure={"errmsg": "duplicate"}))
+
+    commands = {
+        span.name: span
+        for span in tracer.finished
+        if span.kind == SPAN_KIND_CLIENT
+    }
+
+    assert set(commands) == {"mongodb.find", "mongodb.insert"}
+    assert commands["mongodb.find"].parent_id == root.span_id
+    assert commands["mongodb.find"].attributes[
+        "db.mongodb.collection"] == "products"
+    assert commands["mongodb.insert"].status == STATUS_ERROR
+
+
+async def test_tracing_flush_should_write_otlp_json(tmp_path):
+    """
+    Este teste verifica se o exportador grava os trechos em JSON no formato
+    do OTLP.
+
+    Espere:
+        * Uma linha JSON com `resourceSpans`, o nome do serviço e os trechos.
+        * Fila vazia e contador de exportados atualizado após o envio.
+    """
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(
+        sample_rate=1,
+        max_queue_size=100,
+        exporter=SpanExporter(service_name="Store API", path=str(path)),
+    )
+    span = tracer.start_trace("GET /products/", attributes={"http.status": 200})
+    tracer.end(span)
+
+    await tracer.flush()
+
+    payload = json.loads(path.read_text().splitlines()[0])
+    resource = payload["resourceSpans"][0]
+    exported = resource["scopeSpans"][0]["spans"][0]
+
+    assert resource["resource"]["attributes"][0]["value"] == {
+        "stringValue": "Store API"}
+    assert exported["traceId"] == span.trace_id
+    assert exported["attributes"] == [
+        {"key": "http.status", "value": {"intValue": "200"}}]
+    assert tracer.snapshot()["exported"] == 1
+    assert tracer.snapshot()["queued"] == 0
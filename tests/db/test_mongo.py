@@ -0,0 +1,132 @@
+import os
+
+import pytest
+from pymongo import monitoring
+from pymongo.read_preferences import Primary, SecondaryPreferred
+
+from store.db.mongo import db_client, read_preference, write_concern
+from store.schemas.product import ProductUpdate
+from store.usecases.product import product_usecase
+
+REPLICA_SET_URL = os.environ.get("REPLICA_SET_URL")
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """
+    Guarda o nome e o servidor de destino dos comandos enviados ao banco.
+    """
+    def __init__(self) -> None:
+        self.commands = []
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self.commands.append((event.command_name, event.connection_id))
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        pass
+
+
+@pytest.fixture
+async def replica_set(monkeypatch):
+    """
+    Este fixture conecta os casos de uso ao conjunto de réplicas de
+    `REPLICA_SET_URL`, registrando os comandos enviados, e remove os
+    produtos criados ao final.
+    """
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    recorder = CommandRecorder()
+    client = AsyncIOMotorClient(
+        REPLICA_SET_URL,
+        uuidRepresentation="standard",
+        event_listeners=[recorder],
+    )
+    await client.admin.command("ping")
+    monkeypatch.setattr(db_client, "client", client)
+
+    yield recorder, client.primary
+
+    await client.get_database().get_collection("products").delete_many({})
+    client.close()
+
+
+def test_read_preference_should_route_listing_to_secondaries():
+    """
+    Este teste verifica se as leituras de listagem são direcionadas aos
+    secundários enquanto a busca por ID permanece no primário.
+
+    Espere:
+        * `SecondaryPreferred` para a operação `query`.
+        * `Primary` para a operação `get` e para operações não configuradas.
+    """
+    assert isinstance(read_preference("query"), SecondaryPreferred)
+    assert isinstance(read_preference("get"), Primary)
+    assert isinstance(read_preference("unknown"), Primary)
+
+
+def test_write_concern_should_apply_operation_profile():
+    """
+    Este teste verifica se cada operação de escrita recebe a garantia de
+    escrita do seu perfil de durabilidade.
+
+    Espere:
+        * `w=majority` com journal para criações (perfil `safe`).
+        * `w=1` sem journal para cargas em lote (perfil `fast`).
+        * Garantia padrão do cliente para operações sem perfil.
+    """
+    assert write_concern("create").document == {"w": "majority", "j": True}
+    assert write_concern("bulk").document == {"w": 1, "j": False}
+    assert write_concern("unknown").document == {}
+
+
+@pytest.mark.replica_set
+@pytest.mark.skipif(
+    not REPLICA_SET_URL, reason="REPLICA_SET_URL não configurada")
+async def test_read_preference_should_route_reads_in_replica_set(
+    replica_set, product_in
+):
+    """
+    Este teste verifica, em um conjunto de réplicas real, se as listagens,
+    exportações e estatísticas são lidas dos secundários e se a busca por
+    ID e a atualização vão ao primário.
+
+    Cenário: Cria um produto e executa cada operação, registrando o servidor
+    de destino dos comandos `find` e `findAndModify`.
+
+    Espere:
+        * `query`, `export` e `stats` em um secundário.
+        * `get` e a atualização no primário.
+    """
+    recorder, primary = replica_set
+    product = await product_usecase.create(body=product_in)
+    operations = {
+        "query": (product_usecase.query, False),
+        "export": (
+            lambda: product_usecase.scan(after=None, limit=10), False),
+        "stats": (
+            lambda: product_usecase.scan(
+                after=None, limit=10, operation="stats"),
+            False,
+        ),
+        "get": (lambda: product_usecase.get(id=product.id), True),
+        "update": (
+            lambda: product_usecase.update(
+                id=product.id, body=ProductUpdate(quantity=1)),
+            True,
+        ),
+    }
+
+    for operation, (call, on_primary) in operations.items():
+        recorder.commands.clear()
+        await call()
+        servers = {
+            server for name, server in recorder.commands
+            if name in ("find", "findAndModify")
+        }
+
+        assert servers, operation
+        assert all(
+            (server == primary) is on_primary for server in servers
+        ), operation
@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+from store.core.config import settings
+from store.core.exceptions import (  # E501
+    DeadlineExceededException,
+    UnavailableException,
+)
+from store.db.resilience import CircuitBreaker, MongoGuard
+
+
+@pytest.fixture
+def guard(monkeypatch):
+    monkeypatch.setattr(settings, "MONGO_TIMEOUTS_MS", {"test": 100})
+    monkeypatch.setattr(settings, "MONGO_CLIENT_TIMEOUT_MARGIN_MS", 0)
+    monkeypatch.setattr(settings, "MONGO_RETRY_BACKOFF_MS", 1)
+
+    return MongoGuard(
+        CircuitBreaker(name="test", threshold=2, reset_timeout=60))
+
+
+def failing(errors: int, result: str = "ok"):
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        if len(calls) <= errors:
+            raise AutoReconnect("not primary")
+        return result
+
+    return factory, calls
+
+
+async def test_guard_should_cap_latency_with_deadline(guard):
+    """
+    Este teste verifica se uma leitura lenta é interrompida no prazo da
+    operação, mesmo com repetições habilitadas.
+
+    Cenário: Executa uma leitura que demora 1 segundo com prazo de 100 ms.
+
+    Espere:
+        * `DeadlineExceededException`.
+        * Duração total próxima do prazo, sem somar as repetições.
+    """
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceededException):
+        await guard.call("test", lambda: asyncio.sleep(1), retry=True)
+
+    assert time.monotonic() - started < 0.3
+    assert guard.timeouts >= 1
+
+
+async def test_guard_should_retry_idempotent_reads(guard):
+    """
+    Este teste verifica se os erros de conexão são repetidos apenas nas
+    chamadas idempotentes, até o limite de repetições.
+
+    Cenário: Executa chamadas que falham com `AutoReconnect` antes de
+    responder.
+
+    Espere:
+        * Resultado após duas falhas, com repetição habilitada.
+        * `UnavailableException` sem repetição ou após esgotar as repetições.
+    """
+    factory, calls = failing(errors=2)
+    assert await guard.call("test", factory, retry=True) == "ok"
+    assert len(calls) == 3
+
+    factory, calls = failing(errors=1)
+    with pytest.raises(UnavailableException):
+        await guard.call("test", factory)
+    assert len(calls) == 1
+
+    factory, calls = failing(errors=10)
+    with pytest.raises(UnavailableException):
+        await guard.call("test", factory, retry=True)
+    assert len(calls) == 1 + settings.MONGO_READ_RETRIES
+
+
+async def test_guard_should_open_circuit_after_timeouts(guard):
+    """
+    Este teste verifica se o circuito abre após prazos esgotados
+    consecutivos e fecha após uma chamada de teste bem-sucedida.
+
+    Cenário: Esgota o prazo de duas chamadas com limite de 2, tenta uma
+    terceira e, passado o intervalo de espera, uma quarta.
+
+    Espere:
+        * Terceira chamada rejeitada sem chegar ao banco.
+        * Circuito fechado após a chamada de teste.
+    """
+    for _ in range(2):
+        with pytest.raises(DeadlineExceededException):
+            await guard.call("test", lambda: asyncio.sleep(1))
+
+    factory, calls = failing(errors=0)
+    with pytest.raises(UnavailableException):
+        await guard.call("test", factory)
+    assert calls == []
+    assert guard.breaker.state == "open"
+
+    guard.breaker.opened_at -= guard.breaker.reset_timeout
+    assert await guard.call("test", factory) == "ok"
+    assert guard.breaker.state == "closed"
+    assert guard.breaker.trips == 1
+
+
+async def test_guard_should_hedge_slow_reads(guard, monkeypatch):
+    """
+    Este teste verifica se uma leitura mais lenta que o percentil configurado
+    recebe uma leitura de proteção, e se vale a que terminar primeiro.
+
+    Cenário: Com latências recentes de 1 ms, executa uma leitura que demora
+    1 segundo e cuja proteção responde imediatamente.
+
+    Espere:
+        * Resultado da leitura de proteção, dentro do prazo.
+        * Uma proteção enviada e vencedora.
+    """
+    monkeypatch.setattr(settings, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "HEDGE_MIN_DELAY_MS", 5)
+
+    async def slow():
+        await asyncio.sleep(1)
+        return "primary"
+
+    async def fast():
+        return "hedge"
+
+    for _ in range(50):
+        assert await guard.call("test", fast, hedge=fast) == "hedge"
+
+    assert await guard.call("test", slow, hedge=fast) == "hedge"
+    assert guard.hedges == 1
+    assert guard.hedge_wins == 1
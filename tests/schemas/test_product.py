@@ -1,7 +1,12 @@
+from decimal import Decimal
+
 import pytest
+from bson import Int64
 from pydantic import ValidationError
 
-from store.schemas.product import ProductIn
+from store.core.config import settings
+from store.models.product import ProductModel
+from store.schemas.product import ProductIn, ProductOut
 from tests.factories import product_data
 
 
@@ -55,3 +60,38 @@ def test_schemas_return_raise():
         "input": {"name": "Iphone 14 Pro Max", "quantity": 10, "price": 8.5},
         "url": "https://errors.pydantic.dev/2.5/v/missing",
     }
+
+
+def test_schemas_minor_units_should_round_trip_price(monkeypatch):
+    """
+    Este teste verifica se, com `PRICE_STORAGE=minor_units`, o preço é
+    gravado como inteiro em unidades menores e lido de volta sem perda.
+
+    Cenário: Serializa um `ProductModel` e reconstrói um `ProductOut` a
+    partir do documento gravado.
+
+    Espere:
+        * Preço gravado como `Int64` em centavos.
+        * Preço lido de volta como o mesmo `Decimal`.
+    """
+    monkeypatch.setattr(settings, "PRICE_STORAGE", "minor_units")
+
+    document = ProductModel(**product_data()).model_dump()
+
+    assert document["price"] == Int64(850)
+    assert isinstance(document["price"], Int64)
+    assert ProductOut(**document).price == Decimal("8.5")
+
+
+def test_schemas_minor_units_should_reject_extra_decimal_places(monkeypatch):
+    """
+    Este teste verifica se, com `PRICE_STORAGE=minor_units`, um preço com mais
+    casas decimais do que `PRICE_SCALE` é rejeitado na entrada.
+
+    Espere:
+        * Levantamento da exceção `ValidationError`.
+    """
+    monkeypatch.setattr(settings, "PRICE_STORAGE", "minor_units")
+
+    with pytest.raises(ValidationError):
+        ProductIn.model_validate({**product_data(), "price": "8.505"})
@@ -0,0 +1,44 @@
+from store.cli import build_parser, worker_count
+
+
+def test_cli_serve_should_parse_options():
+    """
+    Este teste verifica se o subcomando `serve` interpreta as opções do
+    servidor.
+
+    Cenário: Interpreta uma linha de comando com workers, loop, http,
+    keep-alive e tempo de encerramento gracioso.
+
+    Espere:
+        * Os valores informados presentes no namespace resultante.
+    """
+    args = build_parser().parse_args(
+        [
+            "serve",
+            "--workers", "4",
+            "--loop", "uvloop",
+            "--http", "httptools",
+            "--keep-alive", "15",
+            "--graceful-timeout", "20",
+        ]
+    )
+
+    assert args.command == "serve"
+    assert args.workers == 4
+    assert args.loop == "uvloop"
+    assert args.http == "httptools"
+    assert args.keep_alive == 15
+    assert args.graceful_timeout == 20
+
+
+def test_cli_worker_count_should_use_all_cores():
+    """
+    Este teste verifica se `worker_count` inicia um processo por núcleo de CPU
+    quando a quantidade de workers é zero.
+
+    Espere:
+        * Ao menos um processo para `0`.
+        * O valor informado quando positivo.
+    """
+    assert worker_count(0) >= 1
+    assert worker_count(3) == 3
@@ -0,0 +1,53 @@
+import pytest
+
+from store.loadtest import LoadTest, parse_mix
+
+
+def test_loadtest_parse_mix_should_return_weights():
+    """
+    Este teste verifica se `parse_mix` interpreta a mistura de operações.
+
+    Espere:
+        * Um dicionário com o peso de cada operação, usando 1 quando o peso
+        for omitido.
+    """
+    assert parse_mix("create=2, get=6,list") == {"create": 2, "get": 6, "list": 1}
+
+
+def test_loadtest_parse_mix_should_reject_unknown_operation():
+    """
+    Este teste verifica se `parse_mix` rejeita operações desconhecidas.
+
+    Espere:
+        * Uma exceção `ValueError`.
+    """
+    with pytest.raises(ValueError):
+        parse_mix("create=1,truncate=1")
+
+
+async def test_loadtest_run_should_report_latency_percentiles(client):
+    """
+    Este teste verifica se o gerador de carga executa a quantidade pedida de
+    requisições contra a API e gera o relatório.
+
+    Cenário: Cria 5 produtos iniciais e executa 20 requisições com 4
+    requisições simultâneas.
+
+    Espere:
+        * 20 requisições no relatório, sem erros.
+        * Percentis de latência calculados para o total e por operação.
+    """
+    loadtest = LoadTest(
+        client=client,
+        mix=parse_mix("create=1,get=2,list=1,patch=1"),
+        concurrency=4,
+        requests=20,
+    )
+    await loadtest.seed(5)
+    report = await loadtest.run()
+
+    assert report["requests"] == 20
+    assert report["errors"] == 0
+    assert report["latency"]["count"] == 20
+    assert report["latency"]["p50_ms"] <= report["latency"]["p99_ms"]
+    assert set(report["operations"]) <= {"create", "get", "list", "patch"}
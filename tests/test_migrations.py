@@ -0,0 +1,135 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from bson import Binary, Decimal128, Int64, ObjectId
+from bson.binary import UuidRepresentation
+
+from store import migrations
+from store.core.config import settings
+from store.migrations import backfill_prices, migrate_product_ids
+from store.usecases.product import product_usecase
+
+
+async def test_migrations_product_ids_should_use_uuid_as_id(product_id):
+    """
+    Este teste verifica se a migração regrava produtos antigos com o UUID
+    binário como `_id`.
+
+    Cenário: Insere diretamente um produto no formato antigo, com `ObjectId`
+    como `_id` e o UUID no formato legado, e executa a migração.
+
+    Espere:
+        * Retorno da quantidade de documentos migrados.
+        * O produto encontrado pelo caso de uso `get`.
+        * Nenhum documento com `ObjectId` restante.
+    """
+    await product_usecase.collection.insert_one(
+        {
+            "_id": ObjectId(),
+            "id": Binary.from_uuid(
+                product_id, UuidRepresentation.PYTHON_LEGACY),
+            "name": "Iphone 14 Pro Max",
+            "quantity": 10,
+            "price": Decimal128("8.500"),
+            "status": True,
+            "created_at": datetime(2024, 1, 1),
+            "updated_at": datetime(2024, 1, 1),
+        }
+    )
+
+    result = await migrate_product_ids(batch_size=10)
+
+    product = await product_usecase.get(id=product_id)
+
+    assert result == 1
+    assert product.id == product_id
+    assert await product_usecase.collection.count_documents(
+        {"_id": {"$type": "objectId"}}) == 0
+
+
+async def test_migrations_product_ids_should_keep_concurrent_updates(
+    product_id, monkeypatch
+):
+    """
+    Este teste verifica se a migração preserva as alterações feitas durante
+    a própria migração e após uma execução interrompida.
+
+    Cenário: Insere um produto no formato antigo e uma cópia desatualizada,
+    deixada por uma execução interrompida; durante a migração, altera o
+    original entre a cópia e a remoção.
+
+    Espere:
+        * Produto migrado com a quantidade alterada por último.
+        * Nenhum documento com `ObjectId` restante.
+    """
+    collection = product_usecase.collection
+    document = {
+        "_id": ObjectId(),
+        "id": Binary.from_uuid(product_id, UuidRepresentation.PYTHON_LEGACY),
+        "name": "Iphone 14 Pro Max",
+        "quantity": 10,
+        "price": Decimal128("8.500"),
+        "status": True,
+        "created_at": datetime(2024, 1, 1),
+        "updated_at": datetime(2024, 1, 1),
+    }
+    await collection.insert_one(document)
+    await collection.insert_one(
+        {**document, "_id": product_id, "id": product_id, "quantity": 1})
+
+    class ConcurrentWriter:
+        """
+        Coleção que altera o original antes da primeira remoção.
+        """
+        updated = False
+
+        def __getattr__(self, name):
+            return getattr(collection, name)
+
+        async def bulk_write(self, requests, **kwargs):
+            if not self.updated and isinstance(
+                requests[0], migrations.DeleteOne
+            ):
+                self.updated = True
+                await collection.update_one(
+                    {"_id": document["_id"]}, {"$set": {"quantity": 3}})
+            return await collection.bulk_write(requests, **kwargs)
+
+    writer = ConcurrentWriter()
+    monkeypatch.setattr(
+        migrations, "product_usecase", SimpleNamespace(collection=writer))
+
+    result = await migrate_product_ids(batch_size=10)
+
+    assert writer.updated is True
+    assert result == 1
+    assert (await product_usecase.get(id=product_id)).quantity == 3
+    assert await collection.count_documents(
+        {"_id": {"$type": "objectId"}}) == 0
+
+
+async def test_migrations_backfill_prices_should_store_minor_units(
+    monkeypatch, product_inserted
+):
+    """
+    Este teste verifica se a migração de preços converte preços `Decimal128`
+    para inteiros em unidades menores.
+
+    Cenário: Insere um produto com `PRICE_STORAGE=decimal128`, troca para
+    `minor_units` e executa a migração.
+
+    Espere:
+        * Um preço convertido.
+        * Preço gravado como `Int64` e lido de volta sem perda.
+    """
+    monkeypatch.setattr(settings, "PRICE_STORAGE", "minor_units")
+
+    result = await backfill_prices(batch_size=10)
+
+    document = await product_usecase.collection.find_one(
+        {"_id": product_inserted.id})
+
+    assert result == {"converted": 1, "skipped": 0}
+    assert isinstance(document["price"], Int64)
+    assert (await product_usecase.get(id=product_inserted.id)).price == (
+        product_inserted.price)
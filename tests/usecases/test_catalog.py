@@ -0,0 +1,143 @@
+from decimal import Decimal
+
+import pytest
+
+from store.core.events import ProductEvent, events
+from store.schemas.product import ProductUpdate
+from store.usecases.catalog import CatalogSnapshot
+from store.usecases.product import product_usecase
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture
+async def snapshot(products_inserted):
+    """
+    Este fixture carrega uma cópia do catálogo com os produtos inseridos e a
+    inscreve nas alterações de produtos durante o teste.
+    """
+    snapshot = CatalogSnapshot()
+    await snapshot.load()
+    events.subscribe(snapshot.apply)
+    yield snapshot
+    events.unsubscribe(snapshot.apply)
+
+
+async def test_catalog_query_should_filter_and_sort(snapshot):
+    """
+    Este teste verifica se a consulta analítica filtra, ordena e limita os
+    produtos da cópia do catálogo.
+
+    Cenário: Busca os dois produtos ativos mais baratos.
+
+    Espere:
+        * O total de produtos ativos e apenas os dois mais baratos, em ordem.
+    """
+    result = snapshot.query(status=True, sort="price", limit=2)
+
+    assert result.count == 3
+    assert [item.name for item in result.items] == [
+        "Iphone 11 Pro Max", "Iphone 12 Pro Max"]
+    assert result.items[0].price == Decimal("4.50")
+
+
+async def test_catalog_query_should_sort_descending_by_quantity(snapshot):
+    """
+    Este teste verifica se a ordenação decrescente e os filtros de faixa de
+    preço são aplicados.
+
+    Cenário: Busca os produtos com preço entre 5.000 e 11.000, do maior para
+    o menor estoque.
+
+    Espere:
+        * Os três produtos da faixa ordenados por quantidade decrescente.
+    """
+    result = snapshot.query(
+        min_price=Decimal("5.000"), max_price=Decimal("11.000"),
+        sort="-quantity")
+
+    assert [item.quantity for item in result.items] == [15, 5, 3]
+
+
+async def test_catalog_should_follow_product_writes(snapshot, product_in):
+    """
+    Este teste verifica se a cópia do catálogo acompanha as escritas feitas
+    pelo caso de uso de produtos.
+
+    Cenário: Cria um produto, altera o seu preço e exclui outro produto.
+
+    Espere:
+        * O produto criado com o preço atualizado na consulta.
+        * O produto excluído fora da consulta.
+    """
+    created = await product_usecase.create(body=product_in)
+    await product_usecase.update(
+        id=created.id, body=ProductUpdate(price=Decimal("1.00")))
+    cheapest = snapshot.query(sort="price", limit=1).items[0]
+    await product_usecase.delete(id=cheapest.id)
+
+    result = snapshot.query(sort="price")
+
+    assert cheapest.id == created.id
+    assert cheapest.price == Decimal("1.00")
+    assert result.count == 4
+    assert created.id not in [item.id for item in result.items]
+
+
+async def test_catalog_should_round_prices_to_minor_units(snapshot):
+    """
+    Este teste verifica se os preços com mais casas que `PRICE_SCALE` são
+    arredondados, e não truncados, e se os limites da faixa de preço com
+    mais casas são aplicados sem incluir preços fora da faixa.
+
+    Cenário: Altera o preço de um produto para 19,999 e o de outro para
+    19,99, e busca os produtos a partir de 19,995.
+
+    Espere:
+        * Apenas o primeiro produto, com o preço 20,00.
+    """
+    first, second = snapshot.query(sort="price", limit=2).items
+    await product_usecase.update(
+        id=first.id, body=ProductUpdate(price=Decimal("19.999")))
+    await product_usecase.update(
+        id=second.id, body=ProductUpdate(price=Decimal("19.99")))
+
+    result = snapshot.query(min_price=Decimal("19.995"), max_price=Decimal("20"))
+
+    assert [item.id for item in result.items] == [first.id]
+    assert result.items[0].price == Decimal("20.00")
+
+
+async def test_catalog_should_sort_names_and_compact_renames(
+    snapshot, monkeypatch
+):
+    """
+    Este teste verifica se a ordenação por nome acompanha as alterações de
+    nome e se os nomes substituídos e excluídos são descartados da memória.
+
+    Cenário: Com compactação a partir de 1 byte, renomeia um produto 21
+    vezes, exclui outro e consulta em ordem alfabética decrescente.
+
+    Espere:
+        * O produto renomeado na posição do novo nome.
+        * `names` com no máximo o dobro dos nomes atuais.
+    """
+    monkeypatch.setattr("store.usecases.catalog.NAMES_COMPACT_MIN_BYTES", 1)
+    columns = snapshot.columns
+    first, second = snapshot.query(sort="name", limit=2).items
+    document = await product_usecase.collection.find_one({"_id": first.id})
+    for index in range(20):
+        snapshot.apply(ProductEvent(
+            "upsert", first.id, {**document, "name": f"Renamed {index}"}))
+    snapshot.apply(
+        ProductEvent("upsert", first.id, {**document, "name": "Zune"}))
+    await product_usecase.delete(id=second.id)
+
+    result = snapshot.query(sort="-name")
+
+    assert result.items[0].id == first.id
+    assert result.items[0].name == "Zune"
+    assert [item.name for item in result.items[1:]] == sorted(
+        (item.name for item in result.items[1:]), reverse=True)
+    assert len(columns.names) <= 2 * sum(
+        len(columns.name(row).encode()) for row in columns.rows.values())
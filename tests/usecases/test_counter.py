@@ -0,0 +1,156 @@
+import pytest
+
+from store.core.config import settings
+from store.schemas.product import ProductUpdate
+from store.usecases.counter import StockCounterManager
+from store.usecases.product import (  # E501
+    product_cache,
+    product_usecase,
+    sharded_stock,
+    stock_writes,
+)
+
+
+@pytest.fixture(autouse=True)
+async def counters(monkeypatch):
+    monkeypatch.setattr(settings, "COUNTER_SLOTS", 4)
+    await product_usecase.create_indexes()
+    sharded_stock.clear()
+    stock_writes.clear()
+    product_cache.clear()
+    yield StockCounterManager()
+    sharded_stock.clear()
+    stock_writes.clear()
+
+
+async def test_usecases_adjust_stock_should_increment_quantity(
+    product_inserted
+):
+    """
+    Este teste verifica se o ajuste de estoque de um produto comum soma o
+    valor à quantidade e retorna a nova quantidade.
+
+    Cenário: Dá baixa de 3 unidades em um produto com 10.
+
+    Espere:
+        * Quantidade 7 na resposta e na leitura do produto.
+    """
+    result = await product_usecase.adjust_stock(
+        id=product_inserted.id, delta=-3)
+
+    assert result.sharded is False
+    assert result.quantity == 7
+    assert (await product_usecase.get(id=product_inserted.id)).quantity == 7
+
+
+async def test_usecases_sharded_stock_should_keep_total(
+    product_inserted, counters
+):
+    """
+    Este teste verifica se a quantidade se mantém correta ao longo da
+    promoção, dos ajustes distribuídos, de uma quantidade absoluta e do
+    rebaixamento.
+
+    Cenário: Promove um produto com 10 unidades, faz ajustes nas partes,
+    grava a quantidade 100 com `update`, ajusta de novo e rebaixa.
+
+    Espere:
+        * Ajustes nas partes, consolidados em `quantity` por `refresh`.
+        * A quantidade absoluta preservando os ajustes posteriores.
+        * Após o rebaixamento, a quantidade total em `quantity` e os ajustes
+        de volta ao documento do produto, mesmo com a distribuição antiga
+        ainda em memória.
+    """
+    id = product_inserted.id
+    assert await counters.promote(id) is True
+
+    for delta in (5, -2, 7):
+        result = await product_usecase.adjust_stock(id=id, delta=delta)
+        assert result.sharded is True
+
+    await counters.refresh()
+    assert (await product_usecase.get(id=id)).quantity == 20
+
+    await product_usecase.update(id=id, body=ProductUpdate(quantity=100))
+    await product_usecase.adjust_stock(id=id, delta=-1)
+    await counters.refresh()
+    assert (await product_usecase.get(id=id)).quantity == 99
+
+    assert await counters.demote(id) is True
+    assert (await product_usecase.get(id=id)).quantity == 99
+
+    sharded_stock[id] = settings.COUNTER_SLOTS
+    result = await product_usecase.adjust_stock(id=id, delta=1)
+    assert result.sharded is False
+    assert result.quantity == 100
+
+
+async def test_usecases_stock_counters_should_follow_write_rate(
+    product_inserted, counters, monkeypatch
+):
+    """
+    Este teste verifica se os produtos são promovidos e rebaixados conforme
+    a taxa de ajustes observada.
+
+    Cenário: Com promoção a partir de 2 ajustes por segundo, faz 5 ajustes em
+    um segundo; depois, sem ajustes e com rebaixamento imediato, consolida
+    novamente.
+
+    Espere:
+        * Produto promovido após a primeira consolidação e rebaixado após a
+        segunda, sem perder os ajustes.
+    """
+    monkeypatch.setattr(settings, "COUNTERS_ENABLED", True)
+    monkeypatch.setattr(settings, "COUNTER_PROMOTE_WRITES_PER_SECOND", 2)
+    monkeypatch.setattr(settings, "COUNTER_DEMOTE_AFTER_SECONDS", 0)
+    id = product_inserted.id
+
+    await counters.refresh()
+    for _ in range(5):
+        await product_usecase.adjust_stock(id=id, delta=1)
+    counters.refreshed_at -= 1
+    await counters.refresh()
+
+    assert sharded_stock.get(id) == settings.COUNTER_SLOTS
+    assert (await product_usecase.adjust_stock(id=id, delta=1)).sharded
+
+    counters.refreshed_at -= 1
+    await counters.refresh()
+    counters.refreshed_at -= 1
+    await counters.refresh()
+
+    assert id not in sharded_stock
+    assert counters.demotions == 1
+    assert (await product_usecase.get(id=id)).quantity == 16
+
+
+async def test_usecases_demote_should_close_missing_slots(
+    product_inserted, counters, monkeypatch
+):
+    """
+    Este teste verifica se o rebaixamento fecha também as partes que faltam,
+    de modo que um ajuste atrasado não as cria abertas.
+
+    Cenário: Promove um produto, remove uma das partes e o rebaixa; depois
+    faz um ajuste com a distribuição antiga ainda em memória, dirigido à
+    parte removida, e promove o produto novamente.
+
+    Espere:
+        * Ajuste atrasado feito diretamente em `quantity`.
+        * Quantidade correta após a nova promoção e consolidação.
+    """
+    id = product_inserted.id
+    await counters.promote(id)
+    await product_usecase.counters.delete_one({"product_id": id, "slot": 2})
+    assert await counters.demote(id) is True
+
+    sharded_stock[id] = settings.COUNTER_SLOTS
+    monkeypatch.setattr("random.randrange", lambda stop: 2)
+    result = await product_usecase.adjust_stock(id=id, delta=5)
+
+    assert result.sharded is False
+    assert result.quantity == 15
+
+    await counters.promote(id)
+    await counters.refresh()
+    assert (await product_usecase.get(id=id)).quantity == 15
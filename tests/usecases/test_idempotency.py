@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from store.core.exceptions import ConflictException, UnprocessableException
+from store.usecases.idempotency import (  # E501
+    fingerprint,
+    idempotency_cache,
+    idempotency_usecase,
+    idempotent_id,
+)
+from store.usecases.product import product_usecase
+
+
+@pytest.fixture(autouse=True)
+def clear_idempotency_cache():
+    idempotency_cache.clear()
+    yield
+    idempotency_cache.clear()
+
+
+async def test_usecases_idempotency_should_replay_response(product_in):
+    """
+    Este teste verifica se a repetição de uma escrita com a mesma chave
+    retorna a resposta original sem executar a escrita novamente.
+
+    Cenário: Executa duas vezes a criação de um produto com a mesma chave,
+    com e sem o cache em memória.
+
+    Espere:
+        * Escrita executada uma única vez.
+        * Mesma resposta nas repetições, marcadas como repetidas.
+    """
+    calls = []
+
+    async def create():
+        calls.append(1)
+        return await product_usecase.create(
+            body=product_in, id=idempotent_id("test", "key-1"))
+
+    first = await idempotency_usecase.execute(
+        scope="test", key="key-1", request=product_in, status_code=201,
+        func=create)
+    second = await idempotency_usecase.execute(
+        scope="test", key="key-1", request=product_in, status_code=201,
+        func=create)
+    idempotency_cache.clear()
+    third = await idempotency_usecase.execute(
+        scope="test", key="key-1", request=product_in, status_code=201,
+        func=create)
+
+    assert len(calls) == 1
+    assert first.replayed is False
+    assert second.replayed is True and third.replayed is True
+    assert first.body == second.body == third.body
+    assert first.body["id"] == str(idempotent_id("test", "key-1"))
+
+
+async def test_usecases_idempotency_should_reject_other_request(product_in):
+    """
+    Este teste verifica se a chave reutilizada com outro corpo, ou enquanto a
+    primeira requisição está em andamento, é rejeitada.
+
+    Cenário: Reserva uma chave sem concluir a escrita e a reutiliza; depois
+    conclui uma escrita e reutiliza a chave com outro corpo.
+
+    Espere:
+        * `ConflictException` com a escrita em andamento.
+        * `UnprocessableException` com o corpo diferente.
+    """
+    async def create():
+        return await product_usecase.create(body=product_in)
+
+    await idempotency_usecase.acquire("test:pending", fingerprint(product_in))
+    with pytest.raises(ConflictException):
+        await idempotency_usecase.execute(
+            scope="test", key="pending", request=product_in, status_code=201,
+            func=create)
+
+    await idempotency_usecase.execute(
+        scope="test", key="done", request=product_in, status_code=201,
+        func=create)
+    with pytest.raises(UnprocessableException):
+        await idempotency_usecase.execute(
+            scope="test", key="done", request={"other": True},
+            status_code=201, func=create)
+
+
+async def test_usecases_idempotency_should_recover_abandoned_write(
+    product_in
+):
+    """
+    Este teste verifica se uma escrita interrompida após gravar o produto,
+    mas antes de gravar a resposta, é retomada sem duplicar o produto.
+
+    Cenário: Grava o produto com o ID derivado da chave, deixa a chave
+    reservada com a trava vencida e repete a requisição.
+
+    Espere:
+        * Requisição executada, não repetida.
+        * O mesmo produto retornado e um único produto cadastrado.
+    """
+    id = idempotent_id("test", "crashed")
+    product = await product_usecase.create(body=product_in, id=id)
+    await idempotency_usecase.acquire("test:crashed", "stale")
+    await idempotency_usecase.collection.update_one(
+        {"_id": "test:crashed"},
+        {"$set": {
+            "fingerprint": fingerprint(product_in),
+            "locked_until": datetime.now() - timedelta(seconds=1),
+        }},
+    )
+
+    response = await idempotency_usecase.execute(
+        scope="test", key="crashed", request=product_in, status_code=201,
+        func=lambda: product_usecase.create(body=product_in, id=id))
+
+    assert response.replayed is False
+    assert response.body["id"] == str(product.id)
+    assert await product_usecase.collection.count_documents({}) == 1
+
+
+async def test_usecases_idempotency_should_not_replay_deleted_products(
+    products_in
+):
+    """
+    Este teste verifica se a repetição de uma criação cujos produtos foram
+    excluídos é recusada, em vez de retornar os produtos excluídos.
+
+    Cenário: Cria um produto e vários produtos com IDs derivados de chaves,
+    exclui o primeiro e um dos demais e repete as criações.
+
+    Espere:
+        * `ConflictException` nas repetições, individual e em lote.
+    """
+    id = idempotent_id("test", "deleted")
+    ids = [idempotent_id("test", "bulk", index) for index in range(2)]
+    await product_usecase.create(body=products_in[0], id=id)
+    await product_usecase.create_many(body=products_in[:2], ids=ids)
+
+    await product_usecase.delete(id=id)
+    await product_usecase.delete(id=ids[1])
+
+    with pytest.raises(ConflictException):
+        await product_usecase.create(body=products_in[0], id=id)
+    with pytest.raises(ConflictException):
+        await product_usecase.create_many(body=products_in[:2], ids=ids)
@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from store.core.config import settings
+from store.core.exceptions import NotFoundException
+from store.schemas.job import ExportIn, JobOut, RepriceIn
+from store.usecases.job import job_usecase
+from store.usecases.product import product_usecase
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_CHUNK_SIZE", 2)
+
+
+async def run_next(owner: str = "worker") -> None:
+    job = await job_usecase.claim(owner)
+    await job_usecase.run(job, owner)
+
+
+async def test_usecases_job_import_should_create_products(products_in):
+    """
+    Este teste verifica se uma importação agendada cria todos os produtos,
+    lote a lote.
+
+    Cenário: Agenda a importação de 4 produtos em lotes de 2 e executa o
+    processamento.
+
+    Espere:
+        * Processamento pendente no agendamento.
+        * Processamento concluído com 2 lotes e 4 produtos processados.
+        * Os 4 produtos cadastrados.
+    """
+    job = await job_usecase.submit_import(body=products_in)
+
+    assert isinstance(job, JobOut)
+    assert job.status == "pending"
+
+    await run_next()
+    result = await job_usecase.get(id=job.id)
+
+    assert result.status == "succeeded"
+    assert result.chunks == 2
+    assert result.processed == 4
+    assert len(await product_usecase.query()) == 4
+
+
+@pytest.mark.usefixtures("products_inserted")
+async def test_usecases_job_reprice_should_resume_after_worker_loss():
+    """
+    Este teste verifica se um reajuste interrompido continua do último lote
+    confirmado em outro trabalhador, sem reajustar um produto duas vezes.
+
+    Cenário: O primeiro trabalhador confirma o primeiro lote e aplica o
+    segundo sem confirmá-lo, simulando uma queda. Após a concessão expirar,
+    um segundo trabalhador obtém e conclui o processamento.
+
+    Espere:
+        * O segundo trabalhador continuando a partir do segundo lote.
+        * Todos os preços reajustados em 10% exatamente uma vez.
+    """
+    before = {item.id: item.price for item in await product_usecase.query()}
+    job = await job_usecase.submit_reprice(body=RepriceIn(percent="10"))
+
+    claimed = await job_usecase.claim("worker-a")
+    assert await job_usecase.commit(
+        claimed, "worker-a", await job_usecase.step(claimed))
+    await job_usecase.step(claimed)
+
+    assert await job_usecase.claim("worker-b") is None
+
+    await job_usecase.collection.update_one(
+        {"_id": job.id},
+        {"$set": {"lease_expires_at": datetime.now() - timedelta(seconds=1)}},
+    )
+    resumed = await job_usecase.claim("worker-b")
+
+    assert resumed["chunk"] == 1
+
+    await job_usecase.run(resumed, "worker-b")
+    result = await job_usecase.get(id=job.id)
+    after = {item.id: item.price for item in await product_usecase.query()}
+
+    assert result.status == "succeeded"
+    assert result.processed == 4
+    assert after == {
+        id: (price * Decimal("1.10")).quantize(Decimal("0.01"))
+        for id, price in before.items()
+    }
+
+
+@pytest.mark.usefixtures("products_inserted")
+async def test_usecases_job_export_should_store_results():
+    """
+    Este teste verifica se uma exportação grava os produtos filtrados em
+    lotes consultáveis.
+
+    Cenário: Exporta os produtos com preço entre 5.000 e 8.000.
+
+    Espere:
+        * Processamento concluído com os 2 produtos da faixa no primeiro lote.
+    """
+    job = await job_usecase.submit_export(
+        body=ExportIn(min_price="5.000", max_price="8.000"))
+
+    await run_next()
+    result = await job_usecase.get(id=job.id)
+    exported = await job_usecase.get_results(id=job.id, chunk=0)
+
+    assert result.status == "succeeded"
+    assert result.processed == 2
+    assert sorted(item.name for item in exported) == [
+        "Iphone 12 Pro Max", "Iphone 13 Pro Max"]
+
+
+@pytest.mark.usefixtures("products_inserted")
+async def test_usecases_job_should_back_off_and_fail(monkeypatch):
+    """
+    Este teste verifica se um processamento com erro é repetido apenas após
+    o intervalo de espera e marcado como falho após o limite de tentativas,
+    ficando guardado até o fim da retenção.
+
+    Cenário: Com 2 tentativas e a leitura dos produtos falhando, executa o
+    processamento, tenta obtê-lo logo em seguida e, após antecipar o
+    intervalo de espera, executa de novo.
+
+    Espere:
+        * Nenhum processamento obtido durante o intervalo de espera.
+        * Processamento falho após a segunda tentativa, com o erro.
+        * Data de expiração após `JOBS_RETENTION_DAYS` dias.
+    """
+    async def failing_scan(**kwargs):
+        raise RuntimeError("scan failed")
+
+    monkeypatch.setattr(settings, "JOBS_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(product_usecase, "scan", failing_scan)
+    job = await job_usecase.submit_export(body=ExportIn())
+
+    await run_next()
+    retrying = await job_usecase.collection.find_one({"_id": job.id})
+
+    assert retrying["attempts"] == 1
+    assert retrying["retry_at"] > datetime.now()
+    assert await job_usecase.claim("worker") is None
+
+    await job_usecase.collection.update_one(
+        {"_id": job.id},
+        {"$set": {"retry_at": datetime.now() - timedelta(seconds=1)}},
+    )
+    await run_next()
+    result = await job_usecase.collection.find_one({"_id": job.id})
+
+    assert result["status"] == "failed"
+    assert "scan failed" in result["error"]
+    assert result["expires_at"] > datetime.now() + timedelta(
+        days=settings.JOBS_RETENTION_DAYS - 1)
+
+
+async def test_usecases_job_import_inputs_should_expire(products_in):
+    """
+    Este teste verifica se os lotes de uma importação são gravados com data
+    de expiração, para que lotes sem processamento não fiquem no banco.
+
+    Espere:
+        * Todos os lotes com `expires_at`.
+    """
+    job = await job_usecase.submit_import(body=products_in)
+
+    chunks = await job_usecase.inputs.find({"job_id": job.id}).to_list(None)
+
+    assert len(chunks) == 2
+    assert all(chunk["expires_at"] > datetime.now() for chunk in chunks)
+
+
+async def test_usecases_job_get_should_not_found():
+    """
+    Este teste verifica se a busca de um processamento inexistente levanta a
+    exceção `NotFoundException`.
+
+    Espere:
+        * Levantamento da exceção `NotFoundException`.
+    """
+    with pytest.raises(NotFoundException):
+        await job_usecase.get(id="1e4f214e-85f7-461a-89d0-a751a32e3bb9")
@@ -1,11 +1,29 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
 from typing import List
 from uuid import UUID
 
 import pytest
 
-from store.core.exceptions import NotFoundException
-from store.schemas.product import ProductOut, ProductUpdateOut
-from store.usecases.product import product_usecase
+from store.core.config import settings
+from store.core.exceptions import (  # E501
+    DeadlineExceededException,
+    GoneException,
+    NotFoundException,
+    UnprocessableException,
+)
+from store.schemas.product import ProductOut, ProductUpdate, ProductUpdateOut
+from store.usecases import product as product_module
+from store.usecases.product import (  # E501
+    decode_change_token,
+    encode_change_token,
+    list_cache,
+    product_cache,
+    product_usecase,
+)
 
 
 async def test_usecases_create_should_return_success(product_in):
@@ -154,3 +172,362 @@ async def test_usecases_delete_should_not_found():
         err.value.message
         == "Product not found with filter: 1e4f214e-85f7-461a-89d0-a751a32e3bb9"
     )
+
+
+async def test_usecases_delete_should_hide_product(product_inserted):
+    """
+    Este teste verifica se um produto excluído logicamente deixa de ser
+    retornado pelas leituras.
+
+    Cenário: Exclui um produto previamente inserido e tenta buscá-lo.
+
+    Espere:
+        * Levantamento da exceção `NotFoundException` na busca.
+        * O produto ausente da listagem.
+    """
+    await product_usecase.delete(id=product_inserted.id)
+
+    with pytest.raises(NotFoundException):
+        await product_usecase.get(id=product_inserted.id)
+
+    assert product_inserted.id not in [
+        item.id for item in await product_usecase.query()]
+
+
+async def test_usecases_archive_should_move_deleted_products(product_inserted):
+    """
+    Este teste verifica se o caso de uso `product_usecase.archive` move os
+    produtos excluídos para a coleção `products_archive`.
+
+    Cenário: Exclui um produto previamente inserido, antecipa a data de
+    exclusão em 31 dias e arquiva as exclusões com mais de 30 dias.
+
+    Espere:
+        * Retorno da quantidade de produtos arquivados.
+        * O documento presente somente na coleção de arquivo.
+    """
+    await product_usecase.delete(id=product_inserted.id)
+    await product_usecase.collection.update_one(
+        {"_id": product_inserted.id},
+        {"$set": {"deleted_at": datetime.now() - timedelta(days=31)}},
+    )
+
+    result = await product_usecase.archive(older_than=timedelta(days=30))
+
+    assert result == 1
+    assert await product_usecase.collection.count_documents(
+        {"_id": product_inserted.id}) == 0
+    assert await product_usecase.archive_collection.count_documents(
+        {"_id": product_inserted.id}) == 1
+
+
+async def test_usecases_archive_should_respect_deadline(
+    product_inserted, monkeypatch
+):
+    """
+    Este teste verifica se o arquivamento respeita o prazo da operação
+    `archive`, sem remover produtos que não foram copiados.
+
+    Cenário: Com prazo de 50 ms para `archive`, arquiva um produto excluído
+    há 31 dias enquanto a cópia para a coleção de arquivo demora 1 segundo.
+
+    Espere:
+        * Exceção `DeadlineExceededException`.
+        * O produto mantido na coleção principal.
+    """
+    monkeypatch.setattr(settings, "MONGO_TIMEOUTS_MS", {"archive": 50})
+    monkeypatch.setattr(settings, "MONGO_CLIENT_TIMEOUT_MARGIN_MS", 0)
+    monkeypatch.setattr(
+        product_module,
+        "insert_ignoring_duplicates",
+        lambda collection, documents: asyncio.sleep(1),
+    )
+    await product_usecase.delete(id=product_inserted.id)
+    await product_usecase.collection.update_one(
+        {"_id": product_inserted.id},
+        {"$set": {"deleted_at": datetime.now() - timedelta(days=31)}},
+    )
+
+    with pytest.raises(DeadlineExceededException):
+        await product_usecase.archive(older_than=timedelta(days=30))
+
+    assert await product_usecase.collection.count_documents(
+        {"_id": product_inserted.id}) == 1
+
+
+def test_usecases_reader_should_use_operation_read_preference():
+    """
+    Este teste verifica se a listagem lê dos secundários e a busca por ID lê
+    do primário.
+
+    Espere:
+        * Preferência `secondaryPreferred` para `query`.
+        * Preferência `primary` para `get`.
+    """
+    assert product_usecase.reader("query").read_preference.mongos_mode == (
+        "secondaryPreferred")
+    assert product_usecase.reader("get").read_preference.mongos_mode == "primary"
+
+
+async def test_usecases_create_many_should_return_success(products_in):
+    """
+    Este teste verifica se o caso de uso `product_usecase.create_many` cria
+    vários produtos em uma única escrita.
+
+    Cenário: Realiza uma chamada ao caso de uso `create_many` passando uma
+    lista de produtos válidos (`products_in`).
+
+    Espere:
+        * Retorno de uma lista de `ProductOut` na ordem da entrada.
+        * Todos os produtos persistidos.
+    """
+    result = await product_usecase.create_many(body=products_in)
+
+    assert [item.name for item in result] == [
+        item.name for item in products_in]
+    assert len(await product_usecase.query()) == len(products_in)
+
+
+@pytest.mark.usefixtures("products_inserted")
+async def test_usecases_query_should_filter_by_price():
+    """
+    Este teste verifica se o caso de uso `product_usecase.query` filtra os
+    produtos por faixa de preço.
+
+    Cenário: Lista os produtos com preço entre 5.000 e 8.000.
+
+    Espere:
+        * Somente os produtos dentro da faixa.
+    """
+    result = await product_usecase.query(
+        min_price=Decimal("5.000"), max_price=Decimal("8.000"))
+
+    assert sorted(item.name for item in result) == [
+        "Iphone 12 Pro Max", "Iphone 13 Pro Max"]
+
+
+async def test_usecases_get_many_should_keep_request_order(products_inserted):
+    """
+    Este teste verifica se o caso de uso `product_usecase.get_many` retorna
+    os produtos na ordem dos IDs recebidos, com `None` para os inexistentes.
+
+    Cenário: Busca dois produtos existentes, em ordem invertida, um ID
+    inexistente e um ID repetido.
+
+    Espere:
+        * Um item por ID, na ordem da chamada.
+        * `None` na posição do ID inexistente.
+    """
+    missing = UUID("1e4f214e-85f7-461a-89d0-a751a32e3bb9")
+    first, second = products_inserted[0], products_inserted[1]
+
+    result = await product_usecase.get_many(
+        ids=[second.id, missing, first.id, second.id])
+
+    assert [item and item.name for item in result] == [
+        second.name, None, first.name, second.name]
+
+
+async def test_usecases_get_many_should_serve_cached_products(
+    products_inserted, monkeypatch
+):
+    """
+    Este teste verifica se, com o cache habilitado, os produtos já lidos são
+    servidos sem consultar o MongoDB e se uma atualização os invalida.
+
+    Cenário: Busca dois produtos, remove o primeiro diretamente do banco e
+    atualiza o segundo pelo caso de uso; em seguida busca os dois de novo.
+
+    Espere:
+        * O primeiro produto servido pelo cache mesmo após removido do banco.
+        * O segundo produto refletindo a atualização.
+    """
+    monkeypatch.setattr(product_cache, "ttl", 60)
+    product_cache.clear()
+    first, second = products_inserted[0], products_inserted[1]
+
+    await product_usecase.get_many(ids=[first.id, second.id])
+    await product_usecase.collection.delete_one({"_id": first.id})
+    await product_usecase.update(id=second.id, body=ProductUpdate(quantity=99))
+    result = await product_usecase.get_many(ids=[first.id, second.id])
+    product_cache.clear()
+
+    assert result[0].name == first.name
+    assert result[1].quantity == 99
+
+
+async def test_usecases_query_json_should_serve_cached_lists(
+    products_inserted, product_in, monkeypatch
+):
+    """
+    Este teste verifica se, com o cache de listagens habilitado, a mesma
+    listagem é servida do cache e se uma escrita a invalida.
+
+    Cenário: Lista os produtos duas vezes, com o preço mínimo escrito de
+    formas diferentes, e de novo após criar um produto.
+
+    Espere:
+        * Os mesmos bytes nas duas primeiras listagens, a segunda do cache.
+        * O produto criado presente na terceira listagem.
+    """
+    monkeypatch.setattr(list_cache, "ttl", 60)
+    list_cache.clear()
+
+    first = await product_usecase.query_json(min_price=Decimal("1"))
+    hits = list_cache.hits
+    second = await product_usecase.query_json(min_price=Decimal("1.00"))
+    await product_usecase.create(body=product_in)
+    third = await product_usecase.query_json(min_price=Decimal("1"))
+    list_cache.clear()
+
+    assert second is first
+    assert list_cache.hits == hits + 1
+    assert len(json.loads(third)) == len(json.loads(first)) + 1
+
+
+async def test_usecases_query_json_should_not_cache_stale_secondaries(
+    product_inserted, monkeypatch
+):
+    """
+    Este teste verifica se, com o cache de listagens habilitado, a listagem
+    não é lida de um secundário atrasado, que guardaria no cache o estado
+    anterior a uma escrita.
+
+    Cenário: Com os secundários devolvendo os produtos lidos antes de uma
+    alteração de quantidade, altera a quantidade e lista os produtos duas
+    vezes.
+
+    Espere:
+        * A nova quantidade nas duas listagens.
+    """
+    stale = await product_usecase.collection.find({}).to_list(None)
+    secondary = SimpleNamespace(find=lambda criteria: SimpleNamespace(
+        to_list=lambda length: asyncio.sleep(0, stale)))
+    monkeypatch.setattr(product_usecase, "reader", lambda operation: secondary)
+    monkeypatch.setattr(list_cache, "ttl", 60)
+    list_cache.clear()
+
+    await product_usecase.update(
+        id=product_inserted.id, body=ProductUpdate(quantity=3))
+    first = await product_usecase.query_json()
+    second = await product_usecase.query_json()
+    list_cache.clear()
+
+    for body in (first, second):
+        assert [item["quantity"] for item in json.loads(body)] == [3]
+
+
+async def test_usecases_update_should_set_updated_at(product_inserted):
+    """
+    Este teste verifica se a atualização de um produto registra o momento
+    da alteração em `updated_at`.
+
+    Cenário: Atualiza o preço de um produto já cadastrado, alguns
+    milissegundos após a criação (o MongoDB guarda milissegundos).
+
+    Espere:
+        * `updated_at` posterior ao da criação.
+    """
+    await asyncio.sleep(0.01)
+    result = await product_usecase.update(
+        id=product_inserted.id, body=ProductUpdate(price="7.500"))
+
+    assert result.updated_at > product_inserted.updated_at
+
+
+async def test_usecases_changes_should_page_changes_and_tombstones(
+    products_inserted, monkeypatch
+):
+    """
+    Este teste verifica se a sincronização retorna as alterações em páginas
+    encadeadas pelo token, incluindo os produtos excluídos.
+
+    Cenário: Com 4 produtos cadastrados e 1 excluído, lê as alterações em
+    páginas de 3 até o fim.
+
+    Espere:
+        * Primeira página com 3 alterações e `has_more` verdadeiro.
+        * Segunda página com a alteração restante, sem `has_more`.
+        * O produto excluído marcado como `deleted`, sem dados.
+        * Página vazia após o fim, mantendo a posição do token.
+    """
+    monkeypatch.setattr(settings, "CHANGES_SETTLE_SECONDS", 0)
+    deleted = products_inserted[0].id
+    await product_usecase.delete(id=deleted)
+
+    first = await product_usecase.changes(limit=3)
+    second = await product_usecase.changes(since=first.next, limit=3)
+    last = await product_usecase.changes(since=second.next, limit=3)
+
+    changes = first.changes + second.changes
+    assert len(first.changes) == 3 and first.has_more is True
+    assert len(second.changes) == 1 and second.has_more is False
+    assert {change.id for change in changes} == {
+        product.id for product in products_inserted}
+    assert [change.deleted for change in changes if change.id == deleted] == [
+        True]
+    assert all(
+        change.product is not None for change in changes
+        if change.id != deleted)
+    assert last.changes == []
+    assert decode_change_token(last.next)[:2] == decode_change_token(
+        second.next)[:2]
+
+
+async def test_usecases_changes_should_page_old_catalogs(
+    products_inserted, monkeypatch
+):
+    """
+    Este teste verifica se um catálogo alterado pela última vez há mais de
+    `ARCHIVE_AFTER_DAYS` dias pode ser paginado e acompanhado, já que o
+    prazo conta de quando a cópia do cliente estava completa, e não da
+    posição das alterações.
+
+    Cenário: Com todos os produtos alterados há 60 dias, lê as alterações em
+    páginas de 2 até o fim e consulta novamente; depois usa um token completo
+    há 60 dias.
+
+    Espere:
+        * Todas as páginas e a consulta seguinte sem `GoneException`.
+        * `GoneException` para o token completo há 60 dias.
+    """
+    monkeypatch.setattr(settings, "ARCHIVE_ENABLED", True)
+    monkeypatch.setattr(settings, "ARCHIVE_AFTER_DAYS", 30)
+    old = datetime.now() - timedelta(days=60)
+    await product_usecase.collection.update_many(
+        {}, {"$set": {"updated_at": old}})
+
+    page = await product_usecase.changes(limit=2)
+    ids = [change.id for change in page.changes]
+    while page.has_more:
+        page = await product_usecase.changes(since=page.next, limit=2)
+        ids += [change.id for change in page.changes]
+    quiet = await product_usecase.changes(since=page.next, limit=2)
+
+    assert sorted(ids) == sorted(product.id for product in products_inserted)
+    assert quiet.changes == [] and quiet.has_more is False
+
+    updated_at, id, _ = decode_change_token(quiet.next)
+    with pytest.raises(GoneException):
+        await product_usecase.changes(
+            since=encode_change_token(updated_at, id, old))
+
+
+async def test_usecases_changes_should_reject_bad_tokens():
+    """
+    Este teste verifica se a sincronização recusa tokens inválidos e tokens
+    mais antigos que a retenção das exclusões.
+
+    Espere:
+        * `UnprocessableException` para um token inválido.
+        * `GoneException` para um token anterior a `ARCHIVE_AFTER_DAYS`.
+    """
+    checked_at = datetime.now() - timedelta(
+        days=settings.ARCHIVE_AFTER_DAYS + 1)
+    expired = encode_change_token(
+        checked_at, UUID("fce6cc37-10b9-4a8e-a8b2-977df327001a"), checked_at)
+
+    with pytest.raises(UnprocessableException):
+        await product_usecase.changes(since="not-a-token")
+    with pytest.raises(GoneException):
+        await product_usecase.changes(since=expired)
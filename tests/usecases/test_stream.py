@@ -0,0 +1,130 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from store.core.config import settings
+from store.core.events import events
+from store.schemas.product import ProductUpdate
+from store.usecases.product import product_usecase
+from store.usecases.stream import DROPPED, HEARTBEAT, ProductStream
+
+
+@pytest.fixture
+def stream():
+    stream = ProductStream()
+    events.subscribe(stream.apply)
+    yield stream
+    events.unsubscribe(stream.apply)
+
+
+def payload(message: bytes) -> dict:
+    event, data = message.decode().strip().split("\n")
+    assert event == "event: product"
+
+    return json.loads(data.removeprefix("data: "))
+
+
+async def test_usecases_stream_should_fan_out_changes(
+    product_inserted, stream
+):
+    """
+    Este teste verifica se as conexões recebem o estado atual dos produtos e
+    as alterações de quantidade, preço e status, serializadas uma única vez.
+
+    Cenário: Abre duas conexões para o mesmo produto, altera a quantidade,
+    depois apenas o nome, e encerra uma das conexões.
+
+    Espere:
+        * Estado atual como primeira mensagem.
+        * A mesma mensagem nas duas conexões após a alteração da quantidade.
+        * Nenhuma mensagem após a alteração do nome.
+        * Assinatura desfeita ao encerrar a conexão.
+    """
+    id = product_inserted.id
+    first = stream.stream([id])
+    second = stream.stream([id])
+
+    assert payload(await first.__anext__())["quantity"] == 10
+    assert payload(await second.__anext__())["quantity"] == 10
+
+    await product_usecase.update(id=id, body=ProductUpdate(quantity=4))
+    message = await first.__anext__()
+    assert message is await second.__anext__()
+    assert payload(message) == {
+        "id": str(id),
+        "quantity": 4,
+        "price": "8.500",
+        "status": True,
+        "deleted": False,
+    }
+
+    await product_usecase.update(id=id, body=ProductUpdate(name="Iphone 15"))
+    await first.aclose()
+
+    assert stream.snapshot()["connections"] == 1
+    assert stream.sent == 2
+
+
+async def test_usecases_stream_should_drop_slow_consumers(
+    product_inserted, stream, monkeypatch
+):
+    """
+    Este teste verifica se uma conexão que não consome as mensagens é
+    desconectada quando a sua fila enche, sem afetar as demais.
+
+    Cenário: Com filas de 2 mensagens, faz 3 alterações com uma conexão que
+    não lê e outra que lê a cada alteração.
+
+    Espere:
+        * Conexão lenta com apenas a mensagem `dropped` e sem assinatura.
+        * Conexão rápida com todas as alterações.
+    """
+    monkeypatch.setattr(settings, "STREAM_QUEUE_SIZE", 2)
+    id = product_inserted.id
+    slow = stream.subscribe([id])
+    fast = stream.subscribe([id])
+
+    for quantity in (1, 2, 3):
+        await product_usecase.update(id=id, body=ProductUpdate(quantity=quantity))
+        assert payload(fast.queue.get_nowait())["quantity"] == quantity
+
+    assert slow.dropped is True
+    assert slow.queue.get_nowait() is DROPPED
+    assert slow.queue.empty()
+    assert stream.dropped == 1
+    assert stream.snapshot()["connections"] == 1
+
+
+@pytest.mark.parametrize("max_ids", [0, 1000])
+async def test_usecases_stream_should_poll_other_processes(
+    product_inserted, stream, monkeypatch, max_ids
+):
+    """
+    Este teste verifica se a consulta periódica traz as alterações feitas
+    por outros processos, sem repetir as já enviadas, e se as conexões
+    ociosas recebem a mensagem de manutenção.
+
+    Cenário: Altera a quantidade diretamente no banco e consulta duas vezes,
+    buscando todas as alterações ou apenas os produtos acompanhados; depois
+    envia a manutenção das conexões.
+
+    Espere:
+        * A alteração após a primeira consulta e nada após a segunda.
+        * Comentário de manutenção na conexão ociosa.
+    """
+    monkeypatch.setattr(settings, "STREAM_POLL_MAX_IDS", max_ids)
+    id = product_inserted.id
+    subscription = stream.subscribe([id])
+    await product_usecase.collection.update_one(
+        {"_id": id}, {"$set": {"quantity": 7, "updated_at": datetime.now()}})
+
+    await stream.poll()
+    assert payload(subscription.queue.get_nowait())["quantity"] == 7
+
+    await stream.poll()
+    assert subscription.queue.empty()
+
+    await stream.heartbeat()
+    assert subscription.queue.get_nowait() is HEARTBEAT
+    assert stream.polls == 2